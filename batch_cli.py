@@ -0,0 +1,302 @@
+"""
+헤드리스 배치 보고서 생성기
+딜 폴더가 모인 디렉터리를 받아 폴더별로 parse_all_files → 보고서 생성 → .md/.docx/.pptx 저장
+
+- 워커 풀로 동시 실행 개수 제한 (--workers)
+- manifest.json으로 완료된 딜은 재실행 시 건너뜀 (입력 파일/맥락/구조/옵션이 바뀌면 다시 생성)
+- 딜별 단계 소요 시간(파싱/생성/내보내기) 요약 출력
+- 딜별 상세 계측(파서/OCR 페이지/LLM 호출/렌더링 span)은 출력 폴더의 trace.jsonl로 저장
+
+Usage:
+    python batch_cli.py ./deals --template management --workers 3 --out ./batch_out
+
+딜 폴더 구조:
+    deals/
+      회사A/  (context.txt 또는 context.md가 있으면 맥락 입력으로 사용)
+        IR.pdf
+        재무제표.xlsx
+      회사B/
+        ...
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+import core_chained
+import core_logic
+import prompts
+import utils
+import utils_ppt
+import utils_trace
+
+CONTEXT_FILES = ("context.txt", "context.md")
+DATA_EXTENSIONS = {
+    'pdf', 'docx', 'doc', 'pptx', 'ppt', 'xlsx', 'xls', 'csv', 'txt', 'md',
+    'png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp', 'gif', 'webp',
+}
+MANIFEST_NAME = "manifest.json"
+
+
+class LocalUploadedFile(io.BytesIO):
+    """로컬 파일을 Streamlit UploadedFile처럼 다루기 위한 래퍼 (name/size/getvalue 지원)"""
+
+    def __init__(self, path, name=None):
+        with open(path, "rb") as f:
+            data = f.read()
+        super().__init__(data)
+        self.name = name or os.path.basename(path)
+        self.size = len(data)
+
+
+def _deal_files(deal_dir):
+    """딜 폴더 내 분석 대상 파일 목록 (하위 폴더 포함, 정렬)"""
+    paths = []
+    for root, _, files in os.walk(deal_dir):
+        for name in files:
+            if name.lower() in CONTEXT_FILES or name.startswith("."):
+                continue
+            if name.rsplit(".", 1)[-1].lower() in DATA_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _deal_context(deal_dir, default_context):
+    for name in CONTEXT_FILES:
+        path = os.path.join(deal_dir, name)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+    return default_context or os.path.basename(deal_dir)
+
+
+def _signature(paths, args, structure_text, context_text, docai_config):
+    """
+    입력 파일(경로/크기/수정시각) + 구조/맥락 텍스트 + 생성 옵션 해시 → 재실행 시 변경 여부 판단
+
+    context.txt/md는 분석 대상 파일에서 빠지므로 실제 사용되는 맥락 텍스트(context_text)로 반영
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{path}|{st.st_size}|{int(st.st_mtime)}\n".encode("utf-8"))
+    h.update(f"{args.template}|{args.model}|{args.mode}|{args.thinking}|{args.diagram}\n".encode("utf-8"))
+    if docai_config:
+        h.update(f"docai|{docai_config['project_id']}|{docai_config['location']}|{docai_config['processor_id']}\n".encode("utf-8"))
+    for text in (structure_text, context_text):
+        h.update(hashlib.sha256((text or "").encode("utf-8")).digest())
+    return h.hexdigest()
+
+
+class Manifest:
+    """manifest.json 읽기/쓰기 (스레드 안전, 원자적 저장)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def is_done(self, deal, signature):
+        entry = self.data.get(deal)
+        return bool(entry) and entry.get("status") == "done" and entry.get("signature") == signature
+
+    def update(self, deal, entry):
+        with self._lock:
+            self.data[deal] = entry
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def _docai_config_from_env():
+    """ui_input.render_settings와 동일한 .env 기반 Document AI 설정"""
+    project = os.getenv("GCP_PROJECT_ID", "")
+    processor = os.getenv("DOCAI_PROCESSOR_ID", "")
+    creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    if not (project and processor and creds_path):
+        return None
+    if not os.path.isabs(creds_path):
+        creds_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), creds_path)
+    if not os.path.exists(creds_path):
+        return None
+    with open(creds_path, "r") as f:
+        creds_json = f.read()
+    return {
+        'project_id': project,
+        'location': os.getenv("DOCAI_LOCATION", "us"),
+        'processor_id': processor,
+        'credentials_json': creds_json,
+        'gcs_uri': os.getenv("DOCAI_GCS_URI", ""),
+    }
+
+
+def run_deal(deal_dir, args, api_key, docai_config, structure_text, default_context):
+    """딜 1건 처리 → (출력 파일 목록, 단계별 소요 시간)"""
+    deal = os.path.basename(os.path.normpath(deal_dir))
+    with utils_trace.run(f"batch:{deal}") as run_id:
+        timings = {}
+        paths = _deal_files(deal_dir)
+        uploaded_files = [LocalUploadedFile(p, os.path.relpath(p, deal_dir)) for p in paths]
+
+        started = time.perf_counter()
+        file_context, _ = core_logic.parse_all_files(
+            uploaded_files,
+            read_content=True,
+            api_key=api_key,
+            docai_config=docai_config,
+            template_option=args.template,
+        )
+        timings['parse'] = time.perf_counter() - started
+
+        inputs = {
+            'template_option': args.template,
+            'structure_text': structure_text,
+            'uploaded_files': uploaded_files,
+            'rfi_file_list_input': "\n".join(f"- {f.name}" for f in uploaded_files),
+            'context_text': _deal_context(deal_dir, default_context),
+            'rfi_existing': "",
+            'generation_mode': args.mode,
+            'use_diagram': args.diagram,
+        }
+
+        started = time.perf_counter()
+        if args.mode == 'chained' and core_chained.is_chained_supported(args.template):
+            stream = core_logic.generate_report_stream_chained(api_key, args.model, inputs, args.thinking, file_context)
+        else:
+            stream = core_logic.generate_report_stream(api_key, args.model, inputs, args.thinking, file_context)
+        first_chunk_at = None
+        parts = []
+        for chunk in stream:
+            if chunk.text:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                parts.append(chunk.text)
+        report = "".join(parts)
+        timings['ttft'] = (first_chunk_at - started) if first_chunk_at else 0.0
+        timings['generate'] = time.perf_counter() - started
+
+        out_dir = os.path.join(args.out, deal)
+        os.makedirs(out_dir, exist_ok=True)
+        # 파일명은 첫 업로드 파일 대신 딜 폴더명 기준
+        base = os.path.splitext(utils.generate_filename([SimpleNamespace(name=deal)], args.template))[0]
+
+        started = time.perf_counter()
+        outputs = []
+        md_path = os.path.join(out_dir, f"{base}.md")
+        with open(md_path, "w", encoding="utf-8") as f:
+            f.write(report)
+        outputs.append(md_path)
+
+        exporters = [("docx", utils.create_docx), ("pptx", utils_ppt.create_ppt)]
+        if args.template == 'rfi':
+            exporters.append(("xlsx", utils.create_excel))
+        for ext, exporter in exporters:
+            path = os.path.join(out_dir, f"{base}.{ext}")
+            with open(path, "wb") as f:
+                f.write(exporter(report))
+            outputs.append(path)
+        timings['export'] = time.perf_counter() - started
+
+        timings['total'] = timings['parse'] + timings['generate'] + timings['export']
+    trace_path = os.path.join(out_dir, "trace.jsonl")
+    utils_trace.export_jsonl(run_id, trace_path)
+    outputs.append(trace_path)
+    return outputs, timings
+
+
+def _print_summary(results):
+    header = f"{'deal':<30} {'status':<8} {'parse':>8} {'ttft':>8} {'generate':>9} {'export':>8} {'total':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+    for deal, entry in sorted(results.items()):
+        t = entry.get("timings", {})
+        print(f"{deal[:30]:<30} {entry['status']:<8} "
+              f"{t.get('parse', 0):>8.1f} {t.get('ttft', 0):>8.1f} {t.get('generate', 0):>9.1f} "
+              f"{t.get('export', 0):>8.1f} {t.get('total', 0):>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("deals_dir", help="딜 폴더들이 있는 디렉터리")
+    parser.add_argument("--template", required=True, choices=sorted(prompts.TEMPLATE_STRUCTURES.keys()),
+                        help="템플릿 키 (예: management, investment, simple_review)")
+    parser.add_argument("--out", default="batch_out", help="출력 디렉터리 (manifest.json 포함)")
+    parser.add_argument("--model", default="gemini-3-pro-preview")
+    parser.add_argument("--thinking", default="High", choices=["High", "Low"])
+    parser.add_argument("--mode", default="single", choices=["single", "chained"])
+    parser.add_argument("--workers", type=int, default=2, help="동시에 처리할 딜 수")
+    parser.add_argument("--structure", help="문서 구조 텍스트 파일 (없으면 템플릿 기본 구조)")
+    parser.add_argument("--context", default="", help="context 파일이 없는 딜에 사용할 공통 맥락")
+    parser.add_argument("--diagram", action="store_true", help="도식화 태그 삽입")
+    parser.add_argument("--docai", action="store_true", help=".env의 Document AI 설정 사용")
+    parser.add_argument("--force", action="store_true", help="manifest를 무시하고 전체 재생성")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY", "")
+    if not api_key:
+        print("GOOGLE_API_KEY가 설정되지 않았습니다 (.env 또는 환경 변수)", file=sys.stderr)
+        return 2
+
+    structure_text = core_logic.get_default_structure(args.template)
+    if args.structure:
+        with open(args.structure, "r", encoding="utf-8") as f:
+            structure_text = f.read()
+    docai_config = _docai_config_from_env() if args.docai else None
+
+    deal_dirs = sorted(
+        os.path.join(args.deals_dir, name) for name in os.listdir(args.deals_dir)
+        if os.path.isdir(os.path.join(args.deals_dir, name)) and not name.startswith(".")
+    )
+    os.makedirs(args.out, exist_ok=True)
+    manifest = Manifest(os.path.join(args.out, MANIFEST_NAME))
+
+    pending = []
+    results = {}
+    for deal_dir in deal_dirs:
+        deal = os.path.basename(deal_dir)
+        signature = _signature(
+            _deal_files(deal_dir), args, structure_text, _deal_context(deal_dir, args.context), docai_config
+        )
+        if not args.force and manifest.is_done(deal, signature):
+            results[deal] = dict(manifest.data[deal], status="skipped")
+            continue
+        pending.append((deal_dir, deal, signature))
+
+    print(f"{len(deal_dirs)}개 딜 중 {len(pending)}개 처리 (건너뜀 {len(deal_dirs) - len(pending)}개), workers={args.workers}")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(run_deal, deal_dir, args, api_key, docai_config, structure_text, args.context): (deal, signature)
+            for deal_dir, deal, signature in pending
+        }
+        for future in as_completed(futures):
+            deal, signature = futures[future]
+            try:
+                outputs, timings = future.result()
+                entry = {"status": "done", "signature": signature, "outputs": outputs, "timings": timings}
+                print(f"✅ {deal} ({timings['total']:.1f}s)")
+            except Exception as e:
+                entry = {"status": "failed", "signature": signature, "error": str(e)}
+                print(f"❌ {deal}: {e}", file=sys.stderr)
+            manifest.update(deal, entry)
+            results[deal] = entry
+
+    _print_summary(results)
+    return 0 if all(e["status"] != "failed" for e in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
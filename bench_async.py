@@ -0,0 +1,126 @@
+"""
+비동기 생성 API 벤치마크
+로컬 가짜 Gemini 서버(SSE 스트리밍)에 대해 N개 보고서를
+(1) 기존 sync 제너레이터로 순차 실행, (2) async API로 동시 실행하여 소요 시간 비교
+
+Usage:
+    python bench_async.py --reports 8 --chunks 40 --chunk-delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(chunks, chunk_delay, ttft):
+    class FakeGeminiHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            if ":streamGenerateContent" in self.path:
+                self._stream()
+            else:
+                self._single()
+
+        def _payload(self, text):
+            return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+        def _single(self):
+            time.sleep(ttft)
+            body = json.dumps(self._payload("| 항목 | 상태 |\n|---|---|\n| A | 수령 |")).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(ttft)
+            for i in range(chunks):
+                line = f"data: {json.dumps(self._payload(f'문장 {i}. '), ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+                time.sleep(chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+
+    return FakeGeminiHandler
+
+
+def start_server(chunks, chunk_delay, ttft):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(chunks, chunk_delay, ttft))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=8)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server = start_server(args.chunks, args.chunk_delay, args.ttft)
+    os.environ["GOOGLE_GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # 환경 변수 설정 이후에 import (클라이언트가 로컬 서버를 바라보도록)
+    import core_async
+    import core_logic
+    import utils_ratelimit
+
+    model = "bench-model"
+    utils_ratelimit.configure(model, rpm=100000, max_concurrency=max(8, args.reports))
+    inputs = {
+        'template_option': 'investment',
+        'structure_text': '# 투자심사보고서',
+        'context_text': '벤치마크',
+        'use_diagram': False,
+    }
+    file_context = "샘플 데이터 " * 1000
+
+    # 1) 기존 sync 제너레이터 - 순차 실행
+    started = time.perf_counter()
+    for _ in range(args.reports):
+        for _chunk in core_logic.generate_report_stream("bench-key", model, inputs, "High", file_context):
+            pass
+    sync_elapsed = time.perf_counter() - started
+
+    # 2) async API - 동시 실행
+    async def one_report():
+        count = 0
+        async for _chunk in core_async.generate_report_stream_async("bench-key", model, inputs, "High", file_context):
+            count += 1
+        return count
+
+    async def run_all():
+        return await asyncio.gather(*[one_report() for _ in range(args.reports)])
+
+    started = time.perf_counter()
+    counts = core_async.run_sync(run_all())
+    async_elapsed = time.perf_counter() - started
+
+    # 3) sync 어댑터 - 동작 확인
+    adapter_chunks = sum(1 for _ in core_async.iter_sync(
+        core_async.generate_report_stream_async("bench-key", model, inputs, "High", file_context)))
+
+    print(f"reports={args.reports} chunks/report={args.chunks} ttft={args.ttft}s chunk_delay={args.chunk_delay}s")
+    print(f"sync sequential : {sync_elapsed:8.3f}s")
+    print(f"async concurrent: {async_elapsed:8.3f}s  (x{sync_elapsed / max(async_elapsed, 1e-9):.1f})")
+    print(f"chunks received : async={sum(counts)} adapter={adapter_chunks}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
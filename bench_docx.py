@@ -0,0 +1,82 @@
+"""
+Word 내보내기(create_docx) 표 생성 벤치마크
+표 셀 수가 다른 합성 보고서에 대해
+(1) 기존 python-docx 객체 모델 방식(add_row + cell.text), (2) 표 XML 일괄 생성 방식의 소요 시간 비교
+
+Usage:
+    python bench_docx.py --cells 1000 10000 50000 --cols 6 --runs 3
+"""
+import argparse
+import statistics
+import time
+
+import utils
+import utils_markdown
+
+
+def legacy_add_table(doc, rows):
+    """기존 방식: 행마다 add_row, 셀마다 cell.text"""
+    headers = rows[0]
+    table = doc.add_table(rows=1, cols=len(headers))
+    table.style = 'Table Grid'
+    for idx, text in enumerate(headers):
+        cell = table.rows[0].cells[idx]
+        cell.text = text
+        if cell.paragraphs[0].runs:
+            cell.paragraphs[0].runs[0].bold = True
+    for row_data in rows[1:]:
+        row_cells = table.add_row().cells
+        for idx, text in enumerate(row_data):
+            if idx < len(row_cells): row_cells[idx].text = text.replace('**', '')
+    return table
+
+
+def make_report(cells, cols, rows_per_table=200):
+    """재무 부록 형태의 합성 보고서 (표 여러 개, 총 cells개 셀)"""
+    parts = ["# 재무 부록", "", "## 1. 개요", "- 연도별 **주요 재무 지표**", ""]
+    total_rows = max(1, cells // cols)
+    table_no = 0
+    while total_rows > 0:
+        n = min(rows_per_table, total_rows)
+        table_no += 1
+        parts += [f"## 표 {table_no}", "", "| " + " | ".join(f"항목{c}" for c in range(cols)) + " |",
+                  "|" + "---|" * cols]
+        for r in range(n - 1):
+            parts.append("| " + " | ".join(f"{(r * cols + c) * 1.7:,.1f}" for c in range(cols)) + " |")
+        parts.append("")
+        total_rows -= n
+    return "\n".join(parts)
+
+
+def _time(text, runs):
+    durations = []
+    for _ in range(runs):
+        utils_markdown._cache.clear()  # 파싱 비용도 매번 포함
+        started = time.perf_counter()
+        data = utils.create_docx(text)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cells", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    bulk_add_table = utils._add_table
+    print(f"{'cells':>8} {'legacy':>10} {'bulk':>10} {'speedup':>8} {'size':>10}")
+    for cells in args.cells:
+        text = make_report(cells, args.cols)
+        utils._add_table = legacy_add_table
+        try:
+            legacy, _ = _time(text, args.runs)
+        finally:
+            utils._add_table = bulk_add_table
+        bulk, size = _time(text, args.runs)
+        print(f"{cells:>8} {legacy:>9.2f}s {bulk:>9.2f}s {legacy / bulk:>7.1f}x {size:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+파이프라인 오프라인 벤치마크 / 부하 테스트
+fake_genai로 네트워크 없이 core_logic / core_chained / core_rfi / Gemini OCR 경로를 측정
+
+Usage:
+    python bench_pipeline.py --ttft 0.3 --tps 300 --concurrency 4
+    python bench_pipeline.py --error-rate 0.1 --midstream-error-rate 0.2    # 재시도/이어쓰기 경로 부하 테스트
+
+디스크 응답 캐시(utils_cache)는 끈 상태로 측정 (OCR/RFI 인덱싱도 매번 호출, 사용자 캐시에 합성 응답을 남기지 않음)
+    python bench_pipeline.py --mode replay --recording recordings.jsonl
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz  # PyMuPDF
+
+import core_logic
+import core_rfi
+import fake_genai
+import utils
+import utils_cache
+import utils_ratelimit
+
+API_KEY = "bench-key"
+MODEL = "gemini-3-pro-preview"
+
+
+def _inputs(template_option):
+    return {
+        'template_option': template_option,
+        'structure_text': core_logic.get_default_structure(template_option),
+        'context_text': '오프라인 벤치마크 대상 기업',
+        'rfi_existing': '| No | 요청 자료 |\n|---|---|\n| 1 | 재무제표 |\n| 2 | 주주명부 |',
+        'rfi_file_list_input': '- 재무/2024_재무제표.pdf\n- 법무/주주명부.xlsx',
+        'use_diagram': False,
+    }
+
+
+def _consume(stream):
+    first = None
+    started = time.perf_counter()
+    chars = 0
+    for chunk in stream:
+        if chunk.text:
+            if first is None:
+                first = time.perf_counter() - started
+            chars += len(chunk.text)
+    return first or 0.0, time.perf_counter() - started, chars
+
+
+def bench_single(file_context):
+    return _consume(core_logic.generate_report_stream(API_KEY, MODEL, _inputs('investment'), "High", file_context))
+
+
+def bench_chained(file_context):
+    return _consume(core_logic.generate_report_stream_chained(API_KEY, MODEL, _inputs('investment'), "High", file_context))
+
+
+def bench_rfi(file_context):
+    return _consume(core_rfi.generate_rfi_stream(API_KEY, MODEL, _inputs('rfi'), "High", file_context))
+
+
+def bench_ocr(pages):
+    """텍스트가 없는 PDF 페이지 → 전 페이지 Gemini OCR 경로"""
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        page.draw_rect(fitz.Rect(50, 50, 300, 300), color=(0, 0, 0), fill=(0.8, 0.8, 0.8))
+    started = time.perf_counter()
+    text = utils.extract_pdf_with_gemini_ocr(doc, API_KEY)
+    doc.close()
+    return 0.0, time.perf_counter() - started, len(text)
+
+
+def _report(name, results):
+    ttfts = [r[0] for r in results]
+    totals = [r[1] for r in results]
+    chars = sum(r[2] for r in results)
+    print(f"{name:<12} n={len(results):<3} ttft p50={statistics.median(ttfts):6.2f}s "
+          f"total p50={statistics.median(totals):6.2f}s max={max(totals):6.2f}s chars={chars}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", default="synthesize", choices=["synthesize", "replay", "record"])
+    parser.add_argument("--recording", help="replay/record용 JSONL 경로")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tps", type=float, default=300.0, help="초당 출력 토큰 수")
+    parser.add_argument("--synth-tokens", type=int, default=1500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0, help="스트림 1개가 도중에 끊길 확률")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=4, help="시나리오별 실행 횟수")
+    parser.add_argument("--ocr-pages", type=int, default=10)
+    parser.add_argument("--real-api-key", help="record 모드에서 사용할 실제 API 키")
+    args = parser.parse_args()
+
+    client = fake_genai.install(
+        mode=args.mode, recording_path=args.recording, ttft_sec=args.ttft, tokens_per_sec=args.tps,
+        synth_tokens=args.synth_tokens, error_rate=args.error_rate,
+        midstream_error_rate=args.midstream_error_rate, seed=42, real_api_key=args.real_api_key,
+    )
+    # 벤치마크는 API 한도/캐시가 아니라 파이프라인 자체를 측정
+    utils_cache.ENABLED = False
+    for model in (MODEL, "gemini-3-flash-preview", "gemini-2.0-flash-exp"):
+        utils_ratelimit.configure(model, rpm=100000, max_concurrency=max(8, args.concurrency * 2))
+
+    file_context = "### [파일명: IR.pdf]\n" + ("매출 및 영업이익 추이 데이터. " * 2000)
+    scenarios = [
+        ("single", lambda: bench_single(file_context)),
+        ("chained", lambda: bench_chained(file_context)),
+        ("rfi", lambda: bench_rfi(file_context)),
+        ("ocr", lambda: bench_ocr(args.ocr_pages)),
+    ]
+
+    print(f"mode={args.mode} ttft={args.ttft}s tps={args.tps} concurrency={args.concurrency} "
+          f"error_rate={args.error_rate} midstream_error_rate={args.midstream_error_rate}")
+    wall_started = time.perf_counter()
+    for name, fn in scenarios:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(fn) for _ in range(args.runs)]
+            results = []
+            failures = 0
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception:
+                    failures += 1
+        if results:
+            _report(name, results)
+        if failures:
+            print(f"{'':<12} failures={failures}")
+    print(f"wall={time.perf_counter() - wall_started:.2f}s stats={client.stats} "
+          f"limiter={utils_ratelimit.get_limiter().stats}")
+    fake_genai.uninstall()
+
+
+if __name__ == "__main__":
+    main()
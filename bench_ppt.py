@@ -0,0 +1,150 @@
+"""
+PPT 생성(create_ppt) 벤치마크
+슬라이드 수가 다른 합성 발표자료와 표 위주 발표자료에 대해
+(1) 기존 도형/셀 단위 생성, (2) 프로토타입 복제 엔진(SlideEngine) + 표 XML 일괄 생성의 소요 시간과 파일 크기 비교
+
+Usage:
+    python bench_ppt.py --slides 100 300 --tables 20 50 --table-rows 60 --runs 3
+"""
+import argparse
+import statistics
+import time
+
+from pptx.dml.color import RGBColor
+from pptx.enum.text import PP_ALIGN
+from pptx.util import Inches, Pt
+
+import utils_markdown
+import utils_ppt
+
+
+def legacy_create_table_slide(prs, title_text, table_data):
+    """기존 방식: 셀마다 python-pptx 속성으로 글꼴/정렬/채우기 설정"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    utils_ppt.add_master_design(slide)
+
+    title_box = slide.shapes.add_textbox(Inches(0.3), Inches(0.6), Inches(9.4), Inches(0.5))
+    p_title = title_box.text_frame.paragraphs[0]
+    p_title.text = title_text
+    utils_ppt.set_font(p_title, Pt(20), bold=True, color=utils_ppt.COLOR_HEADER_BG)
+
+    if not table_data or len(table_data) < 2:
+        return slide
+
+    rows = len(table_data)
+    cols = len(table_data[0])
+    row_heights = utils_ppt.table_row_heights(table_data, cols)
+    table_width = utils_ppt.TABLE_WIDTH
+    table = slide.shapes.add_table(rows, cols, Inches(0.3), utils_ppt.TABLE_TOP, table_width, sum(row_heights)).table
+    for col_idx in range(cols):
+        table.columns[col_idx].width = int(table_width / cols)
+    for row_idx, height in enumerate(row_heights):
+        table.rows[row_idx].height = height
+
+    for row_idx, row_data in enumerate(table_data):
+        for col_idx, cell_text in enumerate(row_data[:cols]):
+            cell = table.cell(row_idx, col_idx)
+            cell.text = utils_ppt.clean_text(cell_text)
+            para = cell.text_frame.paragraphs[0]
+            para.font.name = utils_ppt.DEFAULT_FONT
+            para.font.size = Pt(10)
+            para.alignment = PP_ALIGN.CENTER
+            if row_idx == 0:
+                cell.fill.solid()
+                cell.fill.fore_color.rgb = utils_ppt.COLOR_HEADER_BG
+                para.font.color.rgb = utils_ppt.COLOR_WHITE
+                para.font.bold = True
+            else:
+                if row_idx % 2 == 0:
+                    cell.fill.solid()
+                    cell.fill.fore_color.rgb = utils_ppt.COLOR_LIGHT_BLUE
+                para.font.color.rgb = RGBColor(30, 30, 30)
+    return slide
+
+
+class LegacyEngine(utils_ppt.SlideEngine):
+    """기존 방식: 슬라이드마다 헤더 바/도형/글꼴을 새로 생성 (분할 규칙은 동일)"""
+
+    def __init__(self, prs):
+        self.prs = prs
+
+    def title_slide(self, title_text):
+        return utils_ppt.create_title_slide(self.prs, title_text)
+
+    def section_slide(self, text):
+        return utils_ppt.create_section_slide(self.prs, text)
+
+    def two_column_slide(self, *args):
+        return utils_ppt.create_two_column_slide(self.prs, *args)
+
+    def table_slide(self, title_text, table_data):
+        return [
+            legacy_create_table_slide(self.prs, utils_ppt._continued(title_text, page), chunk)
+            for page, chunk in enumerate(utils_ppt.paginate_table(table_data))
+        ]
+
+
+def make_deck(slides, bullets=6):
+    """표지 + 섹션 간지 10장마다 1장 + 2단 슬라이드로 구성된 합성 발표자료"""
+    parts = ["# 투자 검토 발표자료", ""]
+    for n in range(1, slides):
+        if n % 10 == 1:
+            parts += [f"# {n // 10 + 1}. 섹션", ""]
+            continue
+        parts += [f"## {n}. 슬라이드 제목", "", "### 현황"]
+        parts += [f"- 항목 {n}-{b}: **매출** {b * 13}억원 증가" for b in range(bullets // 2)]
+        parts += ["### 시사점"]
+        parts += [f"- 시사점 {n}-{b}: 시장 점유율 확대 예상" for b in range(bullets - bullets // 2)]
+        parts.append("")
+    return "\n".join(parts)
+
+
+def make_table_deck(tables, rows, cols=6):
+    """재무 표 tables개 (각 rows행)로 구성된 합성 발표자료"""
+    parts = ["# 재무 부록", ""]
+    for n in range(1, tables + 1):
+        parts += [f"## 표 {n}. 연도별 재무 지표", "",
+                  "| " + " | ".join(f"항목{c}" for c in range(cols)) + " |", "|" + "---|" * cols]
+        parts += ["| " + " | ".join(f"{(r * cols + c) * 1.7:,.1f}" for c in range(cols)) + " |" for r in range(rows)]
+        parts.append("")
+    return "\n".join(parts)
+
+
+def _compare(label, text, runs):
+    engine = utils_ppt.SlideEngine
+    utils_ppt.SlideEngine = LegacyEngine
+    try:
+        legacy, legacy_size = _time(text, runs)
+    finally:
+        utils_ppt.SlideEngine = engine
+    clone, clone_size = _time(text, runs)
+    print(f"{label:>12} {legacy:>8.2f}s {clone:>8.2f}s {legacy / clone:>7.1f}x {legacy_size:>12,} {clone_size:>12,}")
+
+
+def _time(text, runs):
+    durations = []
+    for _ in range(runs):
+        utils_markdown._cache.clear()
+        started = time.perf_counter()
+        data = utils_ppt.create_ppt(text)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--tables", type=int, nargs="+", default=[20, 50], help="표 위주 발표자료의 표 개수")
+    parser.add_argument("--table-rows", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'deck':>12} {'legacy':>9} {'new':>9} {'speedup':>8} {'legacy size':>12} {'new size':>12}")
+    for slides in args.slides:
+        _compare(f"{slides} slides", make_deck(slides), args.runs)
+    for tables in args.tables:
+        _compare(f"{tables}x{args.table_rows} tbl", make_table_deck(tables, args.table_rows), args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+asyncio 기반 생성 API
+- generate_report_stream / generate_chained_stream / generate_rfi_stream의 async 버전
+- 동일한 청크 타입(GenerateContentResponse)을 yield
+- iter_sync(): async 제너레이터를 기존 sync 코드(Streamlit UI)에서 그대로 순회하는 어댑터
+
+여러 보고서/OCR/전사 작업을 한 프로세스에서 동시에 돌릴 때 사용한다.
+google-genai의 async 커넥션 풀은 이벤트 루프에 묶이므로,
+sync 코드에서는 항상 iter_sync()/run_sync()가 관리하는 단일 백그라운드 루프를 사용한다.
+"""
+import asyncio
+import queue
+import threading
+
+import core_chained
+import core_logic
+import core_rfi
+import utils_gemini
+
+
+async def generate_report_stream_async(api_key, model_name, inputs, thinking_level, file_context):
+    """core_logic.generate_report_stream의 async 버전"""
+    if inputs['template_option'] == 'rfi':
+        async for chunk in generate_rfi_stream_async(api_key, model_name, inputs, thinking_level, file_context):
+            yield chunk
+        return
+
+    main_prompt, config = core_logic.build_report_request(inputs, thinking_level, file_context)
+    async for chunk in utils_gemini.generate_content_stream_async(
+        api_key, model_name, main_prompt, config,
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
+    ):
+        yield chunk
+
+
+async def generate_chained_stream_async(api_key, model_name, inputs, thinking_level, file_context, template_option):
+    """core_chained.generate_chained_stream의 async 버전"""
+    system_instruction = core_chained.build_system_instruction(inputs, template_option)
+    parts = core_chained.get_parts(template_option)
+
+    accumulated_result = ""
+    for part_key, part_title, max_tokens in parts:
+        yield core_chained.status_chunk(part_title)
+
+        main_prompt, config = core_chained.build_part_request(
+            part_key, max_tokens, system_instruction, inputs, thinking_level,
+            file_context, accumulated_result, template_option,
+        )
+
+        part_result = ""
+        async for chunk in utils_gemini.generate_content_stream_async(
+            api_key, model_name, main_prompt, config,
+            priority=utils_gemini.PRIORITY_INTERACTIVE,
+        ):
+            if chunk.text:
+                part_result += chunk.text
+            yield chunk
+
+        accumulated_result += part_result
+
+
+async def _reconcile_async(api_key, existing_rfi, file_index_str, deal_name=""):
+    """core_rfi._reconcile의 async 버전 → (상태 표, delta) (로컬 대사/상태 저장은 스레드에서 실행)"""
+    plan = await asyncio.to_thread(core_rfi.plan_reconcile, existing_rfi, file_index_str, deal_name)
+    resp_text, error = None, None
+    if plan['request'] is not None:
+        prompt, config = plan['request']
+        try:
+            resp = await utils_gemini.generate_content_async(
+                api_key, core_rfi.INDEXING_MODEL, prompt,
+                config=config,
+                priority=utils_gemini.PRIORITY_INTERACTIVE,
+                cache=True,
+            )
+            resp_text = resp.text
+        except Exception as e:
+            error = e
+    return await asyncio.to_thread(core_rfi.complete_reconcile, plan, resp_text, error)
+
+
+async def analyze_rfi_status_async(api_key, existing_rfi, file_index_str, deal_name=""):
+    """core_rfi.analyze_rfi_status의 async 버전"""
+    rfi_status_table, _ = await _reconcile_async(api_key, existing_rfi, file_index_str, deal_name)
+    return rfi_status_table
+
+
+async def generate_rfi_stream_async(api_key, model_name, inputs, thinking_level, file_context=""):
+    """core_rfi.generate_rfi_stream의 async 버전"""
+    file_index_str = core_rfi.get_file_index(inputs)
+
+    yield core_rfi.indexing_start_chunk()
+
+    rfi_status_table, delta = await _reconcile_async(
+        api_key, inputs['rfi_existing'], file_index_str, inputs.get('rfi_deal_name', '')
+    )
+
+    yield core_rfi.indexing_done_chunk(rfi_status_table, model_name)
+
+    main_prompt, config = core_rfi.build_final_request(rfi_status_table, inputs, thinking_level, file_context, delta)
+    async for chunk in utils_gemini.generate_content_stream_async(
+        api_key, model_name, main_prompt, config,
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
+    ):
+        yield chunk
+
+
+# =========================
+# Sync 어댑터
+# =========================
+
+_loop = None
+_loop_lock = threading.Lock()
+_DONE = object()
+
+
+def get_loop():
+    """sync 어댑터용 백그라운드 이벤트 루프 (프로세스당 1개)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="gem-async-loop", daemon=True)
+            thread.start()
+        return _loop
+
+
+def run_sync(coro):
+    """코루틴을 백그라운드 루프에서 실행하고 결과 반환"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def iter_sync(async_gen):
+    """
+    async 제너레이터를 sync 제너레이터로 변환
+
+    Usage:
+        stream = core_async.iter_sync(core_async.generate_report_stream_async(...))
+        for chunk in stream: ...
+    """
+    q = queue.Queue()
+
+    async def _pump():
+        try:
+            async for item in async_gen:
+                q.put((item, None))
+        except BaseException as e:
+            q.put((None, e))
+        finally:
+            q.put((_DONE, None))
+
+    future = asyncio.run_coroutine_threadsafe(_pump(), get_loop())
+    try:
+        while True:
+            item, error = q.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        # 소비자가 중간에 멈추면 (Streamlit rerun 등) 백그라운드 작업 취소
+        if not future.done():
+            future.cancel()
@@ -4,13 +4,13 @@ Chained Prompting 모듈
 - 이전 파트 결과를 컨텍스트로 활용하여 일관성 유지
 """
 
-from google import genai
 from google.genai import types
 import prompts
+import utils_gemini
 
 
 def get_client(api_key):
-    return genai.Client(api_key=api_key)
+    return utils_gemini.get_client(api_key)
 
 
 # 템플릿별 파트 정의
@@ -36,61 +36,49 @@ WEB_SEARCH_PARTS = {
 }
 
 
-def generate_chained_stream(api_key, model_name, inputs, thinking_level, file_context, template_option):
-    """
-    일반화된 Chained Prompting 생성기
-
-    Args:
-        api_key: Gemini API 키
-        model_name: 사용할 모델명
-        inputs: 입력 데이터 (context_text, use_diagram 등)
-        thinking_level: 사고 수준
-        file_context: 파일 컨텍스트
-        template_option: 템플릿 종류 ('simple_review', 'investment' 등)
-
-    Yields:
-        GenerateContentResponse chunks
-    """
-    client = get_client(api_key)
-
-    # 템플릿별 시스템 프롬프트 가져오기
+def build_system_instruction(inputs, template_option):
+    """템플릿별 시스템 프롬프트 (도식화 옵션 포함)"""
     system_prompt_key = f"{template_option}_system"
     system_instruction = prompts.LOGIC_PROMPTS.get(system_prompt_key, prompts.LOGIC_PROMPTS['custom_system'])
 
     if inputs.get('use_diagram'):
         system_instruction += "\n**도식화**: 필요시 {{DIAGRAM: 설명}} 태그 삽입."
+    return system_instruction
+
 
-    # 템플릿별 파트 정의 가져오기
+def get_parts(template_option):
+    """템플릿별 파트 정의 (미지원 템플릿이면 ValueError)"""
     parts = CHAINED_PARTS.get(template_option, [])
     if not parts:
         raise ValueError(f"Chained prompting not supported for template: {template_option}")
-
-    # 웹 검색 파트 목록
-    web_search_parts = WEB_SEARCH_PARTS.get(template_option, [])
-
-    accumulated_result = ""
-
-    for part_key, part_title, max_tokens in parts:
-        # 진행 상황 알림
-        status_text = f"\n\n---\n\n**[{part_title}] 생성 중...**\n\n"
-        yield types.GenerateContentResponse(
-            candidates=[types.Candidate(
-                content=types.Content(parts=[types.Part(text=status_text)])
-            )]
-        )
-
-        # 이전 파트 결과를 컨텍스트로 포함
-        prev_context = ""
-        if accumulated_result:
-            prev_context = f"""
+    return parts
+
+
+def status_chunk(part_title):
+    """파트 시작 알림용 청크"""
+    status_text = f"\n\n---\n\n**[{part_title}] 생성 중...**\n\n"
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(parts=[types.Part(text=status_text)])
+        )]
+    )
+
+
+def build_part_request(part_key, max_tokens, system_instruction, inputs, thinking_level,
+                       file_context, accumulated_result, template_option):
+    """파트별 (프롬프트, config) 구성 (sync/async 공용)"""
+    # 이전 파트 결과를 컨텍스트로 포함
+    prev_context = ""
+    if accumulated_result:
+        prev_context = f"""
 [이전 작성 내용 - 참고용, 중복 작성 금지]
 {accumulated_result[-20000:]}
 """
 
-        # 파트별 프롬프트 가져오기
-        part_prompt = prompts.LOGIC_PROMPTS.get(part_key, "")
+    # 파트별 프롬프트 가져오기
+    part_prompt = prompts.LOGIC_PROMPTS.get(part_key, "")
 
-        main_prompt = f"""
+    main_prompt = f"""
 [System: Thinking Level {thinking_level.upper() if isinstance(thinking_level, str) else 'HIGH'}]
 [Critical Instruction] Analyze the provided data deeply and step-by-step. Prioritize accuracy and logical consistency.
 
@@ -105,23 +93,53 @@ def generate_chained_stream(api_key, model_name, inputs, thinking_level, file_co
 {file_context[:45000]}
 """
 
-        # 웹 검색 도구 설정
-        tools = []
-        if part_key in web_search_parts:
-            tools = [types.Tool(google_search=types.GoogleSearch())]
+    # 웹 검색 도구 설정
+    tools = []
+    if part_key in WEB_SEARCH_PARTS.get(template_option, []):
+        tools = [types.Tool(google_search=types.GoogleSearch())]
+
+    config = types.GenerateContentConfig(
+        tools=tools,
+        max_output_tokens=max_tokens,
+        temperature=0.3,
+        system_instruction=system_instruction
+    )
+    return main_prompt, config
+
+
+def generate_chained_stream(api_key, model_name, inputs, thinking_level, file_context, template_option):
+    """
+    일반화된 Chained Prompting 생성기
+
+    Args:
+        api_key: Gemini API 키
+        model_name: 사용할 모델명
+        inputs: 입력 데이터 (context_text, use_diagram 등)
+        thinking_level: 사고 수준
+        file_context: 파일 컨텍스트
+        template_option: 템플릿 종류 ('simple_review', 'investment' 등)
+
+    Yields:
+        GenerateContentResponse chunks
+    """
+    system_instruction = build_system_instruction(inputs, template_option)
+    parts = get_parts(template_option)
+
+    accumulated_result = ""
+
+    for part_key, part_title, max_tokens in parts:
+        # 진행 상황 알림
+        yield status_chunk(part_title)
 
-        config = types.GenerateContentConfig(
-            tools=tools,
-            max_output_tokens=max_tokens,
-            temperature=0.3,
-            system_instruction=system_instruction
+        main_prompt, config = build_part_request(
+            part_key, max_tokens, system_instruction, inputs, thinking_level,
+            file_context, accumulated_result, template_option,
         )
 
         part_result = ""
-        response_stream = client.models.generate_content_stream(
-            model=model_name,
-            contents=main_prompt,
-            config=config
+        response_stream = utils_gemini.generate_content_stream(
+            api_key, model_name, main_prompt, config,
+            priority=utils_gemini.PRIORITY_INTERACTIVE,
         )
 
         for chunk in response_stream:
@@ -0,0 +1,247 @@
+"""
+백그라운드 작업 큐
+- 프로세스 내 워커 풀에서 파싱/OCR/장문 스트리밍 작업 실행 (Streamlit rerun과 무관하게 계속 진행)
+- SQLite 작업 테이블에 상태/출력 누적 저장 → 패널에서 주기적으로 polling
+- 프로세스 재시작 시 실행 중이던 작업은 'interrupted'로 표시
+"""
+import io
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import core_chained
+import core_logic
+
+JOBS_DB_PATH = os.getenv("GEM_JOBS_DB", os.path.join(os.path.expanduser("~"), ".cache", "gem_intern", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("GEM_JOB_WORKERS", "4"))
+FLUSH_INTERVAL_SEC = 0.5
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_INTERRUPTED = "interrupted"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED, STATUS_INTERRUPTED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    output TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    finished REAL
+)
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobHandle:
+    """작업 함수에 전달되는 핸들 (출력 누적 / 단계 표시 / 취소 확인)"""
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self.job_id = job_id
+        self._parts = []
+        self._stage = ""
+        self._last_flush = 0.0
+
+    @property
+    def output(self):
+        return "".join(self._parts)
+
+    def append(self, text):
+        if not text:
+            return
+        self.check_cancelled()
+        self._parts.append(text)
+        self._maybe_flush()
+
+    def stage(self, message):
+        self.check_cancelled()
+        self._stage = message
+        self.flush()
+
+    def check_cancelled(self):
+        if self._manager.is_cancel_requested(self.job_id):
+            raise JobCancelled()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SEC:
+            self.flush()
+
+    def flush(self, **fields):
+        self._last_flush = time.monotonic()
+        self._manager._update(self.job_id, output=self.output, stage=self._stage, **fields)
+
+
+class JobManager:
+    def __init__(self, db_path=JOBS_DB_PATH, max_workers=JOB_WORKERS):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._cancel_requested = set()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gem-job")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE status IN (?, ?)",
+                (STATUS_INTERRUPTED, time.time(), STATUS_QUEUED, STATUS_RUNNING),
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id, **fields):
+        fields['updated'] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, fn, *args, label="", **kwargs):
+        """
+        작업 등록 후 job_id 반환
+
+        fn(handle, *args, **kwargs) 형태로 워커 스레드에서 실행되며,
+        handle.append(text)로 출력을, handle.stage(msg)로 진행 단계를 기록한다.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, label, status, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, label, STATUS_QUEUED, now, now),
+            )
+        self._pool.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        handle = JobHandle(self, job_id)
+        if self.is_cancel_requested(job_id):
+            self._update(job_id, status=STATUS_CANCELLED, finished=time.time())
+            return
+        self._update(job_id, status=STATUS_RUNNING)
+        try:
+            fn(handle, *args, **kwargs)
+            handle.flush(status=STATUS_DONE, finished=time.time())
+        except JobCancelled:
+            handle.flush(status=STATUS_CANCELLED, finished=time.time())
+        except Exception as e:
+            handle.flush(status=STATUS_FAILED, error=str(e), finished=time.time())
+        finally:
+            with self._lock:
+                self._cancel_requested.discard(job_id)
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, limit=20):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, label, status, stage, error, created, updated, finished "
+                "FROM jobs ORDER BY created DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        with self._lock:
+            self._cancel_requested.add(job_id)
+
+    def is_cancel_requested(self, job_id):
+        with self._lock:
+            return job_id in self._cancel_requested
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """프로세스 전역 JobManager (Streamlit 세션 간 공유)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
+
+
+# =========================
+# 작업 함수
+# =========================
+
+class _FileSnapshot(io.BytesIO):
+    """업로드 파일 스냅샷 (세션이 끝나도 워커에서 읽을 수 있도록 바이트 복사)"""
+
+    def __init__(self, uploaded_file):
+        uploaded_file.seek(0)
+        data = uploaded_file.read()
+        uploaded_file.seek(0)
+        super().__init__(data)
+        self.name = uploaded_file.name
+        self.size = len(data)
+
+
+def snapshot_inputs(inputs):
+    """inputs의 업로드 파일을 바이트 스냅샷으로 교체한 사본"""
+    snapshot = dict(inputs)
+    snapshot['uploaded_files'] = [_FileSnapshot(f) for f in (inputs.get('uploaded_files') or [])]
+    return snapshot
+
+
+def generation_job(handle, settings, inputs, context_store=None):
+    """
+    ui_output의 생성 흐름(파싱 → 스트리밍)을 백그라운드에서 실행
+
+    context_store: 세션의 utils_context.SourceContextStore (파싱 결과를 PPT 변환 등에서 재사용)
+    """
+    api_key = settings['api_key']
+    is_rfi_mode = inputs['template_option'] == 'rfi'
+    read_content = not is_rfi_mode or bool(inputs.get('uploaded_files'))
+
+    handle.stage("📁 파일 분석 중...")
+    file_context, _ = core_logic.parse_all_files(
+        inputs['uploaded_files'],
+        read_content=read_content,
+        api_key=api_key if read_content else None,
+        docai_config=settings.get('docai_config') if read_content else None,
+        template_option=inputs['template_option'],
+        context_store=context_store if read_content else None,
+    )
+
+    handle.stage("🔗 문서 작성 중 (스트리밍)...")
+    if inputs.get('generation_mode') == 'chained' and core_chained.is_chained_supported(inputs['template_option']):
+        stream = core_logic.generate_report_stream_chained(
+            api_key, settings['model_name'], inputs, settings['thinking_level'], file_context
+        )
+    else:
+        stream = core_logic.generate_report_stream(
+            api_key, settings['model_name'], inputs, settings['thinking_level'], file_context
+        )
+    for chunk in stream:
+        handle.append(chunk.text)
+    handle.stage("✅ 작성 완료")
@@ -1,24 +1,58 @@
-﻿from google import genai
-from google.genai import types
+﻿from google.genai import types
 import utils
+import utils_cache
+import utils_gemini
+import utils_outline
+import utils_trace
 import core_rfi
 import core_chained
+import core_refine
 import prompts
 
 def get_client(api_key):
-    return genai.Client(api_key=api_key)
+    return utils_gemini.get_client(api_key)
+
+STRUCTURE_MODEL = "gemini-3-flash-preview"
 
 def extract_structure(api_key, structure_file):
     try:
-        client = get_client(api_key)
+        # 같은 서식 파일이면 파싱/OCR 없이 캐시 결과 즉시 반환
+        structure_file.seek(0)
+        file_bytes = structure_file.read()
+        structure_file.seek(0)
+        file_key = utils_cache.make_key(
+            STRUCTURE_MODEL, None,
+            [prompts.LOGIC_PROMPTS['structure_extraction'], structure_file.name, file_bytes],
+        )
+        cached = utils_cache.get(file_key)
+        if cached is not None:
+            return cached
+
+        # 제목 스타일/PDF 책갈피/글꼴 크기로 목차를 바로 얻을 수 있으면 모델 호출 생략
+        with utils_trace.span("structure.outline", file=structure_file.name) as span:
+            try:
+                outline = utils_outline.extract_outline(file_bytes, structure_file.name)
+            except Exception:
+                outline = None
+            span.set(found=bool(outline))
+        if outline:
+            utils_cache.put(file_key, outline)
+            return outline
+
         file_text = utils.parse_uploaded_file(structure_file, api_key=api_key)
         prompt = f"{prompts.LOGIC_PROMPTS['structure_extraction']}\n[파일 내용]\n{file_text[:15000]}"
-        resp = client.models.generate_content(model="gemini-3-flash-preview", contents=prompt)
+        resp = utils_gemini.generate_content(
+            api_key, STRUCTURE_MODEL, prompt,
+            priority=utils_gemini.PRIORITY_INTERACTIVE,
+            cache=True,
+        )
+        utils_cache.put(file_key, resp.text)
         return resp.text
     except Exception as e:
         return f"구조 추출 오류: {str(e)}"
 
-def parse_all_files(uploaded_files, read_content=True, api_key=None, docai_config=None, template_option=None):
+@utils_trace.traced("parse.all")
+def parse_all_files(uploaded_files, read_content=True, api_key=None, docai_config=None, template_option=None, context_store=None):
     """파일 목록 파싱 (OCR 지원)
 
     Args:
@@ -26,14 +60,18 @@ def parse_all_files(uploaded_files, read_content=True, api_key=None, docai_confi
         read_content: 파일 내용 읽기 여부
         api_key: Google API 키 (Gemini OCR용)
         docai_config: Document AI 설정 (선택사항)
+        context_store: utils_context.SourceContextStore (있으면 이전 파싱 결과 재사용)
     """
     all_text = ""
     file_list_str = ""
+    if read_content and context_store is not None:
+        context_store.sync(uploaded_files)
     if uploaded_files:
         for file in uploaded_files:
             file_list_str += f"- {file.name}\n"
             if read_content:
-                parsed = utils.parse_uploaded_file(
+                parse = context_store.parse if context_store is not None else utils.parse_uploaded_file
+                parsed = parse(
                     file,
                     api_key=api_key,
                     docai_config=docai_config,
@@ -63,19 +101,11 @@ def _get_system_prompt(template_opt):
     prompt_key = prompt_map.get(template_opt, 'custom_system')
     return prompts.LOGIC_PROMPTS.get(prompt_key, prompts.LOGIC_PROMPTS['custom_system'])
 
-def generate_report_stream(api_key, model_name, inputs, thinking_level, file_context):
-    """Single-pass generation mode for all templates."""
-    client = get_client(api_key)
+def build_report_request(inputs, thinking_level, file_context):
+    """단일 생성 모드의 (프롬프트, config) 구성 (sync/async 공용)"""
     template_opt = inputs['template_option']
     structure_text = inputs['structure_text']
 
-    # [RFI Mode] - 별도 처리
-    if template_opt == 'rfi':
-        stream = core_rfi.generate_rfi_stream(api_key, model_name, inputs, thinking_level, file_context)
-        for chunk in stream:
-            yield chunk
-        return
-
     # 템플릿별 시스템 프롬프트 가져오기
     system_instruction = _get_system_prompt(template_opt)
 
@@ -112,12 +142,23 @@ def generate_report_stream(api_key, model_name, inputs, thinking_level, file_con
         temperature=temperature,
         system_instruction=system_instruction
     )
+    return main_prompt, config
+
+def generate_report_stream(api_key, model_name, inputs, thinking_level, file_context):
+    """Single-pass generation mode for all templates."""
+    # [RFI Mode] - 별도 처리
+    if inputs['template_option'] == 'rfi':
+        stream = core_rfi.generate_rfi_stream(api_key, model_name, inputs, thinking_level, file_context)
+        for chunk in stream:
+            yield chunk
+        return
+
+    main_prompt, config = build_report_request(inputs, thinking_level, file_context)
 
     # Generate Stream
-    response_stream = client.models.generate_content_stream(
-        model=model_name,
-        contents=main_prompt,
-        config=config
+    response_stream = utils_gemini.generate_content_stream(
+        api_key, model_name, main_prompt, config,
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
     )
 
     for chunk in response_stream:
@@ -140,13 +181,6 @@ def generate_report_stream_chained(api_key, model_name, inputs, thinking_level,
 
 
 def refine_report(api_key, model_name, current_text, refine_query):
-    client = get_client(api_key)
-    refine_prompt = (
-        f"You are a document refinement assistant.\n"
-        f"Apply the user's request to the existing document without losing structure.\n"
-        f"User request: \"{refine_query}\"\n"
-        f"Write the updates under the heading: ## Additional Request Applied\n"
-        f"Existing document (truncated): {current_text[:20000]}...\n"
-    )
-    resp = client.models.generate_content(model=model_name, contents=refine_prompt)
-    return resp.text
+    """관련 섹션만 수정해 원래 위치에 교체한 전체 문서 반환 (core_refine)"""
+    refined_text, _ = core_refine.refine_document(api_key, model_name, current_text, refine_query)
+    return refined_text
@@ -0,0 +1,227 @@
+"""
+섹션 단위 수정(Refine) 모듈
+- 보고서 마크다운을 헤더 기준 섹션 인덱스로 분할
+- 수정 요청과 관련된 섹션만 골라 모델에 전달 (로컬 키워드 매칭 → 애매하면 목차만으로 경량 모델 선택)
+- 수정된 섹션을 원래 위치에 교체하여 전체 문서 반환 (문서 길이가 아닌 섹션 길이에 비례하는 지연)
+"""
+import json
+import re
+
+from google.genai import types
+
+import utils_gemini
+import utils_trace
+
+PICKER_MODEL = "gemini-3-flash-preview"
+MAX_SECTIONS = 4
+TITLE_MATCH_THRESHOLD = 0.5
+BODY_MATCH_THRESHOLD = 0.35
+
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_ROMAN_HEADER_PATTERN = re.compile(r'^(I{1,3}|IV|VI{0,3}|V|IX|X)\.\s+(.+)$')
+_SECTION_REF_PATTERNS = (
+    re.compile(r'(?:^|[^0-9A-Za-z])((?:I{1,3}|IV|VI{0,3}|V|IX|X)|\d{1,2})\s*(?:\.\s|장|절|번 ?섹션)'),
+    re.compile(r'(?:섹션|파트|part|section)\s*((?:I{1,3}|IV|VI{0,3}|V|IX|X)|\d{1,2})\b', re.IGNORECASE),
+)
+_BLOCK_PATTERN = re.compile(r'<<<SECTION (\d+)>>>\n?(.*?)\n?<<<END SECTION \1>>>', re.DOTALL)
+_TOKEN_PATTERN = re.compile(r'[0-9A-Za-z]+|[가-힣]+')
+_STOPWORDS = {
+    '수정', '보완', '추가', '변경', '삭제', '작성', '반영', '내용', '부분', '섹션', '항목', '관련',
+    '해줘', '해주세요', '해주', '주세요', '좀', '더', '다시', '전체', '문서', '보고서',
+    'the', 'a', 'an', 'and', 'to', 'of', 'in', 'please', 'section',
+}
+
+
+def _heading(line):
+    """헤더 줄이면 (level, title), 아니면 None (로마 숫자 헤더는 level 1)"""
+    stripped = line.strip()
+    m = _HEADING_PATTERN.match(stripped)
+    if m:
+        return len(m.group(1)), m.group(2).strip()
+    if _ROMAN_HEADER_PATTERN.match(stripped):
+        return 1, stripped
+    return None
+
+
+def build_section_index(text):
+    """
+    보고서 마크다운 → 섹션 목록
+
+    가장 상위 두 단계의 헤더를 경계로 분할하며, 첫 헤더 이전 내용은 '(서두)' 섹션.
+    코드 블록(```) 내부의 # 줄은 헤더로 보지 않는다.
+
+    Returns:
+        list of dict: id, title, level, start, end (원문 내 문자 오프셋)
+    """
+    headings = []  # (offset, level, title)
+    offset = 0
+    in_code = False
+    for line in text.splitlines(True):
+        if line.strip().startswith('```'):
+            in_code = not in_code
+        elif not in_code:
+            found = _heading(line)
+            if found:
+                headings.append((offset, found[0], found[1]))
+        offset += len(line)
+
+    if not headings:
+        return [{'id': 0, 'title': '(전체)', 'level': 0, 'start': 0, 'end': len(text)}]
+
+    top = min(level for _, level, _ in headings)
+    boundaries = [(o, level, title) for o, level, title in headings if level <= top + 1]
+
+    sections = []
+    if boundaries[0][0] > 0 and text[:boundaries[0][0]].strip():
+        sections.append({'id': 0, 'title': '(서두)', 'level': 0, 'start': 0, 'end': boundaries[0][0]})
+    for idx, (start, level, title) in enumerate(boundaries):
+        end = boundaries[idx + 1][0] if idx + 1 < len(boundaries) else len(text)
+        sections.append({'id': len(sections), 'title': title, 'level': level, 'start': start, 'end': end})
+    if sections[0]['start'] > 0:
+        sections[0]['start'] = 0  # 공백뿐인 서두는 첫 섹션에 포함
+    return sections
+
+
+def _grams(text):
+    """정규화 토큰 집합 (영문/숫자는 단어, 한글은 2-gram)"""
+    grams = set()
+    for token in _TOKEN_PATTERN.findall(text.lower().replace('**', '')):
+        if token in _STOPWORDS:
+            continue
+        if token[0] >= '가':
+            grams.update(token[i:i + 2] for i in range(max(1, len(token) - 1)))
+        elif len(token) > 1 or token.isdigit():
+            grams.add(token)
+    return grams
+
+
+def _section_number(title):
+    m = re.match(r'^\s*((?:I{1,3}|IV|VI{0,3}|V|IX|X)|\d{1,2})[.)]', title.replace('**', ''))
+    return m.group(1).upper() if m else None
+
+
+def select_sections_local(text, sections, refine_query):
+    """
+    키워드/섹션 번호 매칭으로 관련 섹션 선택
+
+    Returns:
+        선택된 섹션 id 목록 (확신이 없으면 빈 목록)
+    """
+    refs = {m.group(1).upper() for pattern in _SECTION_REF_PATTERNS for m in pattern.finditer(refine_query)}
+    if refs:
+        by_number = [s['id'] for s in sections if _section_number(s['title']) in refs]
+        if by_number:
+            return by_number[:MAX_SECTIONS]
+
+    query = _grams(refine_query)
+    if not query:
+        return []
+
+    title_scores = {s['id']: len(query & _grams(s['title'])) / len(query) for s in sections}
+    best = max(title_scores.values())
+    if best >= TITLE_MATCH_THRESHOLD:
+        picked = [sid for sid, score in title_scores.items() if score >= max(TITLE_MATCH_THRESHOLD, best * 0.6)]
+        return picked[:MAX_SECTIONS]
+
+    body_scores = {s['id']: len(query & _grams(text[s['start']:s['end']])) / len(query) for s in sections}
+    best = max(body_scores.values())
+    if best >= BODY_MATCH_THRESHOLD:
+        ranked = sorted(body_scores, key=body_scores.get, reverse=True)
+        return sorted(sid for sid in ranked[:MAX_SECTIONS] if body_scores[sid] >= best * 0.8)
+    return []
+
+
+def _outline(text, sections):
+    lines = []
+    for s in sections:
+        body = text[s['start']:s['end']].strip().splitlines()
+        preview = next((line.strip() for line in body[1:] if line.strip()), "")[:80]
+        lines.append(f"{s['id']}: {s['title']} — {preview}")
+    return "\n".join(lines)
+
+
+def select_sections_with_model(api_key, text, sections, refine_query):
+    """목차(제목 + 첫 줄)만 경량 모델에 보내 관련 섹션 선택 ('ALL'이면 전체)"""
+    prompt = (
+        "Pick the sections of the document that must change to satisfy the user's request.\n"
+        "Return only JSON: {\"sections\": [ids]} or {\"sections\": \"ALL\"} if the whole document must change.\n"
+        f"User request: \"{refine_query}\"\n"
+        f"Sections (id: title — first line):\n{_outline(text, sections)}\n"
+    )
+    resp = utils_gemini.generate_content(
+        api_key, PICKER_MODEL, prompt,
+        config=types.GenerateContentConfig(temperature=0.0, response_mime_type="application/json"),
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
+        cache=True,
+    )
+    try:
+        picked = json.loads(resp.text or "{}").get("sections")
+    except (ValueError, AttributeError):
+        picked = None
+    valid = {s['id'] for s in sections}
+    if picked == "ALL" or not isinstance(picked, list):
+        return sorted(valid)
+    ids = sorted({int(sid) for sid in picked if str(sid).isdigit() and int(sid) in valid})
+    return ids or sorted(valid)
+
+
+def build_refine_prompt(text, sections, selected_ids, refine_query):
+    selected = [s for s in sections if s['id'] in selected_ids]
+    blocks = "\n\n".join(
+        f"<<<SECTION {s['id']}>>>\n{text[s['start']:s['end']].strip()}\n<<<END SECTION {s['id']}>>>"
+        for s in selected
+    )
+    return (
+        f"You are a document refinement assistant.\n"
+        f"Apply the user's request to the given sections of an existing document without losing structure.\n"
+        f"User request: \"{refine_query}\"\n"
+        f"Full document outline (for context only):\n"
+        + "\n".join(f"- {s['title']}" for s in sections) + "\n\n"
+        f"Rewrite each section below and return every one of them in the same markers, "
+        f"keeping its heading line. Put any new content inside the most relevant section. "
+        f"Output nothing outside the markers.\n\n{blocks}\n"
+    )
+
+
+def splice_sections(text, sections, revised):
+    """수정된 섹션(id → 텍스트)을 원래 위치에 교체 (뒤에서부터 교체해 오프셋 유지)"""
+    by_id = {s['id']: s for s in sections}
+    for sid in sorted(revised, key=lambda i: by_id[i]['start'], reverse=True):
+        s = by_id[sid]
+        original = text[s['start']:s['end']]
+        leading = original[:len(original) - len(original.lstrip())]
+        trailing = original[len(original.rstrip()):]
+        text = text[:s['start']] + leading + revised[sid].strip() + trailing + text[s['end']:]
+    return text
+
+
+def refine_document(api_key, model_name, current_text, refine_query):
+    """
+    관련 섹션만 수정해 전체 문서 반환
+
+    Returns:
+        (수정된 전체 문서, 수정된 섹션 제목 목록)
+    """
+    sections = build_section_index(current_text)
+    with utils_trace.span("refine.select", sections=len(sections)) as span:
+        selected_ids = select_sections_local(current_text, sections, refine_query)
+        span.set(method="local")
+        if not selected_ids:
+            selected_ids = select_sections_with_model(api_key, current_text, sections, refine_query)
+            span.set(method="model")
+        span.set(selected=len(selected_ids))
+
+    resp = utils_gemini.generate_content(
+        api_key, model_name, build_refine_prompt(current_text, sections, selected_ids, refine_query),
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
+    )
+    revised = {
+        int(m.group(1)): m.group(2)
+        for m in _BLOCK_PATTERN.finditer(resp.text or "")
+        if int(m.group(1)) in selected_ids and m.group(2).strip()
+    }
+    if not revised:
+        raise ValueError("수정된 섹션을 응답에서 찾지 못했습니다")
+
+    titles = [s['title'] for s in sections if s['id'] in revised]
+    return splice_sections(current_text, sections, revised), titles
@@ -1,14 +1,27 @@
 import os
 import datetime
-from google import genai
 from google.genai import types
+import json
 import prompts
+import utils_gemini
+import utils_rfi_match
+import utils_rfi_state
+import utils_trace
 
 def get_client(api_key):
-    return genai.Client(api_key=api_key)
+    return utils_gemini.get_client(api_key)
 
-def analyze_rfi_status(client, existing_rfi, file_index_str):
-    """Step 1: Flash 모델로 인덱싱"""
+INDEXING_MODEL = "gemini-3-flash-preview"
+
+def _text_chunk(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(parts=[types.Part(text=text)])
+        )]
+    )
+
+def build_indexing_request(existing_rfi, file_index_str):
+    """Step 1 인덱싱 (프롬프트, config) 구성"""
     prompt = f"""
     {prompts.RFI_PROMPTS['indexing']}
     
@@ -18,45 +31,190 @@ def analyze_rfi_status(client, existing_rfi, file_index_str):
     [수령한 파일 인덱스 (Browser Scan)]
     {file_index_str}
     """
+    return prompt, types.GenerateContentConfig(temperature=0.1)
+
+def reconcile_local(existing_rfi, file_index_str, deal_name=""):
+    """
+    로컬 대사 (utils_rfi_match) → (항목별 결과, delta, 파일 경로 목록)
+
+    deal_name이 있고 같은 RFI 목록의 이전 라운드 상태가 저장돼 있으면
+    파일 인덱스 변경분만 다시 대사하고 delta(added/removed/changed)를 함께 반환.
+    첫 라운드이거나 RFI 목록이 바뀌었으면 delta는 None.
+    RFI 항목을 파싱하지 못하면 (None, None, None) → 모델 전체 인덱싱으로 대체
+    """
+    with utils_trace.span("rfi.reconcile_local") as span:
+        items = utils_rfi_match.parse_rfi_items(existing_rfi or "")
+        if not items:
+            return None, None, None
+        paths = utils_rfi_match.parse_file_index(file_index_str)
+
+        state = utils_rfi_state.load(deal_name)
+        if state and state.get('rfi_signature') == utils_rfi_state.rfi_signature(existing_rfi):
+            results, delta = utils_rfi_match.rematch(state['results'], state['paths'], paths)
+            span.set(incremental=True, added=len(delta['added']), removed=len(delta['removed']),
+                     changed=len(delta['changed']))
+        else:
+            results, delta = utils_rfi_match.match_items(items, paths), None
+        span.set(items=len(items), files=len(paths),
+                 residual=sum(r['status'] == utils_rfi_match.STATUS_UNSURE for r in results))
+        return results, delta, paths
+
+def build_residual_request(residual):
+    """확신도가 낮은 항목만 후보 파일과 함께 판정 요청 (프롬프트, config)"""
+    blocks = []
+    for r in residual:
+        candidates = "\n".join(f"  - {path}" for path in r.get('candidates') or r['files']) or "  - (없음)"
+        blocks.append(f"- No. {r['no']} [{r['category']}] {r['item']}\n{candidates}")
+    prompt = f"""
+    {prompts.RFI_PROMPTS['residual_matching']}
+
+    [판정 대상 RFI 항목 / 후보 파일]
+    {chr(10).join(blocks)}
+    """
+    return prompt, types.GenerateContentConfig(temperature=0.0, response_mime_type="application/json")
+
+def apply_residual_response(results, response_text):
+    """모델 판정(JSON)을 결과 목록에 반영 (판정 누락 항목은 △로 표시됨)"""
     try:
-        resp = client.models.generate_content(
-            model="gemini-3-flash-preview", 
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.1)
-        )
-        return resp.text
-    except Exception as e:
-        return f"인덱싱 오류: {str(e)}"
+        decisions = json.loads(response_text or "{}").get("results", [])
+    except (ValueError, AttributeError):
+        return
+    by_no = {str(d.get("no", "")).strip(): d for d in decisions if isinstance(d, dict)}
+    for r in results:
+        decision = by_no.get(str(r['no']))
+        if r['status'] != utils_rfi_match.STATUS_UNSURE or decision is None:
+            continue
+        status = decision.get("status")
+        if status in (utils_rfi_match.STATUS_SUBMITTED, utils_rfi_match.STATUS_CHECK, utils_rfi_match.STATUS_MISSING):
+            r['status'] = status
+            r['files'] = [f for f in decision.get("files") or [] if isinstance(f, str)] if status != "X" else []
+            r['note'] = f"AI 판정: {decision.get('note', '')}".strip()
 
-def generate_rfi_stream(api_key, model_name, inputs, thinking_level, file_context=""):
-    """RFI 생성 메인 로직"""
-    client = get_client(api_key)
-    
-    # UI에서 복사/붙여넣기 한 텍스트 사용
+def plan_reconcile(existing_rfi, file_index_str, deal_name=""):
+    """
+    Step 1 앞단: 로컬 대사 후 모델에 보낼 요청 구성
+
+    Returns:
+        dict: request((프롬프트, config) 또는 None), results, delta, paths, existing_rfi, deal_name
+        RFI 항목을 파싱하지 못하면 results는 None이고 request는 전체 인덱싱 요청
+    """
+    results, delta, paths = reconcile_local(existing_rfi, file_index_str, deal_name)
+    if results is None:
+        request = build_indexing_request(existing_rfi, file_index_str)
+    else:
+        residual = [r for r in results if r['status'] == utils_rfi_match.STATUS_UNSURE]
+        request = build_residual_request(residual) if residual else None
+    return {'request': request, 'results': results, 'delta': delta, 'paths': paths,
+            'existing_rfi': existing_rfi, 'deal_name': deal_name}
+
+def complete_reconcile(plan, resp_text, error=None):
+    """
+    Step 1 뒷단: 모델 응답 반영 → 상태 저장. (상태 표, delta) 반환
+
+    error가 있으면 전체 인덱싱은 오류 문구를, 애매한 항목은 △(확인 필요)로 남김
+    """
+    if plan['results'] is None:
+        return (f"인덱싱 오류: {str(error)}" if error is not None else resp_text), None
+    results = plan['results']
+    if error is None and resp_text is not None:
+        apply_residual_response(results, resp_text)
+    utils_rfi_state.save(plan['deal_name'], plan['existing_rfi'], plan['paths'], results)
+    return utils_rfi_match.render_status_table(results), finalize_delta(plan['delta'], results)
+
+def _reconcile(api_key, existing_rfi, file_index_str, deal_name=""):
+    """Step 1 공통: 로컬 대사 → 애매한 항목만 Flash 모델 판정 → 상태 저장. (상태 표, delta) 반환"""
+    plan = plan_reconcile(existing_rfi, file_index_str, deal_name)
+    resp_text, error = None, None
+    if plan['request'] is not None:
+        prompt, config = plan['request']
+        try:
+            resp = utils_gemini.generate_content(
+                api_key, INDEXING_MODEL, prompt,
+                config=config,
+                priority=utils_gemini.PRIORITY_INTERACTIVE,
+                cache=True,
+            )
+            resp_text = resp.text
+        except Exception as e:
+            error = e
+    return complete_reconcile(plan, resp_text, error)
+
+def finalize_delta(delta, results):
+    """delta에 모델 판정 반영 후 남은 미해결(X/△) 항목 목록을 추가 (첫 라운드면 None)"""
+    if delta is None:
+        return None
+    changed_keys = {(r['no'], r['item']) for r in delta['changed']}
+    return dict(
+        delta,
+        changed=[r for r in results if (r['no'], r['item']) in changed_keys],
+        open_items=[r for r in results if r['status'] != utils_rfi_match.STATUS_SUBMITTED],
+    )
+
+def analyze_rfi_status(api_key, existing_rfi, file_index_str, deal_name=""):
+    """Step 1: 로컬 대사 후 애매한 항목만 Flash 모델로 판정"""
+    rfi_status_table, _ = _reconcile(api_key, existing_rfi, file_index_str, deal_name)
+    return rfi_status_table
+
+def get_file_index(inputs):
+    """UI에서 복사/붙여넣기 한 파일 인덱스 텍스트"""
     file_index_str = inputs.get('rfi_file_list_input', '')
     if not file_index_str:
         file_index_str = "(파일 인덱스 없음 - 사용자가 입력하지 않음)"
-    
-    yield types.GenerateContentResponse(
-        candidates=[types.Candidate(
-            content=types.Content(parts=[types.Part(text="📂 [Step 1] 파일 인덱스 기반 대사(Indexing) 진행 중...\n\n")])
-        )]
-    )
-    
-    rfi_status_table = analyze_rfi_status(client, inputs['rfi_existing'], file_index_str)
-    
-    yield types.GenerateContentResponse(
-        candidates=[types.Candidate(
-            content=types.Content(parts=[types.Part(text=f"{rfi_status_table}\n\n---\n🧠 [Step 2] 부족 자료 분석 및 최종 RFI 작성 중... ({model_name})\n\n")])
-        )]
-    )
+    return file_index_str
 
-    main_prompt = f"""
-    [System: Thinking Level {thinking_level.upper() if isinstance(thinking_level, str) else 'HIGH'}]
-    
+def indexing_start_chunk():
+    return _text_chunk("📂 [Step 1] 파일 인덱스 기반 대사(Indexing) 진행 중...\n\n")
+
+def indexing_done_chunk(rfi_status_table, model_name):
+    return _text_chunk(f"{rfi_status_table}\n\n---\n🧠 [Step 2] 부족 자료 분석 및 최종 RFI 작성 중... ({model_name})\n\n")
+
+MAX_DELTA_FILES = 200
+
+def _delta_summary(delta):
+    """후속 라운드 최종 작성 단계에 넘길 변경분 요약"""
+    def file_list(paths):
+        listed = "\n".join(f"- {p}" for p in paths[:MAX_DELTA_FILES])
+        more = f"\n- ... 외 {len(paths) - MAX_DELTA_FILES}개" if len(paths) > MAX_DELTA_FILES else ""
+        return (listed + more) or "(없음)"
+
+    open_items = "\n".join(
+        f"- No. {r['no']} [{r['category']}] {r['item']} "
+        f"({utils_rfi_match.STATUS_CHECK if r['status'] == utils_rfi_match.STATUS_UNSURE else r['status']})"
+        for r in delta['open_items']
+    ) or "(없음)"
+    changed = utils_rfi_match.render_status_table(delta['changed']) if delta['changed'] else "(상태 변경 없음)"
+    return f"""
+    [이번 라운드 상태 변경 항목]
+    {changed}
+
+    [새로 수령한 파일]
+    {file_list(delta['added'])}
+
+    [삭제된 파일]
+    {file_list(delta['removed'])}
+
+    [미해결 항목 (X/△)]
+    {open_items}
+    """
+
+def build_final_request(rfi_status_table, inputs, thinking_level, file_context, delta=None):
+    """
+    Step 2 최종 RFI 작성 (프롬프트, config) 구성
+    delta가 있으면(후속 라운드) 전체 대응 표 대신 변경분만 전달
+    """
+    if delta is None:
+        status_section = f"""
     [1차 자료 점검 결과]
     {rfi_status_table}
+    """
+        system_instruction = prompts.RFI_PROMPTS['finalizing']
+    else:
+        status_section = _delta_summary(delta)
+        system_instruction = prompts.RFI_PROMPTS['finalizing_delta']
 
+    main_prompt = f"""
+    [System: Thinking Level {thinking_level.upper() if isinstance(thinking_level, str) else 'HIGH'}]
+    {status_section}
     [업로드된 파일 내용 (분석용)]
     {file_context[:50000]}
 
@@ -67,14 +225,28 @@ def generate_rfi_stream(api_key, model_name, inputs, thinking_level, file_contex
     config = types.GenerateContentConfig(
         max_output_tokens=8192,
         temperature=0.2, 
-        system_instruction=prompts.RFI_PROMPTS['finalizing']
+        system_instruction=system_instruction
     )
+    return main_prompt, config
+
+def generate_rfi_stream(api_key, model_name, inputs, thinking_level, file_context=""):
+    """RFI 생성 메인 로직"""
+    file_index_str = get_file_index(inputs)
+    
+    yield indexing_start_chunk()
+    
+    rfi_status_table, delta = _reconcile(
+        api_key, inputs['rfi_existing'], file_index_str, inputs.get('rfi_deal_name', '')
+    )
+    
+    yield indexing_done_chunk(rfi_status_table, model_name)
+
+    main_prompt, config = build_final_request(rfi_status_table, inputs, thinking_level, file_context, delta)
     
-    response_stream = client.models.generate_content_stream(
-        model=model_name,
-        contents=main_prompt,
-        config=config
+    response_stream = utils_gemini.generate_content_stream(
+        api_key, model_name, main_prompt, config,
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
     )
     
     for chunk in response_stream:
-        yield chunk
\ No newline at end of file
+        yield chunk
@@ -0,0 +1,150 @@
+"""
+오프라인 Document AI 일괄 처리 대체 백엔드 (테스트/벤치마크용)
+utils_docai.BatchBackend 인터페이스의 로컬 구현
+
+- PyMuPDF로 페이지 텍스트/줄 좌표를 읽어 실제 일괄 처리 결과와 같은 샤드 Document 생성
+- 샤드별 완료 지연, 순서 뒤섞임, 작업 실패 주입 설정 가능
+
+Usage:
+    import fake_docai, utils_docai
+    fake_docai.install(sec_per_shard=0.2, poll_sec=0.05)
+    # 이후 LRO_MIN_PAGES를 넘는 PDF의 utils_docai.process_document 호출은 FakeBatchBackend 사용
+"""
+import random
+import threading
+import time
+import uuid
+
+import fitz  # PyMuPDF
+from google.cloud import documentai_v1 as documentai
+
+import utils_docai
+
+
+class FakeBatchBackend(utils_docai.BatchBackend):
+    def __init__(self, pages_per_shard=utils_docai.BATCH_SIZE, ttfs_sec=0.5, sec_per_shard=0.3,
+                 shuffle=False, error_rate=0.0, seed=None):
+        self.pages_per_shard = pages_per_shard
+        self.ttfs_sec = ttfs_sec              # 첫 샤드 기록까지 지연
+        self.sec_per_shard = sec_per_shard    # 이후 샤드 간 간격
+        self.shuffle = shuffle                # 샤드 기록 순서 뒤섞기
+        self.error_rate = error_rate          # 작업 실패 확률
+        self._random = random.Random(seed)
+        self._operations = {}
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'polls': 0, 'shards_read': 0, 'cleaned': 0}
+
+    def submit(self, file_bytes, mime_type):
+        shards = _build_shards(file_bytes, self.pages_per_shard)
+        order = list(range(len(shards)))
+        if self.shuffle:
+            self._random.shuffle(order)
+        submitted = time.monotonic()
+        ready_at = {}
+        for n, index in enumerate(order):
+            ready_at[f"output/document-{index}.json"] = submitted + self.ttfs_sec + n * self.sec_per_shard
+        failed = self._random.random() < self.error_rate
+        operation_id = uuid.uuid4().hex
+        with self._lock:
+            self._operations[operation_id] = {
+                'shards': {f"output/document-{i}.json": doc for i, doc in enumerate(shards)},
+                'ready_at': ready_at,
+                'done_at': max(ready_at.values(), default=submitted),
+                # 실패 작업은 샤드 절반 기록 후 중단
+                'fail_at': submitted + self.ttfs_sec + len(shards) // 2 * self.sec_per_shard if failed else None,
+            }
+            self.stats['submitted'] += 1
+        return operation_id
+
+    def poll(self, operation_id):
+        op = self._operations[operation_id]
+        now = time.monotonic()
+        self.stats['polls'] += 1
+        if op['fail_at'] is not None and now >= op['fail_at']:
+            return True, "500 INTERNAL: injected failure"
+        return now >= op['done_at'], None
+
+    def ready_shards(self, operation_id):
+        op = self._operations[operation_id]
+        now = time.monotonic()
+        limit = op['fail_at'] if op['fail_at'] is not None else now
+        return sorted((name for name, at in op['ready_at'].items() if at <= min(now, limit)), key=utils_docai._shard_number)
+
+    def read_shard(self, operation_id, shard_name):
+        self.stats['shards_read'] += 1
+        return self._operations[operation_id]['shards'][shard_name]
+
+    def cleanup(self, operation_id):
+        with self._lock:
+            if self._operations.pop(operation_id, None) is not None:
+                self.stats['cleaned'] += 1
+
+
+def _layout(start, end, rect, page_rect, text_offset):
+    x0, y0, x1, y1 = rect
+    w, h = page_rect.width or 1, page_rect.height or 1
+    vertices = [(x0 / w, y0 / h), (x1 / w, y0 / h), (x1 / w, y1 / h), (x0 / w, y1 / h)]
+    return documentai.Document.Page.Layout(
+        text_anchor=documentai.Document.TextAnchor(text_segments=[
+            documentai.Document.TextAnchor.TextSegment(start_index=text_offset + start, end_index=text_offset + end)
+        ]),
+        bounding_poly=documentai.BoundingPoly(normalized_vertices=[
+            documentai.NormalizedVertex(x=x, y=y) for x, y in vertices
+        ]),
+    )
+
+
+def _build_shards(file_bytes, pages_per_shard):
+    """
+    PDF → 샤드 Document 목록
+
+    실제 샤드 출력과 같이 text는 샤드 부분만, 텍스트 앵커와 page_number는 전체 문서 기준
+    (앵커 - shard_info.text_offset = 샤드 텍스트 내 위치)
+    """
+    shards = []
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        shard_count = (len(doc) + pages_per_shard - 1) // pages_per_shard
+        text_offset = 0
+        for shard_index in range(shard_count):
+            text = ""
+            pages = []
+            for page_index in range(shard_index * pages_per_shard, min((shard_index + 1) * pages_per_shard, len(doc))):
+                page = doc[page_index]
+                blocks, lines = [], []
+                for block in page.get_text("dict")["blocks"]:
+                    block_start = len(text)
+                    for line in block.get("lines", []):
+                        line_text = "".join(span["text"] for span in line["spans"]).strip()
+                        if not line_text:
+                            continue
+                        start = len(text)
+                        text += line_text + "\n"
+                        lines.append(documentai.Document.Page.Line(layout=_layout(start, len(text), line["bbox"], page.rect, text_offset)))
+                    if len(text) > block_start:
+                        blocks.append(documentai.Document.Page.Block(layout=_layout(block_start, len(text), block["bbox"], page.rect, text_offset)))
+                pages.append(documentai.Document.Page(
+                    page_number=page_index + 1,
+                    dimension=documentai.Document.Page.Dimension(width=page.rect.width, height=page.rect.height, unit="points"),
+                    blocks=blocks,
+                    lines=lines,
+                ))
+            shards.append(documentai.Document(
+                text=text,
+                pages=pages,
+                shard_info=documentai.Document.ShardInfo(shard_index=shard_index, shard_count=shard_count, text_offset=text_offset),
+            ))
+            text_offset += len(text)
+    return shards
+
+
+def install(poll_sec=None, **kwargs):
+    """FakeBatchBackend를 utils_docai 일괄 처리 백엔드로 설치 (생성 인자는 FakeBatchBackend와 동일)"""
+    backend = FakeBatchBackend(**kwargs)
+    if poll_sec is not None:
+        utils_docai.LRO_POLL_SEC = poll_sec
+    utils_docai.set_batch_backend_factory(lambda processor_name, gcs_uri, credentials_json: backend)
+    return backend
+
+
+def uninstall():
+    utils_docai.set_batch_backend_factory(None)
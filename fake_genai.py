@@ -0,0 +1,360 @@
+"""
+오프라인 Gemini 대체 백엔드 (벤치마크/부하 테스트용)
+google-genai Client와 같은 인터페이스의 로컬 구현
+
+- models.generate_content / generate_content_stream (+ aio 버전)
+- files.upload / get / delete, caches.create / get / delete
+- 모드: synthesize(합성 응답) / replay(녹화 응답 재생) / record(실제 클라이언트 호출 후 녹화)
+- 지연(TTFT), 초당 토큰 수, 오류 주입(호출 시작 시 429/503, 스트림당 확률로 도중 끊김) 설정 가능
+- 도중 끊김 후 이어쓰기 요청에는 원래 응답의 남은 부분만 전송
+
+Usage:
+    import fake_genai, utils_gemini
+    fake_genai.install(ttft_sec=0.5, tokens_per_sec=200, error_rate=0.05)
+    # 이후 core_logic / core_chained / core_rfi / utils OCR 호출은 모두 FakeClient 사용
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from google.genai import types
+
+import utils_cache
+import utils_gemini
+
+CHARS_PER_TOKEN = 4
+
+
+class FakeAPIError(Exception):
+    """google.genai.errors.APIError와 같이 code 속성을 가진 주입용 오류"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeConfig:
+    def __init__(self, mode="synthesize", recording_path=None, ttft_sec=0.3, tokens_per_sec=150.0,
+                 chunk_tokens=20, synth_tokens=1500, error_rate=0.0, midstream_error_rate=0.0,
+                 seed=None, real_api_key=None):
+        self.mode = mode
+        self.recording_path = recording_path
+        self.ttft_sec = ttft_sec
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_tokens = chunk_tokens
+        self.synth_tokens = synth_tokens
+        self.error_rate = error_rate
+        self.midstream_error_rate = midstream_error_rate
+        self.seed = seed
+        self.real_api_key = real_api_key
+
+
+def _contents_text(contents):
+    """프롬프트 텍스트 근사 (토큰 수 추정용)"""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "".join(_contents_text(c) for c in contents)
+    text = getattr(contents, "text", None)
+    if text:
+        return text
+    parts = getattr(contents, "parts", None)
+    if parts:
+        return _contents_text(parts)
+    inline = getattr(contents, "inline_data", None)
+    if inline is not None and inline.data:
+        return " " * (258 * CHARS_PER_TOKEN)  # 이미지 1장 ≈ 258 토큰
+    return ""
+
+
+def _continuation(contents):
+    """utils_gemini 이어쓰기 요청이면 (원래 프롬프트, 이미 받은 텍스트), 아니면 None"""
+    if not isinstance(contents, (list, tuple)) or len(contents) != 3:
+        return None
+    first, received, prompt = contents
+    if getattr(received, "role", None) != "model" or _contents_text(prompt) != utils_gemini.CONTINUATION_PROMPT:
+        return None
+    return _contents_text(first), _contents_text(received)
+
+
+def _response(text, prompt_tokens=0, output_tokens=0, finish=None):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            finish_reason=finish,
+        )],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        ),
+    )
+
+
+class _Recorder:
+    """JSONL 녹화 파일 (key → 청크 텍스트 목록)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.records[entry["key"]] = entry["chunks"]
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def add(self, key, model, chunks):
+        with self._lock:
+            self.records[key] = chunks
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "model": model, "chunks": chunks}, ensure_ascii=False) + "\n")
+
+
+class _Engine:
+    """응답 생성/재생/녹화 및 지연·오류 주입 공통 로직"""
+
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.recorder = _Recorder(config.recording_path)
+        self._real_client = None
+        self.stats = {"calls": 0, "stream_calls": 0, "errors_injected": 0, "output_tokens": 0}
+
+    def midstream_fail_at(self, n_chunks):
+        """스트림 1개당 midstream_error_rate 확률로 끊을 chunk 위치 (끊지 않으면 None)"""
+        rate = self.config.midstream_error_rate
+        if n_chunks < 2 or not rate or self.random.random() >= rate:
+            return None
+        return self.random.randint(1, n_chunks - 1)
+
+    def fail_midstream(self):
+        self.stats["errors_injected"] += 1
+        raise FakeAPIError(503, "UNAVAILABLE: Server disconnected")
+
+    def _maybe_fail(self, rate):
+        if rate and self.random.random() < rate:
+            self.stats["errors_injected"] += 1
+            code = self.random.choice([429, 503])
+            raise FakeAPIError(code, "RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE")
+
+    def _synthesize(self, model, contents, config):
+        max_tokens = getattr(config, "max_output_tokens", None) or self.config.synth_tokens
+        n_tokens = min(max_tokens, self.config.synth_tokens)
+        lines = ["# 합성 보고서", "", f"## 개요 ({model})", ""]
+        i = 0
+        while sum(len(line) for line in lines) < n_tokens * CHARS_PER_TOKEN:
+            i += 1
+            if i % 12 == 0:
+                lines += ["", f"## 섹션 {i // 12}", ""]
+            elif i % 7 == 0:
+                lines += ["| 항목 | 값 | 비고 |", "|---|---|---|", f"| 매출 | {i * 10}억 | 추정 |", ""]
+            else:
+                lines.append(f"- 분석 항목 {i}: 합성된 문장으로 스트리밍 처리량을 측정합니다.")
+        text = "\n".join(lines)
+        size = self.config.chunk_tokens * CHARS_PER_TOKEN
+        return [text[j:j + size] for j in range(0, len(text), size)]
+
+    def _record_real(self, model, contents, config):
+        if self._real_client is None:
+            from google import genai
+            self._real_client = genai.Client(api_key=self.config.real_api_key)
+        chunks = []
+        for chunk in self._real_client.models.generate_content_stream(model=model, contents=contents, config=config):
+            if chunk.text:
+                chunks.append(chunk.text)
+        return chunks
+
+    def chunks_for(self, model, contents, config):
+        continuation = _continuation(contents)
+        if continuation is not None:
+            # 원래 응답 중 이미 받은 부분 이후만 이어서 전송
+            original, received = continuation
+            text = "".join(self.chunks_for(model, original, config))
+            rest = text[len(received):] if text.startswith(received) else text
+            size = self.config.chunk_tokens * CHARS_PER_TOKEN
+            return [rest[j:j + size] for j in range(0, len(rest), size)] or [""]
+        key = utils_cache.make_key(model, config, contents)
+        if self.config.mode in ("replay", "record"):
+            chunks = self.recorder.get(key)
+            if chunks is not None:
+                return chunks
+            if self.config.mode == "record":
+                chunks = self._record_real(model, contents, config)
+                self.recorder.add(key, model, chunks)
+                return chunks
+        return self._synthesize(model, contents, config)
+
+    def chunk_delay(self, text):
+        tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        return tokens / self.config.tokens_per_sec if self.config.tokens_per_sec else 0.0
+
+    def prompt_tokens(self, contents, config):
+        system = getattr(config, "system_instruction", None) or ""
+        return (len(_contents_text(contents)) + len(str(system))) // CHARS_PER_TOKEN
+
+
+class _FakeModels:
+    def __init__(self, engine):
+        self._engine = engine
+
+    def generate_content(self, *, model, contents, config=None):
+        engine = self._engine
+        engine.stats["calls"] += 1
+        time.sleep(engine.config.ttft_sec)
+        engine._maybe_fail(engine.config.error_rate)
+        chunks = engine.chunks_for(model, contents, config)
+        text = "".join(chunks)
+        time.sleep(engine.chunk_delay(text))
+        output_tokens = len(text) // CHARS_PER_TOKEN
+        engine.stats["output_tokens"] += output_tokens
+        return _response(text, engine.prompt_tokens(contents, config), output_tokens, finish="STOP")
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        engine = self._engine
+        engine.stats["stream_calls"] += 1
+        time.sleep(engine.config.ttft_sec)
+        engine._maybe_fail(engine.config.error_rate)
+        chunks = engine.chunks_for(model, contents, config)
+        prompt_tokens = engine.prompt_tokens(contents, config)
+        output_tokens = 0
+        fail_at = engine.midstream_fail_at(len(chunks))
+        for idx, text in enumerate(chunks):
+            if idx:
+                time.sleep(engine.chunk_delay(text))
+                if idx == fail_at:
+                    engine.fail_midstream()
+            output_tokens += len(text) // CHARS_PER_TOKEN
+            engine.stats["output_tokens"] += len(text) // CHARS_PER_TOKEN
+            finish = "STOP" if idx == len(chunks) - 1 else None
+            yield _response(text, prompt_tokens, output_tokens, finish=finish)
+
+
+class _FakeAsyncModels:
+    def __init__(self, engine):
+        self._engine = engine
+        self._sync = _FakeModels(engine)
+
+    async def generate_content(self, *, model, contents, config=None):
+        engine = self._engine
+        engine.stats["calls"] += 1
+        await asyncio.sleep(engine.config.ttft_sec)
+        engine._maybe_fail(engine.config.error_rate)
+        chunks = engine.chunks_for(model, contents, config)
+        text = "".join(chunks)
+        await asyncio.sleep(engine.chunk_delay(text))
+        output_tokens = len(text) // CHARS_PER_TOKEN
+        engine.stats["output_tokens"] += output_tokens
+        return _response(text, engine.prompt_tokens(contents, config), output_tokens, finish="STOP")
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        engine = self._engine
+        engine.stats["stream_calls"] += 1
+
+        async def _stream():
+            await asyncio.sleep(engine.config.ttft_sec)
+            engine._maybe_fail(engine.config.error_rate)
+            chunks = engine.chunks_for(model, contents, config)
+            prompt_tokens = engine.prompt_tokens(contents, config)
+            output_tokens = 0
+            fail_at = engine.midstream_fail_at(len(chunks))
+            for idx, text in enumerate(chunks):
+                if idx:
+                    await asyncio.sleep(engine.chunk_delay(text))
+                    if idx == fail_at:
+                        engine.fail_midstream()
+                output_tokens += len(text) // CHARS_PER_TOKEN
+                engine.stats["output_tokens"] += len(text) // CHARS_PER_TOKEN
+                finish = "STOP" if idx == len(chunks) - 1 else None
+                yield _response(text, prompt_tokens, output_tokens, finish=finish)
+
+        return _stream()
+
+
+class _FakeFiles:
+    def __init__(self):
+        self._files = {}
+
+    def upload(self, *, file, config=None):
+        name = f"files/{uuid.uuid4().hex[:12]}"
+        size = os.path.getsize(file) if isinstance(file, str) and os.path.exists(file) else 0
+        mime_type = getattr(config, "mime_type", None) if config is not None else None
+        uploaded = types.File(name=name, size_bytes=size, mime_type=mime_type, state="ACTIVE",
+                              uri=f"fake://{name}")
+        self._files[name] = uploaded
+        return uploaded
+
+    def get(self, *, name):
+        return self._files[name]
+
+    def delete(self, *, name):
+        self._files.pop(name, None)
+
+
+class _FakeCaches:
+    def __init__(self):
+        self._caches = {}
+
+    def create(self, *, model, config=None):
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        cached = types.CachedContent(name=name, model=model)
+        self._caches[name] = cached
+        return cached
+
+    def get(self, *, name):
+        return self._caches[name]
+
+    def delete(self, *, name):
+        self._caches.pop(name, None)
+
+
+class _FakeAsyncClient:
+    def __init__(self, engine):
+        self.models = _FakeAsyncModels(engine)
+
+    async def aclose(self):
+        pass
+
+
+class FakeClient:
+    """genai.Client 대체 구현"""
+
+    def __init__(self, config=None, **kwargs):
+        self.config = config or FakeConfig(**kwargs)
+        self._engine = _Engine(self.config)
+        self.models = _FakeModels(self._engine)
+        self.files = _FakeFiles()
+        self.caches = _FakeCaches()
+        self.aio = _FakeAsyncClient(self._engine)
+
+    @property
+    def stats(self):
+        return self._engine.stats
+
+    def close(self):
+        pass
+
+
+def install(config=None, **kwargs):
+    """
+    utils_gemini 레지스트리가 실제 클라이언트 대신 FakeClient를 반환하도록 설정
+
+    Returns:
+        생성된 FakeClient (모든 API 키가 공유)
+    """
+    client = FakeClient(config, **kwargs)
+    utils_gemini.set_client_factory(lambda api_key: client)
+    return client
+
+
+def uninstall():
+    utils_gemini.set_client_factory(None)
@@ -738,6 +738,19 @@ RFI_PROMPTS = {
 # Output Table Format
 | No. | 구분 | 기존 요청 자료 | 매칭된 파일 정보(경로) | 상태(O/△/X) | 비고 |
 | --- | --- | --- | --- | --- | --- |
+""",
+
+    'residual_matching': """
+아래 [판정 대상 RFI 항목]은 파일명 자동 매칭으로 제출 여부를 확정하지 못한 항목입니다.
+각 항목의 [후보 파일] 경로/명칭만 보고 제출 상태를 판정하십시오.
+
+# 판정 기준
+- **O (제출됨)**: 후보 파일 중 해당 자료가 명확히 포함됨
+- **△ (확인 필요)**: 파일명이 모호하거나, 부분적으로만 포함된 것으로 추정됨
+- **X (미제출)**: 후보 파일 중 해당 자료로 볼 수 있는 파일이 없음
+
+# Output (JSON only)
+{"results": [{"no": "항목 No.", "status": "O|△|X", "files": ["매칭된 파일 경로"], "note": "짧은 비고"}]}
 """,
 
     'finalizing': """
@@ -749,6 +762,19 @@ RFI_PROMPTS = {
    - 상태가 **X** 또는 **△**인 항목을 다시 요청 리스트에 포함하십시오.
    - [기본 실사 체크리스트] 중 아예 언급되지 않은 필수 자료를 추가하십시오.
 
+# Output Style
+- 표 형식을 사용하여 깔끔하게 정리하십시오.
+""",
+
+    'finalizing_delta': """
+이번 자료 수령분의 **변경 사항**만을 바탕으로 후속 RFI를 작성하십시오. (전체 대응 표는 이미 별도로 제공됨)
+
+# Task
+1. **[1. 이번 수령분 반영 결과]**: [이번 라운드 상태 변경 항목]을 표로 정리하고, 새로 수령했으나 어느 항목에도 매칭되지 않은 파일이 있으면 함께 언급하십시오.
+2. **[2. 추가 요청 사항]**:
+   - [미해결 항목 (X/△)]을 다시 요청 리스트에 포함하십시오.
+   - 삭제된 파일로 인해 다시 필요해진 자료가 있으면 포함하십시오.
+
 # Output Style
 - 표 형식을 사용하여 깔끔하게 정리하십시오.
 """
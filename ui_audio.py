@@ -3,7 +3,7 @@
 TXT 파일 업로드 또는 직접 입력 → AI 후처리 (회의록, 요약 등)
 """
 import streamlit as st
-from google import genai
+import utils_gemini
 
 
 def _get_instruction(mode: str) -> str:
@@ -51,14 +51,13 @@ def _get_instruction(mode: str) -> str:
 
 def _postprocess_with_gemini(raw_text: str, mode: str, model: str, api_key: str) -> str:
     """Gemini를 사용한 텍스트 후처리 (core_logic.py와 동일한 방식)"""
-    client = genai.Client(api_key=api_key)
     instruction = _get_instruction(mode)
 
     prompt = f"{instruction}\n\n[텍스트]\n{raw_text}"
 
-    response = client.models.generate_content(
-        model=model,
-        contents=prompt
+    response = utils_gemini.generate_content(
+        api_key, model, prompt,
+        priority=utils_gemini.PRIORITY_INTERACTIVE,
     )
     return response.text.strip()
 
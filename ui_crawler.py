@@ -3,7 +3,7 @@ import pandas as pd
 import requests
 import time
 from urllib.parse import urljoin
-import core_logic
+import utils_gemini
 
 # BeautifulSoup 라이브러리 확인
 try:
@@ -131,7 +131,6 @@ def render_crawler_panel(settings):
                                 combined_text += f"Title: {row.get('title', '')}\nURL: {row.get('url', '')}\nContent:\n{row.get('content', '')}\n\n"
                             
                             # Gemini 호출
-                            client = core_logic.get_client(api_key)
                             model_name = settings.get("model_name", "gemini-3-pro-preview")
                             
                             prompt = f"""
@@ -147,9 +146,9 @@ def render_crawler_panel(settings):
                             {combined_text[:500000]}
                             """
                             
-                            response = client.models.generate_content(
-                                model=model_name,
-                                contents=prompt
+                            response = utils_gemini.generate_content(
+                                api_key, model_name, prompt,
+                                priority=utils_gemini.PRIORITY_INTERACTIVE,
                             )
                             
                             st.markdown("### 📄 요약 보고서")
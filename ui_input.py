@@ -143,6 +143,7 @@ def render_settings():
         with c4:
             st.write(""); st.write("")
             use_diagram = st.checkbox("🎨 도식화 생성", value=False)
+            background_jobs = st.checkbox("🧵 백그라운드 생성", value=False, help="탭 전환/위젯 조작으로 화면이 다시 그려져도 생성 작업이 중단되지 않습니다.")
 
         # OCR 상태 표시
         ocr_available, ocr_msg = utils.get_ocr_status()
@@ -159,6 +160,7 @@ def render_settings():
         env_docai_location = os.getenv("DOCAI_LOCATION", "us")
         env_docai_processor = os.getenv("DOCAI_PROCESSOR_ID", "")
         env_docai_creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+        env_docai_gcs_uri = os.getenv("DOCAI_GCS_URI", "")  # 대용량 PDF 일괄 처리용 (선택)
 
         # .env 설정이 있으면 기본 활성화
         has_env_docai = bool(env_docai_project and env_docai_processor and env_docai_creds_path)
@@ -182,7 +184,8 @@ def render_settings():
                     'project_id': env_docai_project,
                     'location': env_docai_location,
                     'processor_id': env_docai_processor,
-                    'credentials_json': env_creds_json
+                    'credentials_json': env_creds_json,
+                    'gcs_uri': env_docai_gcs_uri
                 }
             else:
                 dc1, dc2 = st.columns(2)
@@ -204,7 +207,8 @@ def render_settings():
                         'project_id': docai_project_id,
                         'location': docai_location,
                         'processor_id': docai_processor_id,
-                        'credentials_json': docai_creds_json
+                        'credentials_json': docai_creds_json,
+                        'gcs_uri': env_docai_gcs_uri
                     }
                     st.success("✅ Document AI 설정 완료")
                 else:
@@ -215,6 +219,7 @@ def render_settings():
         "model_name": model_name,
         "thinking_level": "High" if "High" in thinking_level else "Low",
         "use_diagram": use_diagram,
+        "background_jobs": background_jobs,
         "docai_config": docai_config
     }
 
@@ -324,6 +329,13 @@ def render_rfi_panel(container, settings):
         else:
             st.info("파일이 없으면 빈 목록에서 시작합니다.")
 
+        rfi_deal_name = st.text_input(
+            "🏷️ 딜 이름 (선택)",
+            placeholder="예: 프로젝트A",
+            help="입력하면 딜별 자료 수령 현황을 저장하고, 다음 라운드에는 새로 추가/삭제된 파일만 대사합니다.",
+            key="rfi_deal_name",
+        )
+
         # 2. 수령 자료 폴더 스캔
         st.markdown("##### 2. 수령 자료 폴더 스캔")
         st.markdown("""
@@ -358,6 +370,7 @@ def render_rfi_panel(container, settings):
             "rfi_file_list_input": rfi_file_list_input,
             "context_text": context_text,
             "rfi_existing": rfi_existing,
+            "rfi_deal_name": rfi_deal_name,
             "generate_btn": generate_btn,
             "generation_mode": "single"
         }
@@ -86,13 +86,22 @@ def render_ocr_panel(settings):
                     file_bytes = uploaded_file.read()
                     mime_type = utils_docai.get_mime_type(uploaded_file.name)
                     
+                    received_pages = []
+
+                    def _show_pages(pages):
+                        # 일괄 처리 모드: 샤드가 도착할 때마다 진행 표시
+                        received_pages.extend(pages)
+                        status_text.text(f"처리 중 ({i+1}/{len(uploaded_files)}): {uploaded_file.name} - {len(received_pages)}페이지 수신")
+
                     result = utils_docai.process_document(
                         file_bytes=file_bytes,
                         mime_type=mime_type,
                         project_id=docai_config['project_id'],
                         location=docai_config.get('location', 'us'),
                         processor_id=docai_config['processor_id'],
-                        credentials_json=docai_config.get('credentials_json')
+                        credentials_json=docai_config.get('credentials_json'),
+                        gcs_uri=docai_config.get('gcs_uri'),
+                        on_pages=_show_pages
                     )
                     
                     st.session_state['ocr_results'][uploaded_file.name] = {
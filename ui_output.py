@@ -1,9 +1,109 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import utils
-import utils_ppt
 import core_logic
 import core_chained
+import core_jobs
+import utils_context
+import utils_export
+import utils_trace
+import ui_stream
+
+JOB_POLL_INTERVAL_SEC = 1.0
+
+
+def _render_job(job_id, k_text, k_job, key_prefix):
+    """백그라운드 작업 진행 상황/누적 출력 표시 (완료 시 결과를 세션에 반영)"""
+    manager = core_jobs.get_manager()
+    job = manager.get(job_id)
+    if job is None:
+        st.session_state.pop(k_job, None)
+        return
+
+    if job['status'] in core_jobs.FINISHED_STATUSES:
+        st.session_state.pop(k_job, None)
+        if job['status'] == core_jobs.STATUS_DONE:
+            st.session_state[k_text] = job['output']
+            st.session_state[f"{key_prefix}_prebuild"] = True
+        elif job['status'] == core_jobs.STATUS_FAILED:
+            st.session_state[k_text] = job['output']
+            st.session_state[f"{key_prefix}_job_error"] = job['error']
+        st.rerun()
+        return
+
+    c_stage, c_cancel = st.columns([4, 1])
+    with c_stage:
+        st.info(f"🧵 백그라운드 작업 진행 중: {job['stage'] or '대기 중...'}")
+    with c_cancel:
+        if st.button("⏹️ 중단", key=f"{key_prefix}_btn_cancel_job", use_container_width=True):
+            manager.cancel(job_id)
+    st.markdown((job['output'] or "") + "▌")
+
+def _export_button(label, text, fmt, file_name, key, **kwargs):
+    """생성된 파일이 있으면 바로 다운로드 버튼, 없으면 클릭 시 생성 (utils_export 메모이제이션)"""
+    data = utils_export.cached(text, fmt)
+    if data is None:
+        pending = utils_export.is_pending(text, fmt)
+        caption = f"⏳ {label} (생성 중)" if pending else f"{label} 준비"
+        if st.button(caption, use_container_width=True, key=f"{key}_build", **kwargs):
+            with st.spinner("파일 생성 중.."):
+                utils_export.get(text, fmt)
+            st.rerun()
+        return
+    st.download_button(
+        label, data, file_name, utils_export.mime_type(fmt),
+        use_container_width=True, key=key, **kwargs,
+    )
+
+def _stream_to_container(stream, container, build_docx):
+    """
+    응답 스트림을 container에 렌더링하고 전체 텍스트 반환
+
+    완성된 블록은 한 번만 추가하고 작성 중인 블록만 주기적으로 갱신
+    build_docx면 Word 파일도 스트리밍과 함께 생성해 utils_export에 등록 (완료 즉시 다운로드 가능)
+    """
+    with container:
+        renderer = ui_stream.StreamRenderer()
+        docx_builder = utils.DocxBuilder() if build_docx else None
+        with utils_trace.span("ui.stream") as span:
+            for chunk in stream:
+                renderer.feed(chunk.text)
+                if docx_builder:
+                    docx_builder.feed(chunk.text)
+            full_response = renderer.close()
+            span.set(chars=len(full_response), renders=renderer.render_count)
+        if docx_builder:
+            utils_export.put(full_response, 'docx', docx_builder.finish())
+    return full_response
+
+def _render_trace(run_id, key_prefix):
+    """마지막 실행의 단계별 소요 시간/토큰 요약 (utils_trace)"""
+    summary = utils_trace.summarize(run_id)
+    if not summary:
+        return
+    with st.expander("⏱️ 단계별 소요 시간", expanded=False):
+        rows = []
+        for g in summary:
+            attrs = g['attrs']
+            rows.append({
+                "단계": g['name'],
+                "횟수": g['count'],
+                "합계(s)": round(g['total_sec'], 2),
+                "최대(s)": round(g['max_sec'], 2),
+                "TTFT(s)": round(attrs['ttft'] / g['count'], 2) if attrs.get('ttft', -1) > 0 else None,
+                "입력 토큰": attrs.get('tokens_in'),
+                "출력 토큰": attrs.get('tokens_out'),
+                "재시도": attrs.get('retries'),
+                "오류": g['errors'],
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.download_button(
+            "🧾 트레이스(JSONL) 다운로드",
+            utils_trace.to_jsonl(run_id),
+            f"trace_{run_id[:8]}.jsonl",
+            "application/json",
+            key=f"{key_prefix}_dl_trace",
+        )
 
 def render_output_panel(container, settings, inputs, key_prefix="output"):
     # State keys with prefix to isolate tabs
@@ -12,6 +112,9 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
     k_text = f"{key_prefix}_generated_text"
     k_mode = f"{key_prefix}_active_mode"
     k_ocr = f"{key_prefix}_ocr_text"  # OCR 추출 텍스트 저장용
+    k_sources = f"{key_prefix}_source_context"  # 파일별 파싱 결과 (후속 작업에서 재사용)
+    k_job = f"{key_prefix}_job_id"  # 백그라운드 작업 ID
+    k_trace = f"{key_prefix}_trace_run_id"  # 마지막 실행의 단계별 계측(utils_trace) run ID
 
     with container:
         c_head1, c_head2 = st.columns([1, 1])
@@ -48,6 +151,8 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
         # Initialize text state if missing
         if k_text not in st.session_state:
             st.session_state[k_text] = ""
+        if k_sources not in st.session_state:
+            st.session_state[k_sources] = utils_context.SourceContextStore()
 
         # 1. 생성 로직
         if inputs['generate_btn']:
@@ -63,6 +168,19 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
 
             if not settings['api_key']:
                 st.error("설정 패널에서 API Key를 입력해주세요.")
+            elif settings.get('background_jobs'):
+                # 백그라운드 작업으로 제출 → 아래 결과 영역에서 polling
+                inputs['use_diagram'] = settings['use_diagram']
+                st.session_state[k_job] = core_jobs.get_manager().submit(
+                    "generation",
+                    core_jobs.generation_job,
+                    dict(settings),
+                    core_jobs.snapshot_inputs(inputs),
+                    label=f"{key_prefix}:{inputs['template_option']}",
+                    context_store=st.session_state[k_sources],
+                )
+                st.session_state[k_text] = ""
+                st.rerun()
             else:
                 try:
                     inputs['use_diagram'] = settings['use_diagram']
@@ -70,78 +188,90 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
                     # [수정] RFI 모드 여부 확인
                     is_rfi_mode = (inputs['template_option'] == 'rfi')
 
-                    with status_placeholder.status("✅ 분석 작업이 시작됩니다..", expanded=True) as status:
-                        # Document AI 설정 가져오기
-                        docai_config = settings.get('docai_config')
+                    with utils_trace.run(f"{key_prefix}:{inputs['template_option']}") as run_id:
+                        st.session_state[k_trace] = run_id
+                        with status_placeholder.status("✅ 분석 작업이 시작됩니다..", expanded=True) as status:
+                            # Document AI 설정 가져오기
+                            docai_config = settings.get('docai_config')
 
-                        if is_rfi_mode:
-                            if inputs.get('uploaded_files'):
-                                st.write("📁 1. 업로드된 파일의 내용을 분석 중입니다 (OCR/Text)...")
+                            if is_rfi_mode:
+                                if inputs.get('uploaded_files'):
+                                    st.write("📁 1. 업로드된 파일의 내용을 분석 중입니다 (OCR/Text)...")
+                                    file_context, _ = core_logic.parse_all_files(
+                                        inputs['uploaded_files'],
+                                        read_content=True,
+                                        api_key=settings['api_key'],
+                                        docai_config=docai_config,
+                                        template_option=inputs['template_option'],
+                                        context_store=st.session_state[k_sources],
+                                    )
+                                else:
+                                    st.write("📁 1. (Fast Mode) 파일 내용은 건너뛰고 파일명만 추출합니다..")
+                                    file_context, _ = core_logic.parse_all_files(
+                                        inputs['uploaded_files'],
+                                        read_content=False,
+                                        template_option=inputs['template_option'],
+                                    )
+                            else:
+                                # OCR 방식 표시
+                                if docai_config:
+                                    st.write("📁 1. Document AI OCR로 파일을 마크다운으로 변환 중입니다...")
+                                elif utils.MARKITDOWN_AVAILABLE:
+                                    st.write("📁 1. MarkItDown으로 파일을 마크다운으로 변환 중입니다...")
+                                else:
+                                    st.write("📁 1. 파일을 분석 중입니다 (텍스트 추출 + OCR)...")
                                 file_context, _ = core_logic.parse_all_files(
                                     inputs['uploaded_files'],
                                     read_content=True,
                                     api_key=settings['api_key'],
                                     docai_config=docai_config,
                                     template_option=inputs['template_option'],
+                                    context_store=st.session_state[k_sources],
                                 )
-                            else:
-                                st.write("📁 1. (Fast Mode) 파일 내용은 건너뛰고 파일명만 추출합니다..")
-                                file_context, _ = core_logic.parse_all_files(
-                                    inputs['uploaded_files'],
-                                    read_content=False,
-                                    template_option=inputs['template_option'],
+                                # OCR 텍스트 저장 (다운로드용)
+                                st.session_state[k_ocr] = file_context
+
+                            st.write(f"🤖 2. AI가 [{st.session_state[k_mode]}] 템플릿으로 분석을 시작합니다..")
+
+                            # 생성 모드에 따라 다른 함수 호출
+                            gen_mode = inputs.get('generation_mode', 'single')
+                            if gen_mode == 'chained' and core_chained.is_chained_supported(inputs['template_option']):
+                                part_count = len(core_chained.CHAINED_PARTS.get(inputs['template_option'], []))
+                                st.write(f"🔗 3. {part_count}단계 분할 생성 모드로 문서를 작성합니다..")
+                                stream = core_logic.generate_report_stream_chained(
+                                    settings['api_key'], settings['model_name'], inputs, settings['thinking_level'], file_context
                                 )
-                        else:
-                            # OCR 방식 표시
-                            if docai_config:
-                                st.write("📁 1. Document AI OCR로 파일을 마크다운으로 변환 중입니다...")
-                            elif utils.MARKITDOWN_AVAILABLE:
-                                st.write("📁 1. MarkItDown으로 파일을 마크다운으로 변환 중입니다...")
                             else:
-                                st.write("📁 1. 파일을 분석 중입니다 (텍스트 추출 + OCR)...")
-                            file_context, _ = core_logic.parse_all_files(
-                                inputs['uploaded_files'],
-                                read_content=True,
-                                api_key=settings['api_key'],
-                                docai_config=docai_config,
-                                template_option=inputs['template_option'],
-                            )
-                            # OCR 텍스트 저장 (다운로드용)
-                            st.session_state[k_ocr] = file_context
-
-                        st.write(f"🤖 2. AI가 [{st.session_state[k_mode]}] 템플릿으로 분석을 시작합니다..")
-
-                        # 생성 모드에 따라 다른 함수 호출
-                        gen_mode = inputs.get('generation_mode', 'single')
-                        if gen_mode == 'chained' and core_chained.is_chained_supported(inputs['template_option']):
-                            part_count = len(core_chained.CHAINED_PARTS.get(inputs['template_option'], []))
-                            st.write(f"🔗 3. {part_count}단계 분할 생성 모드로 문서를 작성합니다..")
-                            stream = core_logic.generate_report_stream_chained(
-                                settings['api_key'], settings['model_name'], inputs, settings['thinking_level'], file_context
-                            )
-                        else:
-                            st.write("🔗 3. 문서를 작성 중입니다 (스트리밍)...")
-                            stream = core_logic.generate_report_stream(
-                                settings['api_key'], settings['model_name'], inputs, settings['thinking_level'], file_context
-                            )
-
-                        full_response = ""
-                        with result_container:
-                            response_placeholder = st.empty()
-                            for chunk in stream:
-                                if chunk.text:
-                                    full_response += chunk.text
-                                    response_placeholder.markdown(full_response + "▌")
-                            response_placeholder.markdown(full_response)
-
-                        status.update(label="✅ 작성이 완료되었습니다", state="complete", expanded=False)
-                        st.session_state[k_text] = full_response
+                                st.write("🔗 3. 문서를 작성 중입니다 (스트리밍)...")
+                                stream = core_logic.generate_report_stream(
+                                    settings['api_key'], settings['model_name'], inputs, settings['thinking_level'], file_context
+                                )
+
+                            full_response = _stream_to_container(stream, result_container, build_docx=not is_rfi_mode)
+
+                            status.update(label="✅ 작성이 완료되었습니다", state="complete", expanded=False)
+                            st.session_state[k_text] = full_response
+                            st.session_state[f"{key_prefix}_prebuild"] = True
                 except Exception as e:
                     st.error(f"생성 중 오류 발생: {e}")
 
-        # 2. 결과 표시
+        # 2. 백그라운드 작업 polling
+        elif st.session_state.get(k_job):
+            with result_container:
+                if hasattr(st, "fragment"):
+                    st.fragment(run_every=JOB_POLL_INTERVAL_SEC)(_render_job)(st.session_state[k_job], k_text, k_job, key_prefix)
+                else:
+                    _render_job(st.session_state[k_job], k_text, k_job, key_prefix)
+                    if st.button("🔄 진행 상황 새로고침", key=f"{key_prefix}_btn_refresh_job"):
+                        st.rerun()
+
+        # 3. 결과 표시
         elif st.session_state[k_text]:
             with result_container:
+                job_error = st.session_state.pop(f"{key_prefix}_job_error", None)
+                if job_error:
+                    st.error(f"생성 중 오류 발생: {job_error}")
+
                 if st.session_state.get(k_copy):
                     st.info("저장 단계에서 복사 버튼을 눌렀어요. (펼쳐진 후 '복사' 버튼 다시 클릭)")
                     st.code(st.session_state[k_text], language="markdown")
@@ -152,7 +282,7 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
                 else:
                     st.markdown(st.session_state[k_text])
 
-        # 3. 하단 액션
+        # 4. 하단 액션
         if st.session_state[k_text]:
             st.markdown("---")
 
@@ -169,31 +299,27 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
                             st.session_state[k_mode] = 'presentation'
                             st.session_state[k_editing] = False
 
-                            with status_placeholder.status("📊 PPT 스타일로 변환 중..", expanded=True) as status:
-                                # PPT 변환 시에도 기존 데이터를 활용함 (파일 다시 읽을 필요 X)
-                                # 하지만 file_context가 필요하므로 다시 파싱 (이미 로컬 캐시되어 빠름)
-                                docai_config = settings.get('docai_config')
-                                file_context, _ = core_logic.parse_all_files(
-                                    inputs['uploaded_files'],
-                                    read_content=True,
-                                    api_key=settings['api_key'],
-                                    docai_config=docai_config,
-                                    template_option=ppt_inputs['template_option'],
-                                )
-                                stream = core_logic.generate_report_stream(
-                                    settings['api_key'], settings['model_name'], ppt_inputs, settings['thinking_level'], file_context
-                                )
-                                full_response = ""
-                                with result_container:
-                                    response_placeholder = st.empty()
-                                    for chunk in stream:
-                                        if chunk.text:
-                                            full_response += chunk.text
-                                            response_placeholder.markdown(full_response + "▌")
-                                    response_placeholder.markdown(full_response)
-                                status.update(label="✅ PPT 변환 완료!", state="complete", expanded=False)
-                                st.session_state[k_text] = full_response
-                                st.rerun()
+                            with utils_trace.run(f"{key_prefix}:presentation") as run_id:
+                                st.session_state[k_trace] = run_id
+                                with status_placeholder.status("📊 PPT 스타일로 변환 중..", expanded=True) as status:
+                                    # 첫 생성 때 파싱한 결과 재사용 (업로드가 바뀐 파일/발표자료용 Word 변환만 새로 파싱)
+                                    docai_config = settings.get('docai_config')
+                                    file_context, _ = core_logic.parse_all_files(
+                                        inputs['uploaded_files'],
+                                        read_content=True,
+                                        api_key=settings['api_key'],
+                                        docai_config=docai_config,
+                                        template_option=ppt_inputs['template_option'],
+                                        context_store=st.session_state[k_sources],
+                                    )
+                                    stream = core_logic.generate_report_stream(
+                                        settings['api_key'], settings['model_name'], ppt_inputs, settings['thinking_level'], file_context
+                                    )
+                                    full_response = _stream_to_container(stream, result_container, build_docx=True)
+                                    status.update(label="✅ PPT 변환 완료!", state="complete", expanded=False)
+                                    st.session_state[k_text] = full_response
+                                    st.session_state[f"{key_prefix}_prebuild"] = True
+                                    st.rerun()
                         except Exception as e:
                             st.error(f"PPT 변환 오류: {e}")
 
@@ -204,10 +330,14 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
                 else:
                     with st.spinner("수정 내용 생성 중.."):
                         try:
-                            refined_text = core_logic.refine_report(
-                                settings['api_key'], settings['model_name'], st.session_state[k_text], refine_query
-                            )
-                            st.session_state[k_text] += f"\n\n--- [추가 요청 반영] ---\n{refined_text}"
+                            with utils_trace.run(f"{key_prefix}:refine") as run_id:
+                                st.session_state[k_trace] = run_id
+                                refined_text = core_logic.refine_report(
+                                    settings['api_key'], settings['model_name'], st.session_state[k_text], refine_query
+                                )
+                            # 관련 섹션만 수정된 전체 문서로 교체
+                            st.session_state[k_text] = refined_text
+                            st.session_state[f"{key_prefix}_prebuild"] = True
                             st.rerun()
                         except Exception as e:
                             st.error(f"수정 오류: {e}")
@@ -218,47 +348,50 @@ def render_output_panel(container, settings, inputs, key_prefix="output"):
             current_mode = st.session_state.get(k_mode, inputs['template_option'])
             fname = utils.generate_filename(inputs['uploaded_files'], current_mode)
 
-            with col_d1:
-                if current_mode == 'rfi':
-                    st.download_button(
-                        "📥 RFI 엑셀 다운로드",
-                        utils.create_excel(st.session_state[k_text]),
-                        fname.replace(".docx", ".xlsx"),
-                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True,
-                        key=f"{key_prefix}_dl_rfi",
+            # 실행 직후 첫 렌더링만 해당 run에 기록 (rerun마다 중복 기록 방지)
+            trace_run_id = st.session_state.get(k_trace)
+            if st.session_state.get(f"{key_prefix}_trace_rendered") == trace_run_id:
+                trace_run_id = None
+            else:
+                st.session_state[f"{key_prefix}_trace_rendered"] = trace_run_id
+            report_text = st.session_state[k_text]
+            with utils_trace.resume(trace_run_id):
+                # 생성/PPT 변환/수정 완료 직후에만 백그라운드에서 생성 (직접 편집 중에는 다운로드 클릭 시 생성)
+                if st.session_state.pop(f"{key_prefix}_prebuild", False):
+                    utils_export.prebuild(
+                        report_text, ('xlsx' if current_mode == 'rfi' else 'docx', 'pptx'),
+                        supersedes=st.session_state.get(f"{key_prefix}_prebuilt_text"),
                     )
-                else:
-                    st.download_button(
-                        "📄 Word 다운로드",
-                        utils.create_docx(st.session_state[k_text]),
-                        fname,
-                        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        use_container_width=True,
-                        key=f"{key_prefix}_dl_word",
+                    st.session_state[f"{key_prefix}_prebuilt_text"] = report_text
+                with col_d1:
+                    if current_mode == 'rfi':
+                        _export_button(
+                            "📥 RFI 엑셀 다운로드", report_text, 'xlsx',
+                            fname.replace(".docx", ".xlsx"), f"{key_prefix}_dl_rfi",
+                        )
+                    else:
+                        _export_button("📄 Word 다운로드", report_text, 'docx', fname, f"{key_prefix}_dl_word")
+
+                with col_d2:
+                    btn_type = "primary" if current_mode == 'presentation' else "secondary"
+                    _export_button(
+                        "📊 PPT 다운로드", report_text, 'pptx',
+                        fname.replace(".docx", ".pptx"), f"{key_prefix}_dl_ppt", type=btn_type,
                     )
 
-            with col_d2:
-                btn_type = "primary" if current_mode == 'presentation' else "secondary"
-                st.download_button(
-                    "📊 PPT 다운로드",
-                    utils_ppt.create_ppt(st.session_state[k_text]),
-                    fname.replace(".docx", ".pptx"),
-                    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                    use_container_width=True,
-                    type=btn_type,
-                    key=f"{key_prefix}_dl_ppt",
-                )
+                with col_d3:
+                    # OCR 텍스트 다운로드 (Document AI 사용 시)
+                    ocr_text = st.session_state.get(k_ocr, "")
+                    if ocr_text:
+                        st.download_button(
+                            "📝 OCR 텍스트 다운로드",
+                            ocr_text,
+                            fname.replace(".docx", "_ocr.txt"),
+                            "text/plain",
+                            use_container_width=True,
+                            key=f"{key_prefix}_dl_ocr",
+                        )
 
-            with col_d3:
-                # OCR 텍스트 다운로드 (Document AI 사용 시)
-                ocr_text = st.session_state.get(k_ocr, "")
-                if ocr_text:
-                    st.download_button(
-                        "📝 OCR 텍스트 다운로드",
-                        ocr_text,
-                        fname.replace(".docx", "_ocr.txt"),
-                        "text/plain",
-                        use_container_width=True,
-                        key=f"{key_prefix}_dl_ocr",
-                    )
+            # 단계별 소요 시간
+            if st.session_state.get(k_trace):
+                _render_trace(st.session_state[k_trace], key_prefix)
@@ -0,0 +1,95 @@
+"""
+스트리밍 출력용 증분 Markdown 렌더러
+- 완성된 블록(빈 줄로 끝난 문단/표, 헤더 줄, 닫힌 코드 블록)은 별도 요소로 한 번만 추가
+- 작성 중인 마지막 블록만 placeholder에서 다시 렌더링
+- 시간/글자 수 기준으로 업데이트를 모아서 반영 (청크마다 전체 문서를 다시 그리지 않음)
+"""
+import time
+
+import streamlit as st
+
+RENDER_INTERVAL_SEC = 0.25
+RENDER_MIN_CHARS = 600
+CURSOR = "▌"
+
+
+def _is_heading(line):
+    stripped = line.lstrip()
+    return stripped.startswith('#') and stripped.lstrip('#').startswith(' ')
+
+
+class StreamRenderer:
+    """
+    Usage:
+        renderer = StreamRenderer()
+        for chunk in stream:
+            renderer.feed(chunk.text)
+        full_text = renderer.close()
+    """
+
+    def __init__(self, interval_sec=RENDER_INTERVAL_SEC, min_chars=RENDER_MIN_CHARS):
+        self.interval_sec = interval_sec
+        self.min_chars = min_chars
+        self._blocks = st.container()   # 완성된 블록 (위쪽에 순서대로 추가)
+        self._tail = st.empty()         # 작성 중인 마지막 블록
+        self._parts = []
+        self._text = ""
+        self._rendered_upto = 0   # _blocks에 이미 추가한 위치
+        self._boundary = 0        # 마지막으로 확정된 블록 경계
+        self._scan_pos = 0        # 다음에 검사할 줄의 시작 위치
+        self._in_code = False
+        self._last_render = 0.0
+        self._pending_chars = 0
+        self.render_count = 0
+
+    @property
+    def text(self):
+        if self._parts:
+            self._text += "".join(self._parts)
+            self._parts = []
+        return self._text
+
+    def _scan(self):
+        """새로 완성된 줄만 검사해 블록 경계 갱신"""
+        text = self.text
+        while True:
+            end = text.find('\n', self._scan_pos)
+            if end < 0:
+                break
+            line = text[self._scan_pos:end]
+            next_pos = end + 1
+            if line.strip().startswith('```'):
+                self._in_code = not self._in_code
+                if not self._in_code:
+                    self._boundary = next_pos
+            elif not self._in_code and (not line.strip() or _is_heading(line)):
+                self._boundary = next_pos
+            self._scan_pos = next_pos
+
+    def feed(self, text):
+        if not text:
+            return
+        self._parts.append(text)
+        self._pending_chars += len(text)
+        if (self._pending_chars >= self.min_chars
+                or time.monotonic() - self._last_render >= self.interval_sec):
+            self._render(cursor=True)
+
+    def _render(self, cursor):
+        self._scan()
+        text = self.text
+        if self._boundary > self._rendered_upto:
+            finished = text[self._rendered_upto:self._boundary].strip('\n')
+            if finished.strip():
+                self._blocks.markdown(finished)
+            self._rendered_upto = self._boundary
+        tail = text[self._rendered_upto:]
+        self._tail.markdown(tail + CURSOR if cursor else tail)
+        self._last_render = time.monotonic()
+        self._pending_chars = 0
+        self.render_count += 1
+
+    def close(self):
+        """남은 내용을 커서 없이 반영하고 전체 텍스트 반환"""
+        self._render(cursor=False)
+        return self.text
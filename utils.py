@@ -2,20 +2,27 @@ import io
 import re
 import os
 import tempfile
+from xml.sax.saxutils import escape as xml_escape
 import pandas as pd
 import fitz  # PyMuPDF
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Inches
 from pptx import Presentation
 from openai import OpenAI
 
+import utils_excel
+import utils_markdown
+import utils_trace
+
 # Gemini Vision OCR 지원 (google-genai 패키지 필요)
 OCR_AVAILABLE = False
 OCR_ERROR_MSG = ""
 
 try:
-    from google import genai
     from google.genai import types
+    import utils_gemini
     OCR_AVAILABLE = True
 except ImportError:
     OCR_ERROR_MSG = "google-genai 패키지가 설치되지 않았습니다"
@@ -74,22 +81,24 @@ def extract_pdf_with_gemini_ocr(doc, api_key, ocr_threshold=50):
     # 2단계: OCR 필요 페이지가 있고 API 키가 있으면 Gemini OCR 수행
     if ocr_pages and api_key and OCR_AVAILABLE:
         try:
-            client = genai.Client(api_key=api_key)
-
             for page_num, img_bytes, original_text in ocr_pages:
                 try:
-                    # Gemini Vision API 호출
-                    response = client.models.generate_content(
-                        model="gemini-2.0-flash-exp",
-                        contents=[
-                            types.Part.from_bytes(data=img_bytes, mime_type="image/png"),
-                            "이 이미지에서 모든 텍스트를 추출해주세요. 원본 레이아웃을 최대한 유지하고, 텍스트만 반환해주세요. 추가 설명 없이 텍스트만 출력하세요."
-                        ],
-                        config=types.GenerateContentConfig(
-                            max_output_tokens=4096,
-                            temperature=0.1
+                    # Gemini Vision API 호출 (백그라운드 우선순위)
+                    with utils_trace.span("ocr.page", page=page_num + 1):
+                        response = utils_gemini.generate_content(
+                            api_key,
+                            "gemini-2.0-flash-exp",
+                            [
+                                types.Part.from_bytes(data=img_bytes, mime_type="image/png"),
+                                "이 이미지에서 모든 텍스트를 추출해주세요. 원본 레이아웃을 최대한 유지하고, 텍스트만 반환해주세요. 추가 설명 없이 텍스트만 출력하세요."
+                            ],
+                            config=types.GenerateContentConfig(
+                                max_output_tokens=4096,
+                                temperature=0.1
+                            ),
+                            priority=utils_gemini.PRIORITY_BACKGROUND,
+                            cache=True,
                         )
-                    )
 
                     ocr_text = response.text.strip() if response.text else ""
 
@@ -181,6 +190,16 @@ def _docx_to_ppt_markdown(doc: Document, filename: str) -> str:
 
 
 def parse_uploaded_file(uploaded_file, api_key=None, docai_config=None, template_option=None):
+    """parse_uploaded_file 본체를 파일 단위 span으로 감쌈 (사용된 파서는 parser 속성에 기록)"""
+    if uploaded_file is None:
+        return ""
+    with utils_trace.span("parse.file", file=uploaded_file.name, size=getattr(uploaded_file, 'size', 0) or 0) as span:
+        text = _parse_uploaded_file(uploaded_file, api_key, docai_config, template_option)
+        span.set(chars=len(text))
+        return text
+
+
+def _parse_uploaded_file(uploaded_file, api_key=None, docai_config=None, template_option=None):
     """파일 형태별 텍스트 추출 (전체 시트 지원 + OCR 지원)
 
     Args:
@@ -204,17 +223,20 @@ def parse_uploaded_file(uploaded_file, api_key=None, docai_config=None, template
             file_bytes = uploaded_file.read()
             mime_type = utils_docai.get_mime_type(uploaded_file.name)
 
-            ocr_result = utils_docai.process_document(
-                file_bytes=file_bytes,
-                mime_type=mime_type,
-                project_id=docai_config['project_id'],
-                location=docai_config.get('location', 'us'),
-                processor_id=docai_config['processor_id'],
-                credentials_json=docai_config.get('credentials_json')
-            )
+            with utils_trace.span("parse.docai", file=uploaded_file.name):
+                ocr_result = utils_docai.process_document(
+                    file_bytes=file_bytes,
+                    mime_type=mime_type,
+                    project_id=docai_config['project_id'],
+                    location=docai_config.get('location', 'us'),
+                    processor_id=docai_config['processor_id'],
+                    credentials_json=docai_config.get('credentials_json'),
+                    gcs_uri=docai_config.get('gcs_uri')
+                )
 
             uploaded_file.seek(0)
             if ocr_result and ocr_result.get('text'):
+                utils_trace.annotate(parser="docai")
                 return f"### [파일명: {uploaded_file.name} (Document AI OCR)]\n{ocr_result['text']}\n\n"
         except Exception as e:
             uploaded_file.seek(0)
@@ -232,9 +254,11 @@ def parse_uploaded_file(uploaded_file, api_key=None, docai_config=None, template
             uploaded_file.seek(0)
 
             try:
-                md = MarkItDown()
-                result = md.convert(tmp_path)
+                with utils_trace.span("parse.markitdown", file=uploaded_file.name):
+                    md = MarkItDown()
+                    result = md.convert(tmp_path)
                 if result and result.text_content:
+                    utils_trace.annotate(parser="markitdown")
                     return f"### [파일명: {uploaded_file.name} (MarkItDown)]\n{result.text_content}\n\n"
             finally:
                 if os.path.exists(tmp_path):
@@ -245,6 +269,7 @@ def parse_uploaded_file(uploaded_file, api_key=None, docai_config=None, template
 
     file_type = uploaded_file.name.split('.')[-1].lower()
     text_content = ""
+    utils_trace.annotate(parser=f"native:{file_type}")
 
     try:
         # [PDF] PyMuPDF + Gemini Vision OCR
@@ -344,7 +369,14 @@ def generate_filename(uploaded_files, template_option):
         project_name = re.sub(r'[\\/*?:"<>|]', "", base_name).strip()
     return f"{project_name}_{suffix}.docx"
 
-def add_list_paragraph(doc, content, level, is_bullet=True):
+def _add_runs(p, runs):
+    """굵게 구간(utils_markdown.bold_runs)을 run으로 추가"""
+    for text, bold in runs:
+        run = p.add_run(text)
+        if bold:
+            run.bold = True
+
+def add_list_paragraph(doc, content, level, is_bullet=True, runs=None):
     """들여쓰기가 적용된 리스트 아이템 추가
 
     Args:
@@ -352,6 +384,7 @@ def add_list_paragraph(doc, content, level, is_bullet=True):
         content: 텍스트 내용
         level: 들여쓰기 레벨 (0부터 시작)
         is_bullet: True면 불릿, False면 번호
+        runs: 미리 분리한 굵게 구간 (없으면 content에서 분리)
     """
 
     # Bullet characters by level (fallback to simple ASCII bullets)
@@ -372,132 +405,112 @@ def add_list_paragraph(doc, content, level, is_bullet=True):
         p.add_run(f"• ")  # 번호 리스트도 일단 불릿으로
 
     # 내용 추가 (볼드 처리 포함)
-    parts = re.split(r'(\*\*.*?\*\*)', content)
-    for part in parts:
-        if part.startswith('**') and part.endswith('**'):
-            run = p.add_run(part[2:-2])
-            run.bold = True
-        else:
-            p.add_run(part)
+    _add_runs(p, runs if runs is not None else utils_markdown.bold_runs(content))
 
     return p
 
-def create_docx(markdown_text):
-    doc = Document()
-    lines = markdown_text.split('\n')
-    i = 0
-
-    # 로마 숫자 헤더 패턴 (I., II., III., IV., V., VI., VII., VIII.)
-    roman_header_pattern = re.compile(r'^(I{1,3}|IV|VI{0,3}|V|IX|X)\.\s+(.+)$')
-
-    # 리스트 level 추적 (들여쓰기 상속)
-    indent_stack = [0]  # 각 level의 들여쓰기 칸 수
-
-    while i < len(lines):
-        raw_line = lines[i]
-        line = raw_line.strip()
-
-        # Markdown 헤더 처리 (#### 추가)
-        if line.startswith('##### '):
-            doc.add_heading(line.replace('##### ', ''), level=5)
-            indent_stack = [0]  # 리스트 상속 리셋
-            i += 1
-        elif line.startswith('#### '):
-            doc.add_heading(line.replace('#### ', ''), level=4)
-            indent_stack = [0]
-            i += 1
-        elif line.startswith('### '):
-            doc.add_heading(line.replace('### ', ''), level=3)
-            indent_stack = [0]
-            i += 1
-        elif line.startswith('## '):
-            doc.add_heading(line.replace('## ', ''), level=2)
-            indent_stack = [0]
-            i += 1
-        elif line.startswith('# '):
-            doc.add_heading(line.replace('# ', ''), level=1)
-            indent_stack = [0]
-            i += 1
-        # 로마 숫자 헤더 처리 (I. Executive Summary 등)
-        elif roman_header_pattern.match(line):
-            doc.add_heading(line, level=1)
-            indent_stack = [0]
-            i += 1
-        elif line.startswith('|'):
-            table_lines = []
-            while i < len(lines) and lines[i].strip().startswith('|'):
-                table_lines.append(lines[i].strip())
-                i += 1
-            if len(table_lines) >= 2:
-                headers = [c.strip() for c in table_lines[0].split('|') if c.strip()]
-                data_rows = []
-                for row_line in table_lines[1:]:
-                    if '---' in row_line: continue
-                    parts = row_line.split('|')
-                    if len(parts) >= 2: data_rows.append([c.strip() for c in parts[1:-1]])
-                if headers:
-                    table = doc.add_table(rows=1, cols=len(headers))
-                    table.style = 'Table Grid'
-                    for idx, text in enumerate(headers):
-                        if idx < len(table.rows[0].cells):
-                            cell = table.rows[0].cells[idx]
-                            cell.text = text
-                            cell.paragraphs[0].runs[0].bold = True
-                    for row_data in data_rows:
-                        row_cells = table.add_row().cells
-                        for idx, text in enumerate(row_data):
-                            if idx < len(row_cells): row_cells[idx].text = text.replace('**', '')
-            indent_stack = [0]
-        elif re.match(r'^\s*([-*]|\d+\.)\s', raw_line):
-            match = re.match(r'^(\s*)([-*]|\d+\.)\s+(.*)', raw_line)
-            if match:
-                indent_str, marker, content = match.groups()
-                spaces = indent_str.replace('\t', '    ')  # 탭을 4칸으로
-                indent_len = len(spaces)
-
-                # 들여쓰기 기반 level 계산 (시작점으로 1, 2, 3...)
-                if indent_len == 0:
-                    level = 0
-                    indent_stack = [0]
-                elif indent_len > indent_stack[-1]:
-                    # 들여쓰기 증가 시 level 증가
-                    level = len(indent_stack)
-                    indent_stack.append(indent_len)
-                else:
-                    # 들여쓰기 감소 또는 유지 시 해당 level 찾기
-                    while len(indent_stack) > 1 and indent_stack[-1] > indent_len:
-                        indent_stack.pop()
-                    level = len(indent_stack) - 1
-
-                if level > 8: level = 8
-                is_bullet = marker in ['-', '*']
-                add_list_paragraph(doc, content, level, is_bullet)
-            i += 1
-        else:
-            if line:
-                p = doc.add_paragraph()
-                parts = re.split(r'(\*\*.*?\*\*)', line)
-                for part in parts:
-                    if part.startswith('**') and part.endswith('**'):
-                        run = p.add_run(part[2:-2])
-                        run.bold = True
-                    else: p.add_run(part)
-            i += 1
+_XML_INVALID_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EMU_PER_TWIP = 635
+
+def _table_cell_xml(text, width, bold):
+    text = _XML_INVALID_PATTERN.sub('', text)
+    if not text:
+        return f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr><w:p/></w:tc>'
+    rpr = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    return (f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+            f'<w:p><w:r>{rpr}<w:t xml:space="preserve">{xml_escape(text)}</w:t></w:r></w:p></w:tc>')
+
+def _add_table(doc, rows):
+    """표 XML을 한 번에 생성해 본문에 추가 (행/셀마다 python-docx 객체를 만들지 않음)
+
+    'Table Grid' 스타일, 열 너비 균등 분할, 헤더 행 굵게 (doc.add_table + cell.text와 같은 구조)
+    """
+    cols = len(rows[0])
+    section = doc.sections[-1]
+    block_width = section.page_width - section.left_margin - section.right_margin
+    width = int(block_width / cols / _EMU_PER_TWIP)
+    style_id = doc.styles['Table Grid'].style_id
+
+    parts = [
+        f'<w:tbl {nsdecls("w")}><w:tblPr><w:tblStyle w:val="{style_id}"/><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+        '</w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{width}"/>' * cols,
+        '</w:tblGrid>',
+    ]
+    for row_idx, row in enumerate(rows):
+        cells = (list(row) + [''] * cols)[:cols]
+        parts.append('<w:tr>')
+        parts.extend(_table_cell_xml(text.replace('**', ''), width, row_idx == 0) for text in cells)
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+
+    tbl = parse_xml(''.join(parts))
+    doc.element.body._insert_tbl(tbl)
+    return tbl
+
+def _render_docx_block(doc, block):
+    kind = block['type']
+    if kind == 'heading':
+        # 로마 숫자 헤더(I. Executive Summary 등)는 level 1
+        doc.add_heading(block['text'], level=block['level'])
+    elif kind == 'table':
+        if len(block['rows']) >= 2:
+            _add_table(doc, block['rows'])
+    elif kind == 'list_item':
+        add_list_paragraph(doc, block['text'], block['level'], not block['ordered'], runs=block['runs'])
+    elif kind == 'paragraph':
+        _add_runs(doc.add_paragraph(), block['runs'])
+
+def _save_docx(doc):
     bio = io.BytesIO()
     doc.save(bio)
     return bio.getvalue()
 
+@utils_trace.traced("render.docx")
+def create_docx(markdown_text):
+    doc = Document()
+    for block in utils_markdown.parse(markdown_text):
+        _render_docx_block(doc, block)
+    return _save_docx(doc)
+
+class DocxBuilder:
+    """
+    스트리밍 중 Word 문서 증분 생성 (create_docx와 같은 결과)
+
+    Usage:
+        builder = DocxBuilder()
+        for chunk in stream:
+            builder.feed(chunk.text)
+        docx_bytes = builder.finish()
+    """
+
+    def __init__(self):
+        self.doc = Document()
+        self._parser = utils_markdown.BlockParser()
+        self._partial = ""  # 아직 줄바꿈이 오지 않은 마지막 줄
+
+    def _render(self, blocks):
+        for block in blocks:
+            _render_docx_block(self.doc, block)
+
+    def feed(self, text):
+        """완성된 줄만 파싱해 문서에 추가"""
+        if not text:
+            return
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._render(self._parser.feed_line(line))
+
+    def finish(self):
+        with utils_trace.span("render.docx", streamed=True):
+            self._render(self._parser.feed_line(self._partial))
+            self._partial = ""
+            self._render(self._parser.close())
+            return _save_docx(self.doc)
+
+@utils_trace.traced("render.xlsx")
 def create_excel(markdown_text):
-    data = []
-    lines = markdown_text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if line.startswith('|') and '---' not in line:
-            row = [c.strip().replace('**', '') for c in line.split('|')[1:-1]]
-            if row: data.append(row)
-    bio = io.BytesIO()
-    if data:
-        df = pd.DataFrame(data[1:], columns=data[0])
-        with pd.ExcelWriter(bio, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='RFI_List')
-    return bio.getvalue()
+    # 표마다 별도 시트, 숫자/날짜 열 형식 지정 (utils_excel)
+    return utils_excel.create_excel(markdown_text)
@@ -14,6 +14,8 @@ from typing import List, Optional, Dict, Any, Tuple, Iterator
 
 from openai import OpenAI
 
+import utils_ratelimit
+
 # Gemini 지원을 위한 선택적 import
 try:
     import google.generativeai as genai
@@ -272,7 +274,10 @@ def _transcribe_gemini(
         try:
             # ??? ???????????
             dur_prompt = "??????????????? ??? ?????'??seconds)' ??????????? ???????? ??? ??? ????????????? (?? 1234.5)"
-            dur_resp = gemini_model.generate_content([dur_prompt, uploaded_file])
+            dur_resp = utils_ratelimit.call_with_backoff(
+                lambda: gemini_model.generate_content([dur_prompt, uploaded_file]),
+                api_key, model, utils_ratelimit.PRIORITY_BACKGROUND,
+            )
             # ??? ???
             nums = re.findall(r"[-+]?\d*\.\d+|\d+", dur_resp.text)
             if nums:
@@ -281,7 +286,7 @@ def _transcribe_gemini(
             pass # ??? ????? ????????
 
     # 2. 배치 처리 (15분(900초) 초과 시 10분 단위 논리적 분할)
-        if total_duration > batch_threshold_sec:
+    if total_duration > batch_threshold_sec:
         current_pos = 0.0
         
         while current_pos < total_duration:
@@ -312,14 +317,16 @@ def _transcribe_gemini(
             batch_prompt += "\n\n결과만 출력하세요."
             
             try:
-                resp = gemini_model.generate_content([batch_prompt, uploaded_file])
+                resp = utils_ratelimit.call_with_backoff(
+                    lambda: gemini_model.generate_content([batch_prompt, uploaded_file]),
+                    api_key, model, utils_ratelimit.PRIORITY_BACKGROUND,
+                )
                 if resp.text:
                     yield resp.text.strip()
             except Exception as e:
                 yield f"[{t_start_str}~{t_end_str} 처리 중 오류: {str(e)}]"
             
             current_pos += batch_size_sec
-            time.sleep(2) # Rate limit 완화
             
         try:
             uploaded_file.delete()
@@ -353,7 +360,10 @@ def _transcribe_gemini(
 
     try:
         # API 호출 (파일 객체 전달)
-        response = gemini_model.generate_content([prompt, uploaded_file])
+        response = utils_ratelimit.call_with_backoff(
+            lambda: gemini_model.generate_content([prompt, uploaded_file]),
+            api_key, model, utils_ratelimit.PRIORITY_BACKGROUND,
+        )
         yield response.text.strip()
     finally:
         # 파일 삭제 (리소스 정리)
@@ -613,7 +623,10 @@ def _gpt_postprocess(
             model_name=model,
             system_instruction=instruction
         )
-        response = gemini_model.generate_content(raw_text)
+        response = utils_ratelimit.call_with_backoff(
+            lambda: gemini_model.generate_content(raw_text),
+            api_key, model, utils_ratelimit.PRIORITY_INTERACTIVE,
+        )
         return response.text.strip()
 
     # OpenAI 모델 사용 (기본)
@@ -0,0 +1,158 @@
+"""
+LLM 응답 디스크 캐시
+- 저온도(temperature ≤ 0.1) 유틸리티 호출(구조 추출, RFI 인덱싱, Gemini OCR) 결과 재사용
+- 키: 모델 + config + 프롬프트 해시 (이미지 등 바이너리 입력 포함)
+- TTL 만료 및 전체 용량 초과 시 오래된 항목부터 삭제(LRU)
+- GEM_CACHE=0 또는 ENABLED = False로 끄기 (벤치마크 등 매 호출을 실제로 수행해야 할 때)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+ENABLED = os.getenv("GEM_CACHE", "1") != "0"
+CACHE_DIR = os.getenv("GEM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gem_intern", "llm"))
+DEFAULT_TTL_SEC = 7 * 24 * 3600
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+EVICT_EVERY_WRITES = 50  # 매 저장마다 디렉터리를 훑지 않도록 주기적으로만 용량 점검
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+
+def _update_hash(h, value):
+    """contents(str / bytes / Part / list)를 해시에 반영"""
+    if value is None:
+        h.update(b"\x00")
+    elif isinstance(value, bytes):
+        h.update(value)
+    elif isinstance(value, str):
+        h.update(value.encode("utf-8"))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            h.update(b"\x1e")
+            _update_hash(h, item)
+    elif hasattr(value, "model_dump"):
+        # google.genai.types.Part / Content 등 (inline_data 바이트 포함)
+        dumped = value.model_dump(exclude_none=True)
+        inline = dumped.get("inline_data") if isinstance(dumped, dict) else None
+        if inline and isinstance(inline.get("data"), bytes):
+            h.update(inline["data"])
+            inline = dict(inline, data=None)
+            dumped = dict(dumped, inline_data=inline)
+        h.update(json.dumps(dumped, sort_keys=True, default=str).encode("utf-8"))
+    else:
+        h.update(repr(value).encode("utf-8"))
+
+
+def make_key(model, config, contents):
+    """모델 + config + 프롬프트 해시로 캐시 키 생성"""
+    h = hashlib.sha256()
+    h.update(str(model).encode("utf-8"))
+    h.update(b"\x1f")
+    if config is not None and hasattr(config, "model_dump"):
+        config = config.model_dump(exclude_none=True)
+    h.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    h.update(b"\x1f")
+    _update_hash(h, contents)
+    return h.hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+
+def get(key, ttl_sec=DEFAULT_TTL_SEC):
+    """캐시 조회 (없거나 만료 시 None)"""
+    if not ENABLED:
+        return None
+    path = _path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        _stats['misses'] += 1
+        return None
+
+    if time.time() - entry.get("created", 0) > ttl_sec:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        _stats['misses'] += 1
+        return None
+
+    # LRU 판단용 접근 시각 갱신
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    _stats['hits'] += 1
+    return entry.get("text")
+
+
+def put(key, text):
+    """캐시 저장 (원자적 쓰기) 후 용량 초과 시 정리"""
+    if not text or not ENABLED:
+        return
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        _stats['writes'] += 1
+    except OSError:
+        return
+    if _stats['writes'] % EVICT_EVERY_WRITES == 0:
+        evict()
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """전체 용량이 max_bytes를 넘으면 마지막 접근이 오래된 항목부터 삭제"""
+    with _lock:
+        entries = []
+        total = 0
+        for root, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        if total <= max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            _stats['evictions'] += 1
+            if total <= max_bytes:
+                break
+
+
+def clear():
+    """캐시 전체 삭제"""
+    with _lock:
+        for root, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                try:
+                    os.unlink(os.path.join(root, name))
+                except OSError:
+                    pass
+
+
+def get_cache_stats():
+    return dict(_stats)
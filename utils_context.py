@@ -0,0 +1,81 @@
+"""
+세션 단위 원본 파일 컨텍스트 저장소
+- 첫 생성 때 파싱(Document AI/OCR/MarkItDown)한 파일별 결과를 보관 → PPT 변환 등 후속 작업에서 재사용
+- 파일 내용 해시 + 파싱 방식 기준으로 저장 (같은 파일이라도 파싱 결과가 달라지는 조건이면 따로 보관)
+- 업로드 목록이 바뀌면 더 이상 없는 파일의 결과만 제거
+- 백그라운드 작업 워커와 UI 스레드에서 함께 사용 가능 (같은 파일은 한 번만 파싱)
+"""
+import hashlib
+import threading
+
+import utils
+import utils_trace
+
+_PPT_NATIVE_TYPES = ("docx", "doc")  # 발표자료 모드에서 별도 변환 로직을 쓰는 형식 (utils._parse_uploaded_file)
+
+
+def file_digest(uploaded_file):
+    uploaded_file.seek(0)
+    digest = hashlib.sha256(uploaded_file.read()).hexdigest()
+    uploaded_file.seek(0)
+    return digest
+
+
+class SourceContextStore:
+    def __init__(self):
+        self._parsed = {}      # (digest, name, mode) -> 파싱 텍스트
+        self._digests = set()  # 현재 업로드 목록의 파일 해시
+        self._lock = threading.Lock()
+        self._key_locks = {}   # 파싱 중인 key -> Lock (동시 요청은 먼저 시작한 파싱 결과를 기다림)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _mode(filename, api_key, docai_config, template_option):
+        ext = filename.rsplit('.', 1)[-1].lower()
+        ppt = template_option == "presentation" and ext in _PPT_NATIVE_TYPES
+        return bool(docai_config), bool(api_key), ppt
+
+    def sync(self, uploaded_files):
+        """업로드 목록 반영 (바뀐 경우에만 빠진 파일 결과 제거)"""
+        digests = {file_digest(f) for f in (uploaded_files or [])}
+        with self._lock:
+            if digests != self._digests:
+                self._parsed = {key: text for key, text in self._parsed.items() if key[0] in digests}
+                self._digests = digests
+
+    def parse(self, uploaded_file, api_key=None, docai_config=None, template_option=None):
+        """저장된 결과가 있으면 재사용, 없으면 utils.parse_uploaded_file로 파싱 후 저장"""
+        digest = file_digest(uploaded_file)
+        key = (digest, uploaded_file.name, self._mode(uploaded_file.name, api_key, docai_config, template_option))
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                text = self._parsed.get(key)
+                if text is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if text is not None:
+                utils_trace.annotate(reused=self.hits)
+                return text
+            try:
+                text = utils.parse_uploaded_file(
+                    uploaded_file,
+                    api_key=api_key,
+                    docai_config=docai_config,
+                    template_option=template_option,
+                )
+                with self._lock:
+                    self._parsed[key] = text
+                    self._digests.add(digest)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._parsed.clear()
+            self._digests = set()
@@ -1,22 +1,70 @@
 """
 Google Document AI OCR 유틸리티
 - 기본 OCR 처리
+- 긴 PDF는 부분 PDF로 나눠 동시 처리 후 페이지 순서대로 병합
+- 매우 긴 PDF는 일괄 처리(장기 실행 작업) 1건으로 제출 후 완료된 샤드부터 순서대로 수신
+  (환경 변수 DOCAI_GCS_URI=gs://bucket/prefix 설정 시 사용, google-cloud-storage 필요)
 - Searchable PDF 생성 (PyMuPDF 사용)
 """
+import abc
+import contextvars
 import io
+import re
 import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 import fitz  # PyMuPDF
+from google.api_core import exceptions as api_exceptions
 from google.cloud import documentai_v1 as documentai
 from google.oauth2 import service_account
 
+STORAGE_AVAILABLE = False
+try:
+    from google.cloud import storage
+    STORAGE_AVAILABLE = True
+except ImportError:
+    pass
+
+import utils_trace
+
+BATCH_SIZE = 15  # Document AI 온라인 처리 제한(보통 15~30페이지)
+BATCH_WORKERS = int(os.getenv("GEM_DOCAI_WORKERS", "4"))  # 부분 PDF 동시 처리 수
+BATCH_MAX_RETRIES = 2
+BATCH_RETRY_BACKOFF_SEC = 1.0
+# 재시도할 일시적 오류 (InvalidArgument/PermissionDenied 등은 즉시 실패)
+TRANSIENT_ERRORS = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.InternalServerError,
+)
+LRO_MIN_PAGES = int(os.getenv("GEM_DOCAI_LRO_MIN_PAGES", "60"))  # 이 페이지 수 초과 시 일괄 처리 작업 사용
+LRO_POLL_SEC = 3.0
+LRO_TIMEOUT_SEC = 1800
+
+_SHARD_SUFFIX_PATTERN = re.compile(r'-(\d+)\.json$')
+
+_batch_backend_factory = None  # 오프라인 테스트용 대체 생성 함수 (fake_docai.install)
+
+
+class DocAIBatchError(Exception):
+    """일괄 처리 작업 실패 (작업 오류, 샤드 누락, 시간 초과)"""
+
+
+def _credentials(credentials_json=None):
+    if not credentials_json:
+        return None
+    import json
+    credentials_dict = json.loads(credentials_json)
+    return service_account.Credentials.from_service_account_info(credentials_dict)
+
 
 def get_client(credentials_json=None):
     """Document AI 클라이언트 생성"""
     if credentials_json:
-        import json
-        credentials_dict = json.loads(credentials_json)
-        credentials = service_account.Credentials.from_service_account_info(credentials_dict)
-        return documentai.DocumentProcessorServiceClient(credentials=credentials)
+        return documentai.DocumentProcessorServiceClient(credentials=_credentials(credentials_json))
     else:
         return documentai.DocumentProcessorServiceClient()
 
@@ -43,10 +91,305 @@ def get_supported_extensions():
     return ['pdf', 'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'tif', 'webp']
 
 
-def process_document(file_bytes, mime_type, project_id, location, processor_id, credentials_json=None):
+def _pages_info(document, start_page=0, text_offset=0):
+    """
+    Document → 페이지별 정보 목록
+
+    page_num = start_page + page.page_number (부분 PDF는 부분 기준 번호라 시작 페이지를 더함,
+    일괄 처리 샤드는 전체 기준 번호라 start_page=0)
+    text_offset: 샤드의 텍스트 앵커가 전체 문서 텍스트 기준일 때 샤드 텍스트 시작 위치
+    """
+    pages_info = []
+    for i, page in enumerate(document.pages or []):
+        page_data = {
+            'page_num': start_page + (page.page_number or i + 1),
+            'text': extract_page_text(page, document.text, text_offset),
+            'width': page.dimension.width if page.dimension else 0,
+            'height': page.dimension.height if page.dimension else 0,
+            'blocks': []
+        }
+        _extract_blocks(page, document.text, page_data, text_offset)
+        pages_info.append(page_data)
+    return pages_info
+
+
+def _split_pdf(file_bytes, batch_size):
+    """PDF → [(시작 페이지 index, 부분 PDF bytes)] (batch_size 이하면 1개)"""
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        num_pages = len(doc)
+        if num_pages <= batch_size:
+            return [(0, file_bytes)]
+        batches = []
+        for start_page in range(0, num_pages, batch_size):
+            end_page = min(start_page + batch_size, num_pages)
+            sub_doc = fitz.open()
+            sub_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
+            batches.append((start_page, sub_doc.tobytes()))
+            sub_doc.close()
+        return batches
+
+
+def _process_batch(client, processor_name, start_page, sub_bytes, mime_type):
+    """부분 PDF 1개 처리 (일시적 오류 시 이 배치만 재시도)"""
+    for attempt in range(BATCH_MAX_RETRIES + 1):
+        try:
+            with utils_trace.span("docai.batch", start_page=start_page + 1, retries=attempt):
+                request = documentai.ProcessRequest(
+                    name=processor_name,
+                    raw_document=documentai.RawDocument(content=sub_bytes, mime_type=mime_type),
+                )
+                return client.process_document(request=request).document
+        except TRANSIENT_ERRORS:
+            if attempt >= BATCH_MAX_RETRIES:
+                raise
+            time.sleep(BATCH_RETRY_BACKOFF_SEC * (2 ** attempt))
+
+
+def _process_batches(client, processor_name, batches, mime_type):
+    """
+    부분 PDF들을 동시에 처리한 뒤 페이지 순서대로 병합
+
+    반환 형식은 순차 처리와 동일 (전체 페이지 기준 page_num, 배치 텍스트를 줄바꿈으로 연결)
+    """
+    workers = max(1, min(BATCH_WORKERS, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gem-docai") as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, _process_batch, client, processor_name, start_page, sub_bytes, mime_type)
+            for start_page, sub_bytes in batches
+        ]
+        documents = [future.result() for future in futures]
+
+    merged_text = ""
+    merged_pages_info = []
+    for (start_page, _), chunk_document in zip(batches, documents):
+        # 텍스트 병합
+        if chunk_document.text:
+            merged_text += chunk_document.text + "\n"
+
+        # 페이지 정보 추출
+        merged_pages_info.extend(_pages_info(chunk_document, start_page))
+
+    return {
+        'text': merged_text,
+        'pages': merged_pages_info,
+        'raw_document': None  # 분할 처리 시 원본 객체 없음
+    }
+
+
+class BatchBackend(abc.ABC):
+    """
+    Document AI 일괄 처리(장기 실행 작업) 백엔드 인터페이스
+
+    실제 구현은 GcsBatchBackend, 오프라인 테스트용 구현은 fake_docai.FakeBatchBackend.
+    샤드 = pages_per_shard 페이지 단위로 나뉜 결과 Document (shard_info.shard_index 순서)
+    """
+
+    @abc.abstractmethod
+    def submit(self, file_bytes, mime_type):
+        """문서 전체를 작업 1건으로 제출 → 작업 ID"""
+
+    @abc.abstractmethod
+    def poll(self, operation_id):
+        """작업 상태 → (완료 여부, 오류 메시지 또는 None)"""
+
+    @abc.abstractmethod
+    def ready_shards(self, operation_id):
+        """현재까지 기록된 결과 샤드 이름 목록"""
+
+    @abc.abstractmethod
+    def read_shard(self, operation_id, shard_name):
+        """결과 샤드 → Document"""
+
+    def cleanup(self, operation_id):
+        """작업 입력/결과 정리"""
+
+
+class GcsBatchBackend(BatchBackend):
+    """batch_process_documents + GCS 입출력 (gcs_uri 아래 작업별 폴더 사용 후 삭제)"""
+
+    def __init__(self, client, processor_name, gcs_uri, credentials_json=None, pages_per_shard=BATCH_SIZE):
+        if not STORAGE_AVAILABLE:
+            raise ImportError("일괄 처리 모드에는 google-cloud-storage 패키지가 필요합니다.")
+        bucket_name, _, prefix = gcs_uri.replace("gs://", "", 1).partition("/")
+        credentials = _credentials(credentials_json)
+        if credentials is not None:
+            storage_client = storage.Client(project=credentials.project_id, credentials=credentials)
+        else:
+            storage_client = storage.Client()
+        self.client = client
+        self.processor_name = processor_name
+        self.bucket = storage_client.bucket(bucket_name)
+        self.prefix = prefix.strip("/")
+        self.pages_per_shard = pages_per_shard
+        self._operations = {}  # 작업 ID → google.api_core Operation
+
+    def _folder(self, operation_id):
+        return f"{self.prefix}/{operation_id}" if self.prefix else operation_id
+
+    def submit(self, file_bytes, mime_type):
+        operation_id = uuid.uuid4().hex
+        folder = self._folder(operation_id)
+        self.bucket.blob(f"{folder}/input").upload_from_string(file_bytes, content_type=mime_type)
+
+        output_config = documentai.DocumentOutputConfig.GcsOutputConfig(
+            gcs_uri=f"gs://{self.bucket.name}/{folder}/output/",
+            sharding_config=documentai.DocumentOutputConfig.GcsOutputConfig.ShardingConfig(
+                pages_per_shard=self.pages_per_shard
+            ),
+        )
+        request = documentai.BatchProcessRequest(
+            name=self.processor_name,
+            input_documents=documentai.BatchDocumentsInputConfig(
+                gcs_documents=documentai.GcsDocuments(documents=[
+                    documentai.GcsDocument(gcs_uri=f"gs://{self.bucket.name}/{folder}/input", mime_type=mime_type)
+                ])
+            ),
+            document_output_config=documentai.DocumentOutputConfig(gcs_output_config=output_config),
+        )
+        self._operations[operation_id] = self.client.batch_process_documents(request=request)
+        return operation_id
+
+    def poll(self, operation_id):
+        operation = self._operations[operation_id]
+        if not operation.done():
+            return False, None
+        error = operation.exception()
+        return True, (str(error) if error else None)
+
+    def ready_shards(self, operation_id):
+        blobs = self.bucket.list_blobs(prefix=f"{self._folder(operation_id)}/output/")
+        return sorted((blob.name for blob in blobs if blob.name.endswith(".json")), key=_shard_number)
+
+    def read_shard(self, operation_id, shard_name):
+        payload = self.bucket.blob(shard_name).download_as_bytes()
+        return documentai.Document.from_json(payload, ignore_unknown_fields=True)
+
+    def cleanup(self, operation_id):
+        self._operations.pop(operation_id, None)
+        for blob in self.bucket.list_blobs(prefix=f"{self._folder(operation_id)}/"):
+            blob.delete()
+
+
+def set_batch_backend_factory(factory):
+    """
+    일괄 처리 백엔드 생성 함수 교체 (None이면 gcs_uri가 있을 때 GcsBatchBackend)
+
+    factory(processor_name, gcs_uri, credentials_json) → BatchBackend
+    """
+    global _batch_backend_factory
+    _batch_backend_factory = factory
+
+
+def _batch_backend(processor_name, gcs_uri, credentials_json):
+    if _batch_backend_factory is not None:
+        return _batch_backend_factory(processor_name, gcs_uri, credentials_json)
+    if gcs_uri:
+        return GcsBatchBackend(get_client(credentials_json), processor_name, gcs_uri, credentials_json)
+    return None
+
+
+def _shard_number(shard_name):
+    """샤드 파일 이름의 숫자 접미사 (document-10.json → 10, 샤드 1개라 접미사가 없으면 0)"""
+    m = _SHARD_SUFFIX_PATTERN.search(shard_name)
+    return int(m.group(1)) if m else 0
+
+
+def _shard_index(document, shard_name):
+    info = getattr(document, 'shard_info', None)
+    if info is not None and info.shard_count:
+        return int(info.shard_index)
+    return _shard_number(shard_name)
+
+
+def iter_batch_results(backend, file_bytes, mime_type, poll_interval=None, timeout=None):
+    """
+    문서 전체를 일괄 처리 작업 1건으로 제출하고, 결과 샤드가 기록되는 대로 페이지 순서에 맞춰 반환
+
+    Yields:
+        dict: {'text': 샤드 텍스트, 'pages': 페이지별 정보 (전체 페이지 기준 page_num)}
+
+    Raises:
+        DocAIBatchError: 작업 실패, 완료 후 샤드 누락, 시간 초과
+    """
+    poll_interval = LRO_POLL_SEC if poll_interval is None else poll_interval
+    timeout = LRO_TIMEOUT_SEC if timeout is None else timeout
+    operation_id = backend.submit(file_bytes, mime_type)
+    try:
+        seen = set()
+        buffered = {}  # shard_index → Document (앞 샤드 대기 중)
+        next_index = 0
+        deadline = time.monotonic() + timeout
+        while True:
+            # 완료 여부를 먼저 확인해야 완료 직후 목록에 마지막 샤드까지 포함됨
+            done, error = backend.poll(operation_id)
+            if error:
+                raise DocAIBatchError(f"Document AI 일괄 처리 실패: {error}")
+
+            for name in backend.ready_shards(operation_id):
+                if name in seen:
+                    continue
+                document = backend.read_shard(operation_id, name)
+                buffered[_shard_index(document, name)] = document
+                seen.add(name)
+
+            while next_index in buffered:
+                document = buffered.pop(next_index)
+                text_offset = int(document.shard_info.text_offset) if document.shard_info else 0
+                pages = _pages_info(document, text_offset=text_offset)
+                next_index += 1
+                yield {'text': document.text, 'pages': pages}
+
+            if done:
+                if buffered:
+                    raise DocAIBatchError(f"Document AI 일괄 처리 결과 누락: 샤드 {next_index}")
+                return
+            if time.monotonic() > deadline:
+                raise DocAIBatchError(f"Document AI 일괄 처리 시간 초과 ({timeout}초)")
+            time.sleep(poll_interval)
+    finally:
+        try:
+            backend.cleanup(operation_id)
+        except Exception:
+            pass
+
+
+def _process_batch_operation(backend, file_bytes, mime_type, on_pages=None):
+    merged_text = ""
+    merged_pages_info = []
+    with utils_trace.span("docai.lro") as s:
+        for chunk in iter_batch_results(backend, file_bytes, mime_type):
+            merged_text += chunk['text']
+            merged_pages_info.extend(chunk['pages'])
+            if on_pages:
+                on_pages(chunk['pages'])
+        s.set(pages=len(merged_pages_info))
+    return {
+        'text': merged_text,
+        'pages': merged_pages_info,
+        'raw_document': None  # 샤드 단위 수신 시 원본 객체 없음
+    }
+
+
+def _page_count(file_bytes):
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return len(doc)
+
+
+def process_document(file_bytes, mime_type, project_id, location, processor_id, credentials_json=None,
+                     gcs_uri=None, on_pages=None):
     """
     Document AI로 문서 처리 (OCR)
 
+    PDF 페이지 수에 따라 처리 방식 선택:
+        - BATCH_SIZE 이하: 온라인 처리 1회
+        - LRO_MIN_PAGES 초과 + 일괄 처리 백엔드(gcs_uri 또는 fake_docai) 사용 가능: 일괄 처리 작업 1건
+        - 그 외: BATCH_SIZE 페이지씩 나눠 온라인 동시 처리
+    분할/일괄 처리 실패는 예외로 전달 (제한을 넘는 1회 호출로 대체하지 않음)
+
+    Args:
+        gcs_uri: 일괄 처리 입출력용 GCS 경로 (gs://bucket/prefix, 선택사항)
+        on_pages: 페이지 결과 수신 시 호출 (페이지 정보 목록 인자, 일괄 처리 모드에서 진행 표시용)
+
     Returns:
         dict: {
             'text': 추출된 전체 텍스트,
@@ -54,67 +397,20 @@ def process_document(file_bytes, mime_type, project_id, location, processor_id,
             'raw_document': 원본 Document 객체
         }
     """
-    client = get_client(credentials_json)
-    processor_name = client.processor_path(project_id, location, processor_id)
+    processor_name = documentai.DocumentProcessorServiceClient.processor_path(project_id, location, processor_id)
 
     # PDF 페이지 수 확인 및 분할 처리 (API 제한 회피)
     if mime_type == 'application/pdf':
-        try:
-            with fitz.open(stream=file_bytes, filetype="pdf") as doc:
-                num_pages = len(doc)
-                BATCH_SIZE = 15  # Document AI 온라인 처리 제한(보통 15~30페이지)
-
-                if num_pages > BATCH_SIZE:
-                    merged_text = ""
-                    merged_pages_info = []
-
-                    for start_page in range(0, num_pages, BATCH_SIZE):
-                        end_page = min(start_page + BATCH_SIZE, num_pages)
-                        
-                        # 부분 PDF 생성
-                        sub_doc = fitz.open()
-                        sub_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
-                        sub_bytes = sub_doc.tobytes()
-                        sub_doc.close()
-
-                        # API 호출 (부분)
-                        raw_document = documentai.RawDocument(
-                            content=sub_bytes,
-                            mime_type=mime_type
-                        )
-                        request = documentai.ProcessRequest(
-                            name=processor_name,
-                            raw_document=raw_document
-                        )
-                        result = client.process_document(request=request)
-                        chunk_document = result.document
-
-                        # 텍스트 병합
-                        if chunk_document.text:
-                            merged_text += chunk_document.text + "\n"
-
-                        # 페이지 정보 추출
-                        if chunk_document.pages:
-                            for i, page in enumerate(chunk_document.pages):
-                                page_data = {
-                                    'page_num': start_page + i + 1,
-                                    'text': extract_page_text(page, chunk_document.text),
-                                    'width': page.dimension.width if page.dimension else 0,
-                                    'height': page.dimension.height if page.dimension else 0,
-                                    'blocks': []
-                                }
-                                _extract_blocks(page, chunk_document.text, page_data)
-                                merged_pages_info.append(page_data)
-
-                    return {
-                        'text': merged_text,
-                        'pages': merged_pages_info,
-                        'raw_document': None  # 분할 처리 시 원본 객체 없음
-                    }
-        except Exception as e:
-            # 분할 처리 실패 시 기본 로직으로 진행 (로그 출력 등 필요 시 추가)
-            pass
+        num_pages = _page_count(file_bytes)
+        if num_pages > LRO_MIN_PAGES:
+            backend = _batch_backend(processor_name, gcs_uri, credentials_json)
+            if backend is not None:
+                return _process_batch_operation(backend, file_bytes, mime_type, on_pages)
+        if num_pages > BATCH_SIZE:
+            return _process_batches(get_client(credentials_json), processor_name,
+                                    _split_pdf(file_bytes, BATCH_SIZE), mime_type)
 
+    client = get_client(credentials_json)
     raw_document = documentai.RawDocument(
         content=file_bytes,
         mime_type=mime_type
@@ -129,34 +425,19 @@ def process_document(file_bytes, mime_type, project_id, location, processor_id,
     document = result.document
 
     # 페이지별 정보 추출 (텍스트 + 좌표)
-    pages_info = []
-    if document.pages:
-        for page_num, page in enumerate(document.pages):
-            page_data = {
-                'page_num': page_num + 1,
-                'text': extract_page_text(page, document.text),
-                'width': page.dimension.width if page.dimension else 0,
-                'height': page.dimension.height if page.dimension else 0,
-                'blocks': []
-            }
-
-            _extract_blocks(page, document.text, page_data)
-
-            pages_info.append(page_data)
-
     return {
         'text': document.text,
-        'pages': pages_info,
+        'pages': _pages_info(document),
         'raw_document': document
     }
 
 
-def _extract_blocks(page, full_text, page_data):
+def _extract_blocks(page, full_text, page_data, text_offset=0):
     """페이지에서 블록/라인 정보 추출하여 page_data에 추가"""
     # 블록별 텍스트와 좌표 저장 (Searchable PDF 품질을 위해 lines 우선 사용)
     items = page.lines if page.lines else page.blocks
     for item in items:
-        block_text = get_text_from_layout(item.layout, full_text)
+        block_text = get_text_from_layout(item.layout, full_text, text_offset)
         if block_text.strip() and item.layout.bounding_poly:
             vertices = item.layout.bounding_poly.normalized_vertices
             if vertices:
@@ -170,18 +451,22 @@ def _extract_blocks(page, full_text, page_data):
                     }
                 })
 
-def extract_page_text(page, full_text):
+def extract_page_text(page, full_text, text_offset=0):
     """페이지에서 텍스트 추출"""
     text_parts = []
     for block in page.blocks:
-        block_text = get_text_from_layout(block.layout, full_text)
+        block_text = get_text_from_layout(block.layout, full_text, text_offset)
         if block_text.strip():
             text_parts.append(block_text)
     return '\n'.join(text_parts)
 
 
-def get_text_from_layout(layout, full_text):
-    """레이아웃에서 텍스트 추출"""
+def get_text_from_layout(layout, full_text, text_offset=0):
+    """
+    레이아웃에서 텍스트 추출
+
+    text_offset: full_text가 샤드 텍스트일 때 전체 문서 텍스트 기준 시작 위치 (shard_info.text_offset)
+    """
     if not layout.text_anchor or not layout.text_anchor.text_segments:
         return ""
 
@@ -189,7 +474,7 @@ def get_text_from_layout(layout, full_text):
     for segment in layout.text_anchor.text_segments:
         start_index = int(segment.start_index) if segment.start_index else 0
         end_index = int(segment.end_index) if segment.end_index else 0
-        text += full_text[start_index:end_index]
+        text += full_text[start_index - text_offset:end_index - text_offset]
 
     return text
 
@@ -0,0 +1,175 @@
+"""
+Markdown 표 → Excel 내보내기
+- 보고서의 표마다 별도 시트 (시트 이름은 직전 헤더, 표가 하나면 'RFI_List')
+- 열 단위로 숫자/백분율/날짜 판별 후 해당 형식으로 기록 (앞자리 0 코드 등은 텍스트 유지)
+- xlsxwriter constant_memory 모드로 행을 순서대로 바로 기록 (DataFrame 중간 단계 없음)
+"""
+import datetime
+import io
+import re
+
+import xlsxwriter
+
+import utils_markdown
+
+SINGLE_SHEET_NAME = "RFI_List"
+MAX_SHEET_NAME = 31
+WIDTH_SAMPLE_ROWS = 200
+MIN_COL_WIDTH = 8
+MAX_COL_WIDTH = 60
+
+_NUMBER_BODY = r'(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+# (123) 괄호 음수는 여닫는 괄호가 모두 있어야 하고, 그 외에는 -/△/▲ 부호만 허용
+_NUMBER_PATTERN = re.compile(
+    rf'^(?:\(\s*(?P<paren>{_NUMBER_BODY})\s*\)|(?P<sign>[-△▲])?\s*(?P<num>{_NUMBER_BODY}))\s*(?P<pct>%)?$'
+)
+_DATE_PATTERN = re.compile(r'^(\d{4})[-./](\d{1,2})[-./](\d{1,2})\.?$')
+_SHEET_INVALID_PATTERN = re.compile(r'[\[\]:*?/\\]')
+_YEAR_HEADER_PATTERN = re.compile(r'(연도|년도|회계연도|year|fy)$', re.IGNORECASE)
+_SHORT_INTEGER_PATTERN = re.compile(r'^[-△▲(]?\s*\d{1,4}\s*\)?$')  # 2024, 12 등 (천 단위 구분 없이 표시)
+
+
+def _number(text):
+    """숫자 셀이면 (값, 백분율 여부), 아니면 None (천 단위 쉼표, (123)/△123 음수 지원)"""
+    m = _NUMBER_PATTERN.match(text)
+    if not m:
+        return None
+    num = m.group('paren') or m.group('num')
+    if len(num) > 1 and num[0] == '0' and num[1] != '.':
+        return None  # 001 같은 코드 번호
+    value = float(num.replace(',', ''))
+    if m.group('paren') or m.group('sign'):
+        value = -value
+    if m.group('pct'):
+        return value / 100, True
+    return value, False
+
+
+def _date(text):
+    m = _DATE_PATTERN.match(text)
+    if not m:
+        return None
+    try:
+        return datetime.datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    except ValueError:
+        return None
+
+
+def _typed_column(values):
+    """
+    열 값 목록 → (형식, 변환 값 목록)
+
+    형식은 'percent' / 'number' / 'date' / 'text' (빈 셀을 제외한 전부가 같은 형식일 때만 변환)
+    """
+    filled = [v for v in values if v]
+    if not filled:
+        return 'text', values
+    numbers = [_number(v) if v else None for v in values]
+    if all(numbers[i] for i, v in enumerate(values) if v):
+        percents = {n[1] for n in numbers if n}
+        if len(percents) == 1:
+            return ('percent' if True in percents else 'number'), [n[0] if n else None for n in numbers]
+        return 'text', values  # 숫자/백분율 혼재
+    dates = [_date(v) if v else None for v in values]
+    if all(dates[i] for i, v in enumerate(values) if v):
+        return 'date', dates
+    return 'text', values
+
+
+def _display_width(text):
+    return sum(2 if ord(ch) > 0x1100 else 1 for ch in text)
+
+
+def _sheet_name(title, index, used):
+    base = _SHEET_INVALID_PATTERN.sub('', utils_markdown.plain_text(title or ""))[:MAX_SHEET_NAME].strip()
+    base = base.strip("'").strip()  # 시트 이름 앞뒤 작은따옴표는 Excel에서 허용되지 않음
+    base = base or f"Table{index}"
+    name, n = base, 2
+    while name.lower() in used:
+        suffix = f" ({n})"
+        name = base[:MAX_SHEET_NAME - len(suffix)] + suffix
+        n += 1
+    used.add(name.lower())
+    return name
+
+
+def titled_tables(markdown_text):
+    """[(직전 헤더 텍스트, 표 행 목록)]"""
+    result = []
+    title = ""
+    for block in utils_markdown.parse(markdown_text):
+        if block['type'] == 'heading':
+            title = block['text']
+        elif block['type'] == 'table':
+            result.append((title, block['rows']))
+    return result
+
+
+def _write_table(workbook, worksheet, rows, formats):
+    cols = max(len(row) for row in rows)
+    header = [utils_markdown.plain_text(c) for c in rows[0]] + [''] * (cols - len(rows[0]))
+    body = [[utils_markdown.plain_text(c) for c in row] + [''] * (cols - len(row)) for row in rows[1:]]
+
+    columns = [
+        ('text', [row[c] for row in body]) if _YEAR_HEADER_PATTERN.search(header[c].strip())
+        else _typed_column([row[c] for row in body])
+        for c in range(cols)
+    ]
+    cell_formats = []
+    for c, (kind, _) in enumerate(columns):
+        if kind == 'text':
+            cell_formats.append(None)
+        elif kind == 'number':
+            raw = [row[c] for row in body if row[c]]
+            if all(_SHORT_INTEGER_PATTERN.match(v) for v in raw):
+                cell_formats.append(None)  # 연도 같은 4자리 이하 정수는 2,024로 표시하지 않음
+            else:
+                decimal = any('.' in v for v in raw)
+                cell_formats.append(formats['decimal' if decimal else 'integer'])
+        else:
+            cell_formats.append(formats[kind])
+
+    for c in range(cols):
+        sample = [header[c]] + [row[c] for row in body[:WIDTH_SAMPLE_ROWS]]
+        width = max(_display_width(v) for v in sample) + 2
+        worksheet.set_column(c, c, max(MIN_COL_WIDTH, min(MAX_COL_WIDTH, width)))
+
+    worksheet.write_row(0, 0, header, formats['header'])
+    for r in range(len(body)):
+        for c, (kind, values) in enumerate(columns):
+            value = values[r]
+            if value is None or value == '':
+                continue
+            if kind == 'text':
+                worksheet.write_string(r + 1, c, value)
+            elif kind == 'date':
+                worksheet.write_datetime(r + 1, c, value, cell_formats[c])
+            else:
+                worksheet.write_number(r + 1, c, value, cell_formats[c])
+
+    worksheet.freeze_panes(1, 0)
+    if body:
+        worksheet.autofilter(0, 0, len(body), cols - 1)
+
+
+def create_excel(markdown_text):
+    """보고서의 Markdown 표를 표마다 한 시트로 기록한 xlsx (표가 없으면 빈 bytes)"""
+    tables = [(title, rows) for title, rows in titled_tables(markdown_text) if rows]
+    bio = io.BytesIO()
+    if not tables:
+        return bio.getvalue()
+
+    workbook = xlsxwriter.Workbook(bio, {'constant_memory': True, 'strings_to_numbers': False})
+    formats = {
+        'header': workbook.add_format({'bold': True, 'bg_color': '#DBEAFE', 'border': 1}),
+        'integer': workbook.add_format({'num_format': '#,##0'}),
+        'decimal': workbook.add_format({'num_format': '#,##0.00'}),
+        'percent': workbook.add_format({'num_format': '0.0%'}),
+        'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+    }
+    used = set()
+    for index, (title, rows) in enumerate(tables, start=1):
+        name = SINGLE_SHEET_NAME if len(tables) == 1 else _sheet_name(title, index, used)
+        _write_table(workbook, workbook.add_worksheet(name), rows, formats)
+    workbook.close()
+    return bio.getvalue()
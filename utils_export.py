@@ -0,0 +1,138 @@
+"""
+다운로드 파일(Word/PPT/Excel) 생성 서비스
+- 보고서 텍스트 해시 + 형식 기준으로 생성 결과(bytes) 메모이제이션 → 내용이 같으면 rerun마다 다시 만들지 않음
+- 필요할 때만 생성 (get), 생성/수정 완료 직후에는 백그라운드 선생성 (prebuild)
+- 새 텍스트를 선생성하면 이전 텍스트의 대기 중인 선생성 작업은 취소 (supersedes)
+- 스트리밍 중 만든 결과는 put으로 등록 (utils.DocxBuilder)
+- 같은 (텍스트, 형식)을 동시에 요청하면 한 번만 생성하고 결과 공유
+"""
+import contextvars
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+import utils_ppt
+
+MAX_ENTRIES = 24   # 메모리에 보관할 최대 (텍스트, 형식) 결과 수
+EXPORT_WORKERS = 2
+
+FORMATS = {
+    'docx': (utils.create_docx, "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    'pptx': (utils_ppt.create_ppt, "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+    'xlsx': (utils.create_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+_results = OrderedDict()  # (text_hash, fmt) -> bytes
+_pending = {}             # (text_hash, fmt) -> Future
+_background = set()       # prebuild로만 제출되어 기다리는 호출자가 없는 키
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="gem-export")
+
+
+def _key(text, fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    return hashlib.sha256(text.encode("utf-8")).hexdigest(), fmt
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][1]
+
+
+def _store(key, data):
+    """결과 저장 (호출 시 _lock 보유)"""
+    _results[key] = data
+    _results.move_to_end(key)
+    while len(_results) > MAX_ENTRIES:
+        _results.popitem(last=False)
+
+
+def _build(key, text):
+    builder = FORMATS[key[1]][0]
+    try:
+        data = builder(text)
+        with _lock:
+            _store(key, data)
+        return data
+    finally:
+        with _lock:
+            _pending.pop(key, None)
+            _background.discard(key)
+
+
+def _submit(key, text):
+    """진행 중인 생성 작업 또는 새 작업 (호출 시 _lock 보유)"""
+    future = _pending.get(key)
+    if future is None:
+        # 호출 측 트레이스 컨텍스트(utils_trace)를 워커 스레드로 전달
+        future = _pool.submit(contextvars.copy_context().run, _build, key, text)
+        _pending[key] = future
+    return future
+
+
+def cached(text, fmt):
+    """이미 생성된 결과 (없으면 None, 생성하지 않음)"""
+    key = _key(text, fmt)
+    with _lock:
+        data = _results.get(key)
+        if data is not None:
+            _results.move_to_end(key)
+        return data
+
+
+def is_ready(text, fmt):
+    return cached(text, fmt) is not None
+
+
+def is_pending(text, fmt):
+    with _lock:
+        return _key(text, fmt) in _pending
+
+
+def get(text, fmt):
+    """생성 결과 반환 (없으면 생성, 백그라운드 생성 중이면 완료까지 대기)"""
+    key = _key(text, fmt)
+    with _lock:
+        data = _results.get(key)
+        if data is not None:
+            _results.move_to_end(key)
+            return data
+        future = _submit(key, text)
+        _background.discard(key)  # 기다리는 호출자가 생겼으므로 취소 대상에서 제외
+    return future.result()
+
+
+def put(text, fmt, data):
+    """다른 경로에서 이미 만든 결과 등록 (스트리밍 중 생성한 Word 등)"""
+    key = _key(text, fmt)
+    with _lock:
+        _store(key, data)
+
+
+def prebuild(text, formats, supersedes=None):
+    """
+    백그라운드 선생성 (이미 있거나 생성 중인 형식은 건너뜀)
+
+    supersedes: 같은 화면에서 직전에 선생성한 텍스트. 아직 시작하지 않은 그 작업은 취소
+    """
+    with _lock:
+        if supersedes and supersedes != text:
+            old_hash = hashlib.sha256(supersedes.encode("utf-8")).hexdigest()
+            for key in [k for k in _background if k[0] == old_hash]:
+                if _pending[key].cancel():
+                    _pending.pop(key, None)
+                    _background.discard(key)
+        if not text:
+            return
+        for fmt in formats:
+            key = _key(text, fmt)
+            if key not in _results and key not in _pending:
+                _submit(key, text)
+                _background.add(key)
+
+
+def clear():
+    with _lock:
+        _results.clear()
@@ -0,0 +1,130 @@
+"""
+슬라이드 텍스트 크기 추정 (렌더링 없이 글자 폭 표로 계산)
+- 맑은 고딕(Malgun Gothic) 글자 폭 표: 폰트 파일과 fontTools가 있으면 실제 hmtx 값, 없으면 내장 근사값
+- 글자 폭은 문자별로 캐시 → 대형 발표자료도 빠르게 줄 수/높이 계산
+- utils_ppt의 슬라이드 자동 분할(넘침 방지)에 사용
+"""
+import os
+import re
+from functools import lru_cache
+
+FONTTOOLS_AVAILABLE = False
+try:
+    from fontTools.ttLib import TTFont
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    pass
+
+FONT_PATHS = [
+    os.getenv("GEM_FONT_PATH", ""),
+    "C:/Windows/Fonts/malgun.ttf",
+    "/usr/share/fonts/truetype/malgun/malgun.ttf",
+    "/Library/Fonts/malgun.ttf",
+]
+LINE_SPACING = 1.2      # 줄 높이 = 글꼴 크기 × 배수
+WIDTH_SAFETY = 1.03     # 근사값 오차 여유
+
+# 내장 근사값 (em 단위, 맑은 고딕 기준)
+_NARROW = set("iljtf.,:;'|!()[]{}` ")
+_WIDE = set("mwMW@%")
+_UPPER_WIDTH = 0.62
+_LOWER_WIDTH = 0.52
+_DIGIT_WIDTH = 0.55
+_NARROW_WIDTH = 0.28
+_WIDE_WIDTH = 0.85
+_HANGUL_WIDTH = 0.92
+_FULL_WIDTH = 1.0
+
+_BREAK_PATTERN = re.compile(r'(\s+)')
+
+
+@lru_cache(maxsize=1)
+def _font_widths():
+    """폰트 파일의 문자 → 폭(em) 표 (없으면 None)"""
+    if not FONTTOOLS_AVAILABLE:
+        return None
+    for path in FONT_PATHS:
+        if path and os.path.exists(path):
+            try:
+                font = TTFont(path, lazy=True, fontNumber=0)
+                units = font['head'].unitsPerEm
+                hmtx = font['hmtx']
+                return {chr(code): hmtx[name][0] / units for code, name in font.getBestCmap().items()}
+            except Exception:
+                return None
+    return None
+
+
+def _approx_width(ch):
+    code = ord(ch)
+    if 0xAC00 <= code <= 0xD7A3 or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+        return _HANGUL_WIDTH
+    if code >= 0x2E80 or 0x2190 <= code <= 0x27BF or 0x25A0 <= code <= 0x25FF:
+        return _FULL_WIDTH  # 한자/전각 문자/도형(▶ 등)
+    if ch in _NARROW:
+        return _NARROW_WIDTH
+    if ch in _WIDE:
+        return _WIDE_WIDTH
+    if ch.isdigit():
+        return _DIGIT_WIDTH
+    if ch.isupper():
+        return _UPPER_WIDTH
+    return _LOWER_WIDTH
+
+
+@lru_cache(maxsize=8192)
+def char_width(ch):
+    """문자 폭 (em)"""
+    widths = _font_widths()
+    if widths is not None and ch in widths:
+        return widths[ch]
+    return _approx_width(ch)
+
+
+def text_width(text, size_pt):
+    """한 줄 텍스트 폭 (pt)"""
+    return sum(char_width(ch) for ch in text) * size_pt * WIDTH_SAFETY
+
+
+def wrap_lines(text, width_pt, size_pt):
+    """
+    자동 줄바꿈 결과 줄 목록 (어절 단위, 한 어절이 한 줄보다 길면 글자 단위)
+
+    각 줄은 원문 조각 그대로 (줄 끝 공백 포함, 문단 구분 줄바꿈 제외)
+    """
+    lines = []
+    for paragraph in (text or "").split('\n'):
+        line, used = "", 0.0
+        for token in _BREAK_PATTERN.split(paragraph):
+            if not token:
+                continue
+            w = text_width(token, size_pt)
+            if used + w <= width_pt or (token.isspace() and used):
+                line += token
+                used += w
+                continue
+            if token.isspace():
+                continue
+            if w <= width_pt:
+                lines.append(line)
+                line, used = token, w
+                continue
+            for ch in token:  # 긴 어절은 글자 단위로 나눔
+                cw = text_width(ch, size_pt)
+                if used + cw > width_pt and used:
+                    lines.append(line)
+                    line, used = "", 0.0
+                line += ch
+                used += cw
+        lines.append(line)
+    return lines
+
+
+def count_lines(text, width_pt, size_pt):
+    """자동 줄바꿈 후 줄 수"""
+    return len(wrap_lines(text, width_pt, size_pt))
+
+
+def text_height(text, width_pt, size_pt, line_spacing=LINE_SPACING):
+    """자동 줄바꿈을 반영한 텍스트 높이 (pt)"""
+    return count_lines(text, width_pt, size_pt) * size_pt * line_spacing
@@ -0,0 +1,484 @@
+"""
+Gemini 클라이언트 공용 레지스트리
+- API 키별 genai.Client 1개를 프로세스 전역에서 공유 (HTTP 커넥션 풀/TLS 세션 재사용)
+- 병렬 OCR/파싱 스레드에서도 안전하게 사용 가능 (Lock 보호)
+- 명시적 종료(close_all_clients) 및 커넥션 설정 통계 제공
+- 모든 호출은 utils_ratelimit 전역 Rate Limiter를 경유 (generate_content / generate_content_stream)
+- 스트리밍 중단 시 백오프 재시도 + 받은 텍스트 이후부터 이어쓰기
+- 결정적(저온도) 호출은 호출부에서 cache=True로 디스크 응답 캐시 사용 (utils_cache)
+- asyncio 버전(generate_content_async / generate_content_stream_async)은 client.aio 사용
+- 모든 호출은 utils_trace span으로 기록 (TTFT, 입력/출력 토큰, 초당 토큰, 재시도 횟수)
+"""
+import asyncio
+import atexit
+import threading
+import time
+
+from google import genai
+from google.genai import types
+
+import utils_cache
+import utils_ratelimit
+import utils_trace
+from utils_ratelimit import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Keep-alive 커넥션 풀 설정
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+KEEPALIVE_EXPIRY_SEC = 120.0
+
+# 스트리밍 재시도 / 이어쓰기 설정
+STREAM_MAX_RETRIES = 4
+STREAM_BACKOFF_BASE_SEC = 1.0
+STREAM_BACKOFF_MAX_SEC = 16.0
+OVERLAP_WINDOW = 200
+TRANSIENT_MARKERS = (
+    'UNAVAILABLE', 'DEADLINE_EXCEEDED', 'INTERNAL',
+    'Server disconnected', 'Connection reset', 'RemoteProtocolError', 'timed out',
+)
+CONTINUATION_PROMPT = (
+    "The previous response was cut off by a network error. "
+    "Continue writing exactly from where it stopped, without repeating any text "
+    "that was already written and without adding any preamble."
+)
+
+_clients = {}
+_lock = threading.Lock()
+_client_factory = None  # 벤치마크/오프라인 테스트용 대체 생성 함수 (fake_genai.install)
+_stats = {
+    'setup_count': 0,       # genai.Client 생성 횟수 (= 커넥션 풀/SSL 컨텍스트 생성 횟수)
+    'setup_seconds': 0.0,   # 클라이언트 생성에 소요된 누적 시간
+    'reuse_count': 0,       # 기존 클라이언트 재사용 횟수
+    'close_count': 0,
+}
+
+
+def _build_http_options():
+    """Keep-alive 풀 설정이 적용된 HttpOptions 생성"""
+    if not HTTPX_AVAILABLE:
+        return None
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SEC,
+    )
+    return types.HttpOptions(
+        client_args={'limits': limits},
+        async_client_args={'limits': limits},
+    )
+
+
+def get_client(api_key):
+    """API 키에 해당하는 공유 genai.Client 반환 (없으면 생성)"""
+    with _lock:
+        client = _clients.get(api_key)
+        if client is not None:
+            _stats['reuse_count'] += 1
+            return client
+
+        started = time.perf_counter()
+        http_options = _build_http_options()
+        if _client_factory is not None:
+            client = _client_factory(api_key)
+        elif http_options is not None:
+            client = genai.Client(api_key=api_key, http_options=http_options)
+        else:
+            client = genai.Client(api_key=api_key)
+        _stats['setup_count'] += 1
+        _stats['setup_seconds'] += time.perf_counter() - started
+
+        _clients[api_key] = client
+        return client
+
+
+def set_client_factory(factory):
+    """클라이언트 생성 함수 교체 (None이면 기본 genai.Client). 기존 클라이언트는 종료"""
+    global _client_factory
+    close_all_clients()
+    _client_factory = factory
+
+
+def close_client(api_key):
+    """특정 API 키의 클라이언트 종료 및 레지스트리에서 제거"""
+    with _lock:
+        client = _clients.pop(api_key, None)
+    if client is not None:
+        _close(client)
+
+
+def close_all_clients():
+    """등록된 모든 클라이언트 종료 (프로세스 종료 시 자동 호출)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        _close(client)
+
+
+def _close(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+    with _lock:
+        _stats['close_count'] += 1
+
+
+def get_client_stats():
+    """커넥션 설정 통계 반환 (전/후 비교 측정용)"""
+    with _lock:
+        stats = dict(_stats)
+        stats['active_clients'] = len(_clients)
+    return stats
+
+
+def reset_client_stats():
+    """통계 초기화"""
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0.0 if isinstance(_stats[key], float) else 0
+
+
+def _usage_tokens(response):
+    """usage_metadata에서 (입력 토큰, 출력 토큰) 추출 (없으면 0)"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return 0, 0
+    return (usage.prompt_token_count or 0), (usage.candidates_token_count or 0)
+
+
+def _trace_response(span, response, attempts, call_seconds):
+    tokens_in, tokens_out = _usage_tokens(response)
+    span.set(
+        retries=max(0, attempts - 1), tokens_in=tokens_in, tokens_out=tokens_out,
+        tokens_per_sec=round(tokens_out / call_seconds, 1) if call_seconds > 0 else 0.0,
+    )
+
+
+def generate_content(api_key, model, contents, config=None, priority=PRIORITY_BACKGROUND,
+                     cache=False, cache_ttl=utils_cache.DEFAULT_TTL_SEC):
+    """
+    Rate Limiter를 거쳐 generate_content 호출 (429 시 백오프 후 재시도)
+
+    Args:
+        cache: True면 (모델, config, 프롬프트) 해시로 디스크 캐시 조회/저장.
+            결정적인 저온도 호출에만 사용할 것.
+        cache_ttl: 캐시 유효 기간(초)
+    """
+    with utils_trace.span("llm.generate", model=model, priority=priority) as span:
+        cache_key = None
+        if cache:
+            cache_key = utils_cache.make_key(model, config, contents)
+            cached_text = utils_cache.get(cache_key, ttl_sec=cache_ttl)
+            if cached_text is not None:
+                span.set(cache_hit=True)
+                return _text_chunk(cached_text)
+
+        client = get_client(api_key)
+        state = {'attempts': 0, 'seconds': 0.0}
+
+        def call():
+            state['attempts'] += 1
+            started = time.perf_counter()
+            result = client.models.generate_content(model=model, contents=contents, config=config)
+            state['seconds'] = time.perf_counter() - started
+            return result
+
+        response = utils_ratelimit.call_with_backoff(call, api_key, model, priority)
+        _trace_response(span, response, state['attempts'], state['seconds'])
+
+        if cache_key and response.text:
+            utils_cache.put(cache_key, response.text)
+        return response
+
+
+def is_transient_error(error):
+    """재시도할 만한 일시적 오류 여부 (429, 5xx, 네트워크 단절/타임아웃)"""
+    if utils_ratelimit.is_rate_limit_error(error):
+        return True
+    code = getattr(error, 'code', None)
+    if code in (500, 502, 503, 504):
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if HTTPX_AVAILABLE and isinstance(error, (httpx.TransportError, httpx.StreamError)):
+        return True
+    message = str(error)
+    return any(token in message for token in TRANSIENT_MARKERS)
+
+
+def _text_chunk(text):
+    """텍스트만 담은 스트림 청크 생성 (core_chained 상태 메시지와 동일 형식)"""
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(parts=[types.Part(text=text)])
+        )]
+    )
+
+
+def _continuation_contents(contents, received_text):
+    """이미 받은 텍스트 이후부터 이어서 쓰도록 하는 후속 요청 contents 구성"""
+    return [
+        types.Content(role='user', parts=[types.Part(text=contents)]),
+        types.Content(role='model', parts=[types.Part(text=received_text)]),
+        types.Content(role='user', parts=[types.Part(text=CONTINUATION_PROMPT)]),
+    ]
+
+
+def _trim_overlap(received_text, new_text, window=OVERLAP_WINDOW):
+    """이어쓰기 응답이 직전 텍스트를 반복한 경우 겹치는 부분 제거"""
+    tail = received_text[-window:]
+    for size in range(min(len(tail), len(new_text)), 0, -1):
+        if tail.endswith(new_text[:size]):
+            return new_text[size:]
+    return new_text
+
+
+class _StreamStats:
+    """스트리밍 호출 계측값 (재시도/이어쓰기 요청 합산)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_text_at = None
+        self.retries = 0
+        self.resumes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.chars = 0
+        self._attempt_in = 0
+        self._attempt_out = 0
+
+    def observe(self, chunk, text):
+        usage_in, usage_out = _usage_tokens(chunk)
+        self._attempt_in = max(self._attempt_in, usage_in)
+        self._attempt_out = max(self._attempt_out, usage_out)
+        if text:
+            if self.first_text_at is None:
+                self.first_text_at = time.perf_counter()
+            self.chars += len(text)
+
+    def end_attempt(self):
+        self.tokens_in += self._attempt_in
+        self.tokens_out += self._attempt_out
+        self._attempt_in = self._attempt_out = 0
+
+    def finish(self, span, error=None):
+        self.end_attempt()
+        ended = time.perf_counter()
+        ttft = (self.first_text_at - self.started) if self.first_text_at else None
+        decode_sec = (ended - self.first_text_at) if self.first_text_at else 0.0
+        span.set(
+            ttft=round(ttft, 3) if ttft is not None else -1,
+            retries=self.retries, resumes=self.resumes,
+            tokens_in=self.tokens_in, tokens_out=self.tokens_out, chars=self.chars,
+            tokens_per_sec=round(self.tokens_out / decode_sec, 1) if decode_sec > 0 else 0.0,
+        )
+        span.finish(error)
+
+
+def generate_content_stream(api_key, model, contents, config=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Rate Limiter + 재시도를 거쳐 generate_content_stream 호출
+
+    - 스트림이 끝날 때까지 동시성 슬롯을 점유
+    - 일시적 오류는 지수 백오프 후 재시도
+    - 스트리밍 도중 끊긴 경우, 이미 받은 텍스트를 model 턴으로 넘겨
+      이어쓰기(continuation) 요청을 보내므로 처음부터 다시 생성하지 않음
+    """
+    span = utils_trace.start_span("llm.stream", model=model, priority=priority)
+    stats = _StreamStats()
+    error = None
+    try:
+        yield from _stream_with_retries(api_key, model, contents, config, priority, stats)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        stats.finish(span, error)
+
+
+class _ResumableStream:
+    """
+    스트리밍 재시도/이어쓰기 상태 (동기/비동기 스트림 공용)
+
+    시도마다 request_contents()로 요청 내용을 만들고, 받은 chunk는 feed(),
+    정상 종료 시 finish(), 실패 시 should_retry()로 처리한다.
+    """
+
+    def __init__(self, contents, stats):
+        self.contents = contents
+        self.stats = stats
+        self.received_text = ""
+        self.attempt = 0
+        self._resuming = False
+        self._pending = ""
+
+    def request_contents(self):
+        """이번 시도의 요청 내용 (끊긴 뒤라면 이어쓰기 요청)"""
+        self._pending = ""
+        self._resuming = bool(self.received_text) and isinstance(self.contents, str)
+        if not self._resuming:
+            return self.contents
+        self.stats.resumes += 1
+        return _continuation_contents(self.contents, self.received_text)
+
+    def feed(self, chunk):
+        """받은 chunk → 내보낼 chunk 목록"""
+        text = chunk.text
+        self.stats.observe(chunk, text)
+        if self._resuming and text:
+            # 이어쓰기 첫 부분은 모아서 중복 제거 후 내보냄
+            self._pending += text
+            if len(self._pending) < OVERLAP_WINDOW:
+                return []
+            self._resuming = False
+            return self._flush()
+        if text:
+            self.received_text += text
+        return [chunk]
+
+    def finish(self):
+        """스트림 정상 종료 → 남은 chunk 목록"""
+        return self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return []
+        trimmed = _trim_overlap(self.received_text, self._pending)
+        self._pending = ""
+        if not trimmed:
+            return []
+        self.received_text += trimmed
+        return [_text_chunk(trimmed)]
+
+    def should_retry(self, error):
+        """일시적 오류이고 재시도 횟수가 남았으면 True"""
+        self.attempt += 1
+        if not is_transient_error(error) or self.attempt > STREAM_MAX_RETRIES:
+            return False
+        # 문자열 프롬프트가 아니면 이어쓰기 불가 → 이미 내보낸 내용이 있으면 중단
+        if self.received_text and not isinstance(self.contents, str):
+            return False
+        self.stats.retries = self.attempt
+        self.stats.end_attempt()
+        return True
+
+    @property
+    def backoff_sec(self):
+        return min(STREAM_BACKOFF_MAX_SEC, STREAM_BACKOFF_BASE_SEC * (2 ** (self.attempt - 1)))
+
+
+def _stream_with_retries(api_key, model, contents, config, priority, stats):
+    client = get_client(api_key)
+    limiter = utils_ratelimit.get_limiter()
+    state = _ResumableStream(contents, stats)
+    while True:
+        request_contents = state.request_contents()
+        limiter.acquire(api_key, model, priority)
+        try:
+            for chunk in client.models.generate_content_stream(model=model, contents=request_contents, config=config):
+                yield from state.feed(chunk)
+            yield from state.finish()
+            limiter.report_success(api_key, model)
+            return
+        except Exception as e:
+            if utils_ratelimit.is_rate_limit_error(e):
+                limiter.report_rate_limited(api_key, model)
+            if not state.should_retry(e):
+                raise
+        finally:
+            limiter.release(api_key)
+
+        time.sleep(state.backoff_sec)
+
+
+async def generate_content_async(api_key, model, contents, config=None, priority=PRIORITY_BACKGROUND,
+                                 cache=False, cache_ttl=utils_cache.DEFAULT_TTL_SEC):
+    """generate_content의 asyncio 버전 (client.aio 사용, 동일한 Rate Limiter/캐시 적용)"""
+    span = utils_trace.start_span("llm.generate", model=model, priority=priority)
+    cache_key = None
+    if cache:
+        cache_key = utils_cache.make_key(model, config, contents)
+        cached_text = utils_cache.get(cache_key, ttl_sec=cache_ttl)
+        if cached_text is not None:
+            span.set(cache_hit=True)
+            span.finish()
+            return _text_chunk(cached_text)
+
+    client = get_client(api_key)
+    limiter = utils_ratelimit.get_limiter()
+    attempt = 0
+    while True:
+        await limiter.acquire_async(api_key, model, priority)
+        try:
+            started = time.perf_counter()
+            response = await client.aio.models.generate_content(model=model, contents=contents, config=config)
+            limiter.report_success(api_key, model)
+            break
+        except Exception as e:
+            rate_limited = utils_ratelimit.is_rate_limit_error(e)
+            if rate_limited:
+                limiter.report_rate_limited(api_key, model)
+            attempt += 1
+            if not rate_limited or attempt > utils_ratelimit.MAX_RETRIES:
+                span.finish(e)
+                raise
+        finally:
+            limiter.release(api_key)
+
+    _trace_response(span, response, attempt + 1, time.perf_counter() - started)
+    span.finish()
+    if cache_key and response.text:
+        utils_cache.put(cache_key, response.text)
+    return response
+
+
+async def generate_content_stream_async(api_key, model, contents, config=None, priority=PRIORITY_INTERACTIVE):
+    """generate_content_stream의 asyncio 버전 (재시도/이어쓰기 동작 동일)"""
+    span = utils_trace.start_span("llm.stream", model=model, priority=priority)
+    stats = _StreamStats()
+    error = None
+    try:
+        async for chunk in _stream_with_retries_async(api_key, model, contents, config, priority, stats):
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        stats.finish(span, error)
+
+
+async def _stream_with_retries_async(api_key, model, contents, config, priority, stats):
+    client = get_client(api_key)
+    limiter = utils_ratelimit.get_limiter()
+    state = _ResumableStream(contents, stats)
+    while True:
+        request_contents = state.request_contents()
+        await limiter.acquire_async(api_key, model, priority)
+        try:
+            stream = await client.aio.models.generate_content_stream(model=model, contents=request_contents, config=config)
+            async for chunk in stream:
+                for out in state.feed(chunk):
+                    yield out
+            for out in state.finish():
+                yield out
+            limiter.report_success(api_key, model)
+            return
+        except Exception as e:
+            if utils_ratelimit.is_rate_limit_error(e):
+                limiter.report_rate_limited(api_key, model)
+            if not state.should_retry(e):
+                raise
+        finally:
+            limiter.release(api_key)
+
+        await asyncio.sleep(state.backoff_sec)
+
+
+atexit.register(close_all_clients)
@@ -0,0 +1,172 @@
+"""
+보고서 Markdown → 블록 목록(AST) 파서
+- Word(create_docx) / Excel(create_excel) / PPT(create_ppt)가 같은 파싱 결과를 공유 (보고서당 1회 파싱)
+- 헤더(#, 로마 숫자), 중첩 목록, 표, 굵게(**) 구간, 구분선, 일반 문단
+- 텍스트 해시 기준 메모이제이션 → 반환 목록/노드는 읽기 전용으로 사용
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+MAX_CACHED = 16
+MAX_LIST_LEVEL = 8
+
+_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*$')
+_ROMAN_HEADER_PATTERN = re.compile(r'^(I{1,3}|IV|VI{0,3}|V|IX|X)\.\s+(.+)$')
+_LIST_PATTERN = re.compile(r'^(\s*)([-*]|\d+\.)\s+(.*)$')
+_SEPARATOR_CELL_PATTERN = re.compile(r'^:?-+:?$')
+_BOLD_SPLIT_PATTERN = re.compile(r'(\*\*.*?\*\*)')
+_RULE_PATTERN = re.compile(r'^(?:-{3,}|\*{3,}|_{3,})$')
+
+_cache = OrderedDict()  # sha256 -> blocks
+_lock = threading.Lock()
+
+
+def bold_runs(text):
+    """'**굵게**' 구간 분리 → [(텍스트, 굵게 여부)]"""
+    runs = []
+    for part in _BOLD_SPLIT_PATTERN.split(text):
+        if not part:
+            continue
+        if len(part) >= 4 and part.startswith('**') and part.endswith('**'):
+            runs.append((part[2:-2], True))
+        else:
+            runs.append((part, False))
+    return runs
+
+
+def plain_text(text):
+    """굵게 표시(**) 제거"""
+    return text.replace('**', '').strip()
+
+
+def _table_cells(line):
+    body = line.strip()
+    if body.startswith('|'):
+        body = body[1:]
+    if body.endswith('|'):
+        body = body[:-1]
+    return [c.strip() for c in body.split('|')]
+
+
+def _is_separator(cells):
+    return all(_SEPARATOR_CELL_PATTERN.match(c.replace(' ', '')) for c in cells if c) and any(cells)
+
+
+class BlockParser:
+    """
+    줄 단위 증분 파서 (스트리밍 중 완성된 줄만 전달)
+
+    표는 표가 아닌 줄이 오거나 close()할 때 하나의 블록으로 확정된다.
+    """
+
+    def __init__(self):
+        self._indent_stack = [0]  # 목록 수준별 들여쓰기 칸 수
+        self._table_rows = None   # 작성 중인 표
+
+    def _flush_table(self, blocks):
+        if self._table_rows is not None:
+            if self._table_rows:
+                blocks.append({'type': 'table', 'rows': self._table_rows})
+            self._table_rows = None
+            self._indent_stack = [0]
+
+    def feed_line(self, raw_line):
+        """완성된 한 줄 → 새로 확정된 블록 목록"""
+        blocks = []
+        line = raw_line.strip()
+
+        if line.startswith('|'):
+            if self._table_rows is None:
+                self._table_rows = []
+            cells = _table_cells(line)
+            if not _is_separator(cells):
+                self._table_rows.append(cells)
+            return blocks
+        self._flush_table(blocks)
+
+        m = _HEADING_PATTERN.match(line)
+        if m:
+            blocks.append({'type': 'heading', 'level': len(m.group(1)), 'text': m.group(2), 'roman': False})
+            self._indent_stack = [0]
+            return blocks
+
+        if _ROMAN_HEADER_PATTERN.match(line):
+            blocks.append({'type': 'heading', 'level': 1, 'text': line, 'roman': True})
+            self._indent_stack = [0]
+            return blocks
+
+        m = _LIST_PATTERN.match(raw_line)
+        if m:
+            indent_str, marker, content = m.groups()
+            indent_len = len(indent_str.replace('\t', '    '))
+            stack = self._indent_stack
+            if indent_len == 0:
+                level = 0
+                self._indent_stack = [0]
+            elif indent_len > stack[-1]:
+                level = len(stack)
+                stack.append(indent_len)
+            else:
+                while len(stack) > 1 and stack[-1] > indent_len:
+                    stack.pop()
+                level = len(stack) - 1
+            blocks.append({
+                'type': 'list_item',
+                'level': min(level, MAX_LIST_LEVEL),
+                'ordered': marker not in ('-', '*'),
+                'text': content,
+                'runs': bold_runs(content),
+            })
+            return blocks
+
+        if _RULE_PATTERN.match(line):
+            blocks.append({'type': 'rule'})
+        elif line:
+            blocks.append({'type': 'paragraph', 'text': line, 'runs': bold_runs(line)})
+        return blocks
+
+    def close(self):
+        """남은 블록(작성 중인 표) 확정"""
+        blocks = []
+        self._flush_table(blocks)
+        return blocks
+
+
+def _parse(markdown_text):
+    parser = BlockParser()
+    blocks = []
+    for line in markdown_text.split('\n'):
+        blocks.extend(parser.feed_line(line))
+    blocks.extend(parser.close())
+    return blocks
+
+
+def parse(markdown_text):
+    """
+    Markdown → 블록 목록
+
+    블록 형식:
+        {'type': 'heading', 'level', 'text', 'roman'}
+        {'type': 'list_item', 'level', 'ordered', 'text', 'runs'}
+        {'type': 'table', 'rows'}  (첫 행이 헤더, 구분선 행 제외)
+        {'type': 'paragraph', 'text', 'runs'}
+        {'type': 'rule'}
+    """
+    key = hashlib.sha256(markdown_text.encode("utf-8")).hexdigest()
+    with _lock:
+        blocks = _cache.get(key)
+        if blocks is not None:
+            _cache.move_to_end(key)
+            return blocks
+    blocks = _parse(markdown_text)
+    with _lock:
+        _cache[key] = blocks
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return blocks
+
+
+def tables(markdown_text):
+    return [b['rows'] for b in parse(markdown_text) if b['type'] == 'table']
@@ -0,0 +1,213 @@
+"""
+서식 파일 목차(Outline) 빠른 추출
+- docx: 제목 스타일(Heading N / 제목 N / outlineLvl) → 없으면 글꼴 크기 분석
+- pdf: 책갈피(get_toc) → 없으면 글꼴 크기/번호 패턴 분석 (앞쪽 일부 페이지만)
+- md/txt: # 헤더
+- 추출 결과가 없으면 None → 호출부(core_logic.extract_structure)에서 모델 사용
+"""
+import io
+import re
+from collections import Counter
+
+import fitz  # PyMuPDF
+from docx import Document
+
+MIN_HEADINGS = 3            # 이보다 적게 찾으면 목차가 없는 것으로 판단
+MAX_HEADING_CHARS = 80
+MAX_PDF_PAGES = 40          # 글꼴 분석 시 읽을 최대 페이지 수
+HEADING_SIZE_RATIO = 1.15   # 본문 대비 이 비율 이상 큰 글꼴은 제목 후보
+MAX_LEVELS = 3
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_HEADING_STYLE_PATTERN = re.compile(r'^(?:heading|제목)\s*(\d)$', re.IGNORECASE)
+_MD_HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_NUMBERED_PATTERN = re.compile(
+    r'^(?:'
+    r'(?P<roman>(?:I{1,3}|IV|VI{0,3}|V|IX|X))\.'
+    r'|제\s*\d+\s*(?P<chapter>[장편부])'
+    r'|(?P<num>\d{1,2}(?:\.\d{1,2}){0,2})[.)]?'
+    r')\s+\S'
+)
+
+
+def _numbered_level(text):
+    """번호 매김 제목이면 계층 수준 (I./제1장 → 1, 1. → 1, 1.1 → 2, 1.1.1 → 3), 아니면 None"""
+    m = _NUMBERED_PATTERN.match(text)
+    if not m:
+        return None
+    if m.group('roman') or m.group('chapter'):
+        return 1
+    return m.group('num').count('.') + 1
+
+
+def _to_markdown(headings):
+    """[(level, text)] → Markdown 목차 (최상위 수준을 # 로 맞춤)"""
+    headings = [(level, text.strip()) for level, text in headings if text and text.strip()]
+    if len(headings) < MIN_HEADINGS:
+        return None
+    top = min(level for level, _ in headings)
+    lines = []
+    for level, text in headings:
+        depth = min(6, level - top + 1)
+        if depth == 1 and lines:
+            lines.append("")
+        lines.append(f"{'#' * depth} {text}")
+    return "\n".join(lines) + "\n"
+
+
+def _size_levels(sizes, body_size):
+    """제목 후보 글꼴 크기 → 수준 (큰 글꼴부터 1..MAX_LEVELS)"""
+    distinct = sorted({s for s in sizes if s >= body_size * HEADING_SIZE_RATIO}, reverse=True)
+    return {size: min(idx + 1, MAX_LEVELS) for idx, size in enumerate(distinct)}
+
+
+# =========================
+# DOCX
+# =========================
+
+def _docx_style_level(paragraph):
+    style = paragraph.style
+    while style is not None:
+        name = style.name or ""
+        if name.lower() in ("title", "제목"):
+            return 0  # 문서 제목은 Heading 1보다 한 단계 위
+        m = _HEADING_STYLE_PATTERN.match(name)
+        if m:
+            return int(m.group(1))
+        outline = style.element.find(f'.//{_W}outlineLvl')
+        if outline is not None:
+            value = int(outline.get(f'{_W}val'))
+            return value + 1 if value < 9 else None  # 9 = 본문 수준
+        style = style.base_style
+    return None
+
+
+def _docx_run_size(paragraph):
+    sizes = [run.font.size.pt for run in paragraph.runs if run.font.size is not None and run.text.strip()]
+    return round(max(sizes), 1) if sizes else None
+
+
+def outline_from_docx(file_bytes):
+    doc = Document(io.BytesIO(file_bytes))
+    paragraphs = [p for p in doc.paragraphs if p.text.strip()]
+
+    headings = []
+    for p in paragraphs:
+        level = _docx_style_level(p)
+        if level is not None and len(p.text.strip()) <= MAX_HEADING_CHARS:
+            headings.append((level, p.text))
+    outline = _to_markdown(headings)
+    if outline:
+        return outline
+
+    # 제목 스타일이 없으면 직접 지정된 글꼴 크기로 판단
+    sized = [(p, _docx_run_size(p)) for p in paragraphs]
+    weights = Counter()
+    for p, size in sized:
+        if size is not None:
+            weights[size] += len(p.text)
+    if not weights:
+        return None
+    body_size = weights.most_common(1)[0][0]
+    levels = _size_levels([size for _, size in sized if size is not None], body_size)
+    return _to_markdown([
+        (levels[size], p.text) for p, size in sized
+        if size in levels and len(p.text.strip()) <= MAX_HEADING_CHARS
+    ])
+
+
+# =========================
+# PDF
+# =========================
+
+def _pdf_lines(doc):
+    """앞쪽 페이지의 줄 단위 (텍스트, 최대 글꼴 크기, 굵게 여부, 페이지)"""
+    lines = []
+    for page_num in range(min(len(doc), MAX_PDF_PAGES)):
+        for block in doc[page_num].get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                spans = [s for s in line["spans"] if s["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join(s["text"].strip() for s in spans)
+                size = round(max(s["size"] for s in spans), 1)
+                bold = all(s["flags"] & 16 for s in spans)
+                lines.append((text, size, bold, page_num))
+    return lines
+
+
+def outline_from_pdf(file_bytes):
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        toc = doc.get_toc(simple=True)
+        if toc:
+            outline = _to_markdown([(level, title) for level, title, _ in toc])
+            if outline:
+                return outline
+
+        lines = _pdf_lines(doc)
+        page_count = min(len(doc), MAX_PDF_PAGES)
+
+    if not lines:
+        return None  # 스캔 PDF 등 텍스트 레이어가 없음 → 모델 사용
+
+    weights = Counter()
+    for text, size, _, _ in lines:
+        weights[size] += len(text)
+    body_size = weights.most_common(1)[0][0]
+
+    # 여러 페이지에 반복되는 머리글/바닥글 제외
+    pages_by_text = {}
+    for text, _, _, page_num in lines:
+        pages_by_text.setdefault(text, set()).add(page_num)
+    repeated = {text for text, pages in pages_by_text.items() if page_count > 2 and len(pages) > page_count / 2}
+
+    levels = _size_levels([size for _, size, _, _ in lines], body_size)
+    headings = []
+    for text, size, bold, _ in lines:
+        if text in repeated or len(text) > MAX_HEADING_CHARS or text.replace('.', '').strip().isdigit():
+            continue
+        if size in levels:
+            headings.append((levels[size], text))
+        elif bold and size >= body_size:
+            # 본문 크기의 굵은 번호 제목 (1.1 개요 등)
+            level = _numbered_level(text)
+            if level is not None:
+                headings.append((len(levels) + level, text))
+    return _to_markdown(headings)
+
+
+# =========================
+# MD / TXT
+# =========================
+
+def outline_from_text(text):
+    headings = []
+    in_code = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_code = not in_code
+            continue
+        if in_code:
+            continue
+        m = _MD_HEADING_PATTERN.match(stripped)
+        if m:
+            headings.append((len(m.group(1)), m.group(2)))
+    return _to_markdown(headings)
+
+
+def extract_outline(file_bytes, filename):
+    """
+    파일 고유의 목차 구조를 Markdown으로 추출
+
+    Returns:
+        Markdown 목차 문자열, 찾지 못하면 None
+    """
+    ext = filename.rsplit('.', 1)[-1].lower()
+    if ext == 'docx':
+        return outline_from_docx(file_bytes)
+    if ext == 'pdf':
+        return outline_from_pdf(file_bytes)
+    if ext in ('md', 'txt'):
+        return outline_from_text(file_bytes.decode('utf-8', errors='replace'))
+    return None
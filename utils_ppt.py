@@ -1,11 +1,20 @@
+import copy
+import datetime
 import io
 import re
-import datetime
+import threading
+from xml.sax.saxutils import escape as xml_escape
 from pptx import Presentation
-from pptx.util import Inches, Pt
+from pptx.util import Emu, Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+
+import utils_fontmetrics
+import utils_markdown
+import utils_trace
 
 # --- 디자인 상수 (GEM Blue Theme) ---
 COLOR_PRIMARY = RGBColor(0, 104, 201)  # Streamlit Blue
@@ -18,6 +27,8 @@ COLOR_LIGHT_GREY = RGBColor(245, 245, 245)  # 요약 배경색
 # 기본 폰트
 DEFAULT_FONT = "Malgun Gothic"
 
+_XML_INVALID_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
 # 4:3 슬라이드 크기
 SLIDE_WIDTH = Inches(10)
 SLIDE_HEIGHT = Inches(7.5)
@@ -236,10 +247,57 @@ def add_items_to_textframe(tf, items):
             p.space_after = Pt(2)
 
 
-def create_table_slide(prs, title_text, table_data):
-    """표 슬라이드 생성"""
+_TABLE_HEADER_FILL = f'<a:solidFill><a:srgbClr val="{COLOR_HEADER_BG}"/></a:solidFill>'
+_TABLE_BAND_FILL = f'<a:solidFill><a:srgbClr val="{COLOR_LIGHT_BLUE}"/></a:solidFill>'
+
+
+def _table_rpr(bold, color):
+    bold_attr = ' b="1"' if bold else ''
+    return (
+        f'<a:rPr lang="ko-KR" sz="{TABLE_FONT_PT * 100}"{bold_attr}>'
+        f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+        f'<a:latin typeface="{DEFAULT_FONT}"/><a:ea typeface="{DEFAULT_FONT}"/></a:rPr>'
+    )
+
+
+def _table_xml(table_data, cols, col_width, row_heights):
+    """
+    표(a:tbl) XML 일괄 생성
+
+    헤더 행은 진한 파랑 배경/흰색 굵게, 짝수 데이터 행은 연한 파랑 배경, 가운데 정렬 10pt 맑은 고딕
+    (기본 표 스타일과 첫 행/줄무늬 설정은 python-pptx add_table과 동일)
+    """
+    header_rpr = _table_rpr(True, COLOR_WHITE)
+    body_rpr = _table_rpr(False, RGBColor(30, 30, 30))
+    parts = [
+        f'<a:tbl {nsdecls("a")}><a:tblPr firstRow="1" bandRow="1">'
+        '<a:tableStyleId>{5C22544A-7EE6-4342-B048-85BDC9FD1C3A}</a:tableStyleId></a:tblPr><a:tblGrid>',
+        f'<a:gridCol w="{col_width}"/>' * cols,
+        '</a:tblGrid>',
+    ]
+    for row_idx, (row, height) in enumerate(zip(table_data, row_heights)):
+        if row_idx == 0:
+            rpr, fill = header_rpr, _TABLE_HEADER_FILL
+        else:
+            rpr, fill = body_rpr, _TABLE_BAND_FILL if row_idx % 2 == 0 else ''
+        parts.append(f'<a:tr h="{int(height)}">')
+        for col_idx in range(cols):
+            text = _XML_INVALID_PATTERN.sub('', clean_text(row[col_idx])) if col_idx < len(row) else ''
+            run = f'<a:r>{rpr}<a:t>{xml_escape(text)}</a:t></a:r>' if text else ''
+            parts.append(
+                f'<a:tc><a:txBody><a:bodyPr/><a:lstStyle/><a:p><a:pPr algn="ctr"/>{run}</a:p></a:txBody>'
+                f'<a:tcPr>{fill}</a:tcPr></a:tc>'
+            )
+        parts.append('</a:tr>')
+    parts.append('</a:tbl>')
+    return ''.join(parts)
+
+
+def create_table_slide(prs, title_text, table_data, with_master=True):
+    """표 슬라이드 생성 (with_master=False면 헤더 바는 레이아웃에 있는 것으로 간주)"""
     slide = prs.slides.add_slide(prs.slide_layouts[6])
-    add_master_design(slide)
+    if with_master:
+        add_master_design(slide)
 
     title_box = slide.shapes.add_textbox(Inches(0.3), Inches(0.6), Inches(9.4), Inches(0.5))
     p_title = title_box.text_frame.paragraphs[0]
@@ -249,63 +307,332 @@ def create_table_slide(prs, title_text, table_data):
     if not table_data or len(table_data) < 2:
         return slide
 
-    rows = len(table_data)
     cols = len(table_data[0])
 
-    table_width = Inches(9.4)
-    table_height = Inches(min(5.5, 0.4 * rows))
+    # 행 높이는 셀 내용 줄 수로 추정한 값 (분할 기준과 동일)
+    row_heights = table_row_heights(table_data, cols)
+    graphic_frame = slide.shapes.add_table(1, cols, Inches(0.3), TABLE_TOP, TABLE_WIDTH, sum(row_heights))
 
-    table = slide.shapes.add_table(rows, cols, Inches(0.3), Inches(1.2), table_width, table_height).table
+    # 셀 텍스트/글꼴/채우기를 표 XML 한 번에 생성해 교체 (셀마다 속성 설정하지 않음)
+    old_tbl = graphic_frame._element.find('.//' + qn('a:tbl'))
+    old_tbl.getparent().replace(old_tbl, parse_xml(_table_xml(table_data, cols, int(TABLE_WIDTH / cols), row_heights)))
 
-    col_width = int(table_width / cols)
-    for col_idx in range(cols):
-        table.columns[col_idx].width = col_width
+    return slide
 
-    for row_idx, row_data in enumerate(table_data):
-        for col_idx, cell_text in enumerate(row_data):
-            if col_idx >= len(row_data):
-                continue
-            cell = table.cell(row_idx, col_idx)
-            cell.text = clean_text(cell_text)
-
-            para = cell.text_frame.paragraphs[0]
-            para.font.name = DEFAULT_FONT
-            para.font.size = Pt(10)
-            para.alignment = PP_ALIGN.CENTER
-
-            if row_idx == 0:
-                cell.fill.solid()
-                cell.fill.fore_color.rgb = COLOR_HEADER_BG
-                para.font.color.rgb = COLOR_WHITE
-                para.font.bold = True
-            else:
-                if row_idx % 2 == 0:
-                    cell.fill.solid()
-                    cell.fill.fore_color.rgb = COLOR_LIGHT_BLUE
-                para.font.color.rgb = RGBColor(30, 30, 30)
 
-    return slide
+# =========================
+# 슬라이드 복제 엔진
+# =========================
 
+_SLOTS = {
+    'title': "\u2063title", 'summary': "\u2063summary",
+    'left_title': "\u2063left_title", 'right_title': "\u2063right_title",
+    'left': "\u2063left", 'right': "\u2063right", 'section': "\u2063section", 'date': "\u2063date",
+}
+_prototypes = None
+_prototypes_lock = threading.Lock()
 
-def parse_markdown_table(lines, start_idx):
-    """Markdown 테이블 파싱"""
-    table_data = []
-    i = start_idx
 
-    while i < len(lines):
-        line = lines[i].strip()
-        if line.startswith('|') and line.endswith('|'):
-            if re.match(r'^\|[\s\-:]+\|', line):
-                i += 1
-                continue
-            cells = [c.strip() for c in line.split('|')[1:-1]]
-            if cells:
-                table_data.append(cells)
-            i += 1
-        else:
-            break
+def _shape_elements(slide):
+    """슬라이드의 도형 XML 요소 (그룹 속성 요소 제외)"""
+    return [el for el in slide.shapes._spTree.iterchildren()
+            if el.tag.rsplit('}', 1)[-1] in ('sp', 'grpSp', 'graphicFrame', 'cxnSp', 'pic')]
+
+
+def _slot_map(elements):
+    """표식 문자열이 들어간 텍스트 상자 → 슬롯 이름"""
+    slots = {}
+    for idx, el in enumerate(elements):
+        text = "".join(t.text or "" for t in el.iter(qn('a:t')))
+        for name, marker in _SLOTS.items():
+            if text == marker:
+                slots[name] = idx
+    return slots
+
+
+def _build_prototypes():
+    """
+    임시 프레젠테이션에 기존 도형 단위 함수로 한 번씩 그려 XML 요소를 보관
+
+    - master: 헤더 바/제목/날짜 (레이아웃에 한 번만 추가)
+    - two_column: 2단 슬라이드 중 헤더 바를 제외한 도형 + 채울 슬롯 위치
+    - paragraphs: 내용 아이템 종류별 문단 서식
+    - section: 챕터 간지
+    """
+    scratch = Presentation()
+    scratch.slide_width = SLIDE_WIDTH
+    scratch.slide_height = SLIDE_HEIGHT
+
+    master_slide = scratch.slides.add_slide(scratch.slide_layouts[6])
+    add_master_design(master_slide)
+    master = _shape_elements(master_slide)
+    for t in master[-1].iter(qn('a:t')):
+        t.text = _SLOTS['date']  # 날짜는 엔진 생성 시점 기준으로 채움
+
+    column_slide = create_two_column_slide(
+        scratch, _SLOTS['title'], _SLOTS['summary'],
+        _SLOTS['left_title'], [{'type': 'text', 'text': _SLOTS['left']}],
+        _SLOTS['right_title'], [{'type': 'text', 'text': _SLOTS['right']}],
+    )
+    two_column = _shape_elements(column_slide)[len(master):]
+
+    # 내용 아이템 종류별 문단 서식
+    item_types = ('bullet', 'subheader', 'text')
+    box = column_slide.shapes.add_textbox(0, 0, Inches(1), Inches(1))
+    add_items_to_textframe(box.text_frame, [{'type': t, 'text': t} for t in item_types])
+    paragraphs = dict(zip(item_types, box.text_frame._txBody.findall(qn('a:p'))))
+
+    section_slide = create_section_slide(scratch, _SLOTS['section'])
+    section = _shape_elements(section_slide)
+
+    return {
+        'master': master,
+        'two_column': two_column,
+        'two_column_slots': _slot_map(two_column),
+        'paragraphs': paragraphs,
+        'section': section,
+        'section_slots': _slot_map(section),
+    }
+
+
+def _get_prototypes():
+    global _prototypes
+    with _prototypes_lock:
+        if _prototypes is None:
+            _prototypes = _build_prototypes()
+        return _prototypes
+
+
+def _clone_into(sp_tree, elements):
+    """요소 복제 후 도형 트리에 추가 (도형 id는 트리 안에서 겹치지 않게 다시 부여)"""
+    next_id = max([int(i) for i in sp_tree.xpath('.//p:cNvPr/@id')] or [0]) + 1
+    clones = []
+    for el in elements:
+        clone = copy.deepcopy(el)
+        for c_nv_pr in clone.iter(qn('p:cNvPr')):
+            c_nv_pr.set('id', str(next_id))
+            next_id += 1
+        sp_tree.insert_element_before(clone, 'p:extLst')
+        clones.append(clone)
+    return clones
+
+
+def _fill(element, text):
+    """슬롯 텍스트 상자의 첫 run 텍스트만 교체"""
+    element.find('.//' + qn('a:t')).text = _XML_INVALID_PATTERN.sub('', text or "")
+
+
+def _item_text(item):
+    if item.get('type') == 'bullet':
+        level = item.get('level', 0)
+        return "  " * level + "- " + item['text'] if level > 0 else "• " + item['text']
+    if item.get('type') == 'subheader':
+        return "▶ " + item['text']
+    return item['text']
+
+
+class SlideEngine:
+    """
+    프로토타입 복제 방식 슬라이드 생성기
+
+    헤더 바는 빈 레이아웃에 한 번만 추가하고, 2단/간지 슬라이드는 미리 그려 둔 도형 XML을
+    복제한 뒤 텍스트만 채운다 (슬라이드마다 도형/글꼴을 새로 설정하지 않음).
+    """
 
-    return table_data, i
+    def __init__(self, prs):
+        self.prs = prs
+        self.layout = prs.slide_layouts[6]
+        self.protos = _get_prototypes()
+        master = _clone_into(self.layout.shapes._spTree, self.protos['master'])
+        _fill(master[_slot_map(master)['date']], datetime.date.today().strftime("%Y-%m-%d"))
+
+    def _new_slide(self):
+        return self.prs.slides.add_slide(self.layout)
+
+    def title_slide(self, title_text):
+        return create_title_slide(self.prs, title_text)
+
+    def section_slide(self, text):
+        slide = self._new_slide()
+        clones = _clone_into(slide.shapes._spTree, self.protos['section'])
+        _fill(clones[self.protos['section_slots']['section']], text)
+        return slide
+
+    def two_column_slide(self, slide_title, summary_text, left_title, left_items, right_title, right_items):
+        slide = self._new_slide()
+        clones = _clone_into(slide.shapes._spTree, self.protos['two_column'])
+        slots = self.protos['two_column_slots']
+        _fill(clones[slots['title']], slide_title)
+        _fill(clones[slots['summary']], summary_text)
+        _fill(clones[slots['left_title']], left_title)
+        _fill(clones[slots['right_title']], right_title)
+        for name, items in (('left', left_items), ('right', right_items)):
+            body = clones[slots[name]].find(qn('p:txBody'))
+            for p in body.findall(qn('a:p')):
+                body.remove(p)
+            for item in items or []:
+                p = copy.deepcopy(self.protos['paragraphs'].get(item.get('type'), self.protos['paragraphs']['text']))
+                _fill(p, _item_text(item))
+                body.append(p)
+            if not items:
+                body.append(body.makeelement(qn('a:p'), {}))
+        return slide
+
+    def table_slide(self, title_text, table_data):
+        """표 슬라이드 (길면 헤더를 반복하며 여러 장으로 분할)"""
+        return [
+            create_table_slide(self.prs, _continued(title_text, page), chunk, with_master=False)
+            for page, chunk in enumerate(paginate_table(table_data))
+        ]
+
+    def paged_two_column_slides(self, slide_title, left_title, left_items, right_title, right_items):
+        """내용이 넘치면 좌/우 컬럼을 각각 나눠 (계속) 슬라이드 생성"""
+        left_pages = paginate_items(left_items)
+        right_pages = paginate_items(right_items)
+        slides = []
+        for page in range(max(len(left_pages), len(right_pages))):
+            left = left_pages[page] if page < len(left_pages) else []
+            right = right_pages[page] if page < len(right_pages) else []
+            slides.append(self.two_column_slide(
+                _continued(slide_title, page), generate_summary(left + right),
+                left_title if left or not page else "", left,
+                right_title if right or not page else "", right,
+            ))
+        return slides
+
+
+# =========================
+# 넘침 방지 자동 분할
+# =========================
+
+CONTINUED_SUFFIX = " (계속)"
+# 2단 슬라이드 내용 상자 (4.45 x 4.7인치, 기본 여백 좌우 0.1 / 상하 0.05인치 제외)
+CONTENT_TEXT_WIDTH_PT = (4.45 - 0.2) * 72
+CONTENT_TEXT_HEIGHT_PT = (4.7 - 0.1) * 72
+# 표 슬라이드
+TABLE_WIDTH = Inches(9.4)
+TABLE_TOP = Inches(1.2)
+TABLE_MAX_HEIGHT = Inches(6.0)    # 표 위쪽 1.2인치 ~ 하단 0.3인치 여백
+TABLE_MIN_ROW_HEIGHT = Inches(0.3)
+TABLE_MAX_ROWS = 15               # 슬라이드당 최대 데이터 행 수 (헤더 제외)
+TABLE_FONT_PT = 10
+TABLE_CELL_MARGIN_X_PT = 0.2 * 72
+TABLE_CELL_MARGIN_Y_PT = 0.1 * 72
+
+# 아이템 종류별 (글꼴 크기, 앞 간격, 뒤 간격) - add_items_to_textframe과 동일
+_ITEM_METRICS = {
+    'bullet': (11, 0, 3),
+    'subheader': (12, 5, 0),
+    'text': (11, 0, 2),
+}
+
+
+def _item_height(item):
+    size, before, after = _ITEM_METRICS.get(item.get('type'), _ITEM_METRICS['text'])
+    return before + after + utils_fontmetrics.text_height(_item_text(item), CONTENT_TEXT_WIDTH_PT, size)
+
+
+def _split_item(item, first_pt, height_pt):
+    """
+    한 페이지보다 높은 아이템 → 줄 단위로 나눈 아이템 목록 (이어지는 조각은 글머리 없는 'text')
+
+    첫 조각은 현재 페이지 남은 높이(first_pt), 이후 조각은 한 페이지 높이에 맞춤.
+    줄바꿈 위치는 utils_fontmetrics.wrap_lines (높이 추정과 같은 규칙)
+    """
+    size, before, after = _ITEM_METRICS.get(item.get('type'), _ITEM_METRICS['text'])
+    line_pt = size * utils_fontmetrics.LINE_SPACING
+    per_page = max(1, int((height_pt - before - after) // line_pt))
+    first = max(0, int((first_pt - before - after) // line_pt)) or per_page
+    full_text = _item_text(item)
+    prefix_len = len(full_text) - len(item['text'])
+    lines = utils_fontmetrics.wrap_lines(full_text, CONTENT_TEXT_WIDTH_PT, size)
+    pieces = [dict(item, text="".join(lines[:first])[prefix_len:].strip())]
+    for start in range(first, len(lines), per_page):
+        pieces.append({'type': 'text', 'text': "".join(lines[start:start + per_page]).strip()})
+    return pieces
+
+
+def paginate_items(items, height_pt=CONTENT_TEXT_HEIGHT_PT):
+    """
+    내용 상자 높이를 넘지 않도록 아이템을 페이지로 분할
+
+    페이지 끝의 소제목은 다음 페이지로, 한 페이지보다 높은 아이템은 줄 단위로 나눠 이어 배치
+    """
+    pages = [[]]
+    used = 0.0
+    for item in items:
+        pieces = [item]
+        if _item_height(item) > height_pt:
+            pieces = _split_item(item, height_pt - used, height_pt)
+        for piece in pieces:
+            h = _item_height(piece)
+            if pages[-1] and used + h > height_pt:
+                carry = [pages[-1].pop()] if pages[-1][-1].get('type') == 'subheader' and len(pages[-1]) > 1 else []
+                pages.append(carry)
+                used = sum(_item_height(i) for i in carry)
+            pages[-1].append(piece)
+            used += h
+    return pages
+
+
+def table_row_heights(table_data, cols):
+    """행별 높이 (EMU) - 열 너비 균등 분할 기준 셀 줄바꿈 추정"""
+    cell_width_pt = TABLE_WIDTH.pt / cols - TABLE_CELL_MARGIN_X_PT
+    heights = []
+    for row in table_data:
+        lines = max(
+            [utils_fontmetrics.count_lines(clean_text(c), cell_width_pt, TABLE_FONT_PT) for c in row[:cols]] or [1]
+        )
+        height_pt = lines * TABLE_FONT_PT * utils_fontmetrics.LINE_SPACING + TABLE_CELL_MARGIN_Y_PT
+        heights.append(max(TABLE_MIN_ROW_HEIGHT, Pt(height_pt)))
+    return heights
+
+
+def _split_row(row, cols, max_lines):
+    """셀 줄 수가 max_lines를 넘는 행 → 셀마다 max_lines줄씩 나눈 이어지는 행 목록"""
+    cell_width_pt = TABLE_WIDTH.pt / cols - TABLE_CELL_MARGIN_X_PT
+    cell_lines = [utils_fontmetrics.wrap_lines(clean_text(c), cell_width_pt, TABLE_FONT_PT) for c in row[:cols]]
+    total = max([len(lines) for lines in cell_lines] or [1])
+    return [
+        ["".join(lines[start:start + max_lines]).strip() for lines in cell_lines]
+        for start in range(0, total, max_lines)
+    ]
+
+
+def paginate_table(table_data, max_height=TABLE_MAX_HEIGHT, max_rows=TABLE_MAX_ROWS):
+    """
+    슬라이드 높이/최대 행 수를 넘지 않도록 표를 분할 (조각마다 헤더 행 반복)
+
+    헤더와 함께 한 슬라이드에 들어가지 않는 행은 셀 텍스트를 줄 단위로 나눠 여러 행으로 이어 씀
+    """
+    if len(table_data) < 2:
+        return [table_data]
+    cols = len(table_data[0])
+    heights = table_row_heights(table_data, cols)
+    row_space = max_height - heights[0]
+    if any(h > row_space for h in heights[1:]):
+        max_lines = max(1, int((Emu(row_space).pt - TABLE_CELL_MARGIN_Y_PT) //
+                               (TABLE_FONT_PT * utils_fontmetrics.LINE_SPACING)))
+        rows = [table_data[0]]
+        for row, height in zip(table_data[1:], heights[1:]):
+            rows.extend(_split_row(row, cols, max_lines) if height > row_space else [row])
+        table_data = rows
+        heights = table_row_heights(table_data, cols)
+    header, header_height = table_data[0], heights[0]
+    chunks = []
+    current, used = [], header_height
+    for row, height in zip(table_data[1:], heights[1:]):
+        if current and (used + height > max_height or len(current) >= max_rows):
+            chunks.append([header] + current)
+            current, used = [], header_height
+        current.append(row)
+        used += height
+    chunks.append([header] + current)
+    return chunks
+
+
+def _continued(title, page):
+    return title + CONTINUED_SUFFIX if page and title else title
 
 
 def generate_summary(items):
@@ -320,6 +647,7 @@ def generate_summary(items):
     return " | ".join(summary_parts) if summary_parts else ""
 
 
+@utils_trace.traced("render.pptx")
 def create_ppt(markdown_text):
     """
     Markdown -> Structured PPT 변환
@@ -334,7 +662,8 @@ def create_ppt(markdown_text):
     prs.slide_width = SLIDE_WIDTH
     prs.slide_height = SLIDE_HEIGHT
 
-    lines = markdown_text.split('\n')
+    blocks = utils_markdown.parse(markdown_text)
+    engine = SlideEngine(prs)
 
     # 상태 변수
     is_first_header = True
@@ -349,9 +678,7 @@ def create_ppt(markdown_text):
         """현재 슬라이드 생성"""
         nonlocal current_slide_title, left_title, right_title, left_items, right_items, current_column
         if left_items or right_items:
-            all_items = left_items + right_items
-            summary = generate_summary(all_items)
-            create_two_column_slide(prs, current_slide_title, summary, left_title, left_items, right_title, right_items)
+            engine.paged_two_column_slides(current_slide_title, left_title, left_items, right_title, right_items)
         current_slide_title = ""
         left_title = ""
         right_title = ""
@@ -359,48 +686,44 @@ def create_ppt(markdown_text):
         right_items = []
         current_column = 'left'
 
+    def add_item(item):
+        if current_column == 'left':
+            left_items.append(item)
+        else:
+            right_items.append(item)
+
     i = 0
-    while i < len(lines):
-        line = lines[i].rstrip()
+    while i < len(blocks):
+        block = blocks[i]
+        kind = block['type']
+        level = block.get('level', 0)
 
-        # 1. 메인 헤더 (#) -> 표지 또는 섹션 간지
-        if line.strip().startswith('# ') and not line.strip().startswith('## '):
+        # 1. 메인 헤더 (#, 로마 숫자) -> 표지 또는 섹션 간지
+        if kind == 'heading' and level == 1:
             flush_slide()
-            content = line.strip()[2:].strip()
+            content = block['text']
 
-            if is_first_header:
-                create_title_slide(prs, content)
-                is_first_header = False
+            if is_first_header and not block['roman']:
+                engine.title_slide(content)
             else:
-                create_section_slide(prs, content)
-
-            i += 1
-            continue
+                engine.section_slide(content)
+            is_first_header = False
 
         # 2. 서브 헤더 (##) -> 슬라이드 제목 (새 슬라이드 시작)
-        elif line.strip().startswith('## ') and not line.strip().startswith('### '):
+        elif kind == 'heading' and level == 2:
             flush_slide()  # 이전 슬라이드 마무리
-            current_slide_title = line.strip()[3:].strip()
-
-            # 다음에 테이블이 바로 있는지 확인
-            j = i + 1
-            while j < len(lines) and not lines[j].strip():
-                j += 1
-
-            if j < len(lines) and lines[j].strip().startswith('|'):
-                table_data, end_idx = parse_markdown_table(lines, j)
-                if table_data:
-                    create_table_slide(prs, current_slide_title, table_data)
-                    current_slide_title = ""
-                    i = end_idx
-                    continue
+            current_slide_title = block['text']
 
-            i += 1
-            continue
+            # 다음에 테이블이 바로 있으면 표 슬라이드
+            if i + 1 < len(blocks) and blocks[i + 1]['type'] == 'table':
+                engine.table_slide(current_slide_title, blocks[i + 1]['rows'])
+                current_slide_title = ""
+                i += 2
+                continue
 
         # 3. 소제목 (###) -> 좌/우 컬럼 제목
-        elif line.strip().startswith('### ') and not line.strip().startswith('#### '):
-            content = line.strip()[4:].strip()
+        elif kind == 'heading' and level == 3:
+            content = block['text']
 
             if not left_title:
                 # 첫번째 ### → 좌측 컬럼 제목
@@ -416,62 +739,23 @@ def create_ppt(markdown_text):
                 left_title = content
                 current_column = 'left'
 
-            i += 1
-            continue
-
-        # 4. #### -> 서브 섹션 (내용에 포함)
-        elif line.strip().startswith('#### '):
-            content = line.strip()[5:].strip()
-            item = {'type': 'subheader', 'text': content}
-            if current_column == 'left':
-                left_items.append(item)
-            else:
-                right_items.append(item)
-            i += 1
-            continue
+        # 4. #### 이하 -> 서브 섹션 (내용에 포함)
+        elif kind == 'heading':
+            add_item({'type': 'subheader', 'text': block['text']})
 
-        # 5. 테이블 감지
-        elif line.strip().startswith('|'):
+        # 5. 테이블
+        elif kind == 'table':
             flush_slide()
-            table_data, end_idx = parse_markdown_table(lines, i)
-            if table_data:
-                create_table_slide(prs, current_slide_title or "Data", table_data)
-                current_slide_title = ""
-            i = end_idx
-            continue
+            engine.table_slide(current_slide_title or "Data", block['rows'])
+            current_slide_title = ""
 
         # 6. 목록 (Bullet Points)
-        elif re.match(r'^\s*([-*]|\d+\.)\s', line):
-            match = re.match(r'^(\s*)([-*]|\d+\.)\s+(.*)', line)
-            if match:
-                indent_str, _, content = match.groups()
-                clean_content = clean_text(content)
-
-                spaces = indent_str.replace('\t', '  ')
-                level = min(len(spaces) // 2, 3)
-
-                item = {'type': 'bullet', 'text': clean_content, 'level': level}
-
-                if current_column == 'left':
-                    left_items.append(item)
-                else:
-                    right_items.append(item)
-
-            i += 1
-            continue
-
-        # 7. 구분선 (---) -> 무시
-        elif line.strip() == '---':
-            i += 1
-            continue
-
-        # 8. 그 외 일반 텍스트
-        elif line.strip():
-            item = {'type': 'text', 'text': clean_text(line)}
-            if current_column == 'left':
-                left_items.append(item)
-            else:
-                right_items.append(item)
+        elif kind == 'list_item':
+            add_item({'type': 'bullet', 'text': clean_text(block['text']), 'level': min(level, 3)})
+
+        # 7. 일반 텍스트 (구분선은 무시)
+        elif kind == 'paragraph':
+            add_item({'type': 'text', 'text': clean_text(block['text'])})
 
         i += 1
 
@@ -0,0 +1,237 @@
+"""
+LLM 호출 전역 Rate Limiter / 동시성 제어
+- (API 키, 모델)별 토큰 버킷으로 분당 요청 수 제한
+- API 키별 동시 호출 수 제한 (스트리밍은 종료 시까지 슬롯 점유)
+- 429(RESOURCE_EXHAUSTED) 발생 시 적응형 백오프 + 요청 속도 감소, 성공 시 점진 회복
+- 우선순위 레인: 보고서 스트리밍(INTERACTIVE)이 백그라운드 OCR(BACKGROUND)보다 먼저 슬롯 획득
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# 모델별 분당 요청 수 (RPM) 기본값
+MODEL_RPM = {
+    'gemini-3-pro-preview': 25,
+    'gemini-3-flash-preview': 60,
+    'gemini-2.0-flash-exp': 10,
+    'gemini-1.5-pro': 30,
+}
+DEFAULT_RPM = 30
+MIN_RPM = 2
+MAX_CONCURRENCY_PER_KEY = 8
+ASYNC_POLL_SEC = 0.05  # acquire_async 재확인 간격
+
+BACKOFF_BASE_SEC = 2.0
+BACKOFF_MAX_SEC = 60.0
+MAX_RETRIES = 5
+
+
+class _Bucket:
+    """(API 키, 모델)별 토큰 버킷"""
+
+    def __init__(self, rpm):
+        self.rpm = float(rpm)
+        self.max_rpm = float(rpm)
+        self.tokens = max(1.0, self.rpm / 10.0)  # 초기 버스트 허용량
+        self.updated = time.monotonic()
+        self.backoff_sec = 0.0
+        self.backoff_until = 0.0
+
+    @property
+    def capacity(self):
+        return max(1.0, self.rpm / 10.0)
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rpm / 60.0)
+
+    def wait_time(self, now):
+        """토큰 1개가 생길 때까지 남은 시간"""
+        if now < self.backoff_until:
+            return self.backoff_until - now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) * 60.0 / self.rpm
+
+
+class RateLimiter:
+    """프로세스 전역 LLM 호출 제어기"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY_PER_KEY):
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        self._buckets = {}
+        self._in_flight = {}           # api_key -> 진행 중 호출 수
+        self._interactive_waiting = {}  # api_key -> 대기 중 INTERACTIVE 호출 수
+        self.stats = {'acquired': 0, 'wait_seconds': 0.0, 'rate_limited': 0}
+
+    def _bucket(self, api_key, model):
+        key = (api_key, model)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(MODEL_RPM.get(model, DEFAULT_RPM))
+            self._buckets[key] = bucket
+        return bucket
+
+    def _try_acquire(self, api_key, model, priority):
+        """(_cond 보유 상태에서 호출) 슬롯 획득 시 0, 아니면 다시 확인할 때까지 대기 시간"""
+        now = time.monotonic()
+        bucket = self._bucket(api_key, model)
+        bucket.refill(now)
+
+        # 백그라운드 호출은 대기 중인 인터랙티브 호출에 양보
+        if priority != PRIORITY_INTERACTIVE and self._interactive_waiting.get(api_key, 0) > 0:
+            return 0.5
+
+        if self._in_flight.get(api_key, 0) >= self.max_concurrency:
+            return 0.5
+
+        wait = bucket.wait_time(now)
+        if wait > 0:
+            return min(wait, 1.0)
+
+        bucket.tokens -= 1.0
+        self._in_flight[api_key] = self._in_flight.get(api_key, 0) + 1
+        self.stats['acquired'] += 1
+        return 0.0
+
+    def _enter_wait(self, api_key, priority):
+        if priority == PRIORITY_INTERACTIVE:
+            self._interactive_waiting[api_key] = self._interactive_waiting.get(api_key, 0) + 1
+
+    def _leave_wait(self, api_key, priority):
+        if priority == PRIORITY_INTERACTIVE:
+            self._interactive_waiting[api_key] -= 1
+            self._cond.notify_all()
+
+    def acquire(self, api_key, model, priority=PRIORITY_BACKGROUND):
+        """호출 슬롯 획득 (필요 시 대기)"""
+        started = time.monotonic()
+        with self._cond:
+            self._enter_wait(api_key, priority)
+            try:
+                while True:
+                    wait = self._try_acquire(api_key, model, priority)
+                    if not wait:
+                        self.stats['wait_seconds'] += time.monotonic() - started
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self._leave_wait(api_key, priority)
+
+    async def acquire_async(self, api_key, model, priority=PRIORITY_BACKGROUND):
+        """
+        acquire의 asyncio 버전 (이벤트 루프를 막지 않고 짧은 간격으로 재확인)
+
+        대기 중 취소되면 슬롯을 잡지 않은 채 종료되므로 release가 필요 없음
+        (스레드로 acquire를 넘기면 취소 후에도 스레드가 슬롯을 잡아 누수됨)
+        """
+        started = time.monotonic()
+        with self._cond:
+            self._enter_wait(api_key, priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(api_key, model, priority)
+                    if not wait:
+                        self.stats['wait_seconds'] += time.monotonic() - started
+                        return
+                await asyncio.sleep(min(wait, ASYNC_POLL_SEC))
+        finally:
+            with self._cond:
+                self._leave_wait(api_key, priority)
+
+    def release(self, api_key):
+        with self._cond:
+            self._in_flight[api_key] = max(0, self._in_flight.get(api_key, 0) - 1)
+            self._cond.notify_all()
+
+    def report_rate_limited(self, api_key, model):
+        """429 수신: 백오프 시간 2배 증가 + RPM 절반으로 감소"""
+        with self._cond:
+            bucket = self._bucket(api_key, model)
+            bucket.backoff_sec = min(BACKOFF_MAX_SEC, (bucket.backoff_sec * 2) or BACKOFF_BASE_SEC)
+            bucket.backoff_until = time.monotonic() + bucket.backoff_sec
+            bucket.rpm = max(MIN_RPM, bucket.rpm / 2.0)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            self.stats['rate_limited'] += 1
+            self._cond.notify_all()
+            return bucket.backoff_sec
+
+    def report_success(self, api_key, model):
+        """성공: 백오프 해제 + RPM 점진 회복"""
+        with self._cond:
+            bucket = self._bucket(api_key, model)
+            bucket.backoff_sec = 0.0
+            if bucket.rpm < bucket.max_rpm:
+                bucket.rpm = min(bucket.max_rpm, bucket.rpm + 1.0)
+
+
+_limiter = RateLimiter()
+
+
+def get_limiter():
+    return _limiter
+
+
+def configure(model=None, rpm=None, max_concurrency=None):
+    """모델별 RPM 또는 키별 동시 호출 수 변경"""
+    if model and rpm:
+        MODEL_RPM[model] = rpm
+    if max_concurrency:
+        _limiter.max_concurrency = max_concurrency
+
+
+def is_rate_limit_error(error):
+    """429 / RESOURCE_EXHAUSTED 오류 여부"""
+    code = getattr(error, 'code', None)
+    if code == 429:
+        return True
+    message = str(error)
+    return '429' in message or 'RESOURCE_EXHAUSTED' in message or 'Resource has been exhausted' in message
+
+
+@contextmanager
+def limit(api_key, model, priority=PRIORITY_BACKGROUND):
+    """
+    호출 구간을 Rate Limiter로 감싸는 컨텍스트 매니저
+
+    Usage:
+        with utils_ratelimit.limit(api_key, model, PRIORITY_INTERACTIVE):
+            resp = client.models.generate_content(...)
+    """
+    _limiter.acquire(api_key, model, priority)
+    try:
+        yield
+    except Exception as e:
+        if is_rate_limit_error(e):
+            _limiter.report_rate_limited(api_key, model)
+        raise
+    else:
+        _limiter.report_success(api_key, model)
+    finally:
+        _limiter.release(api_key)
+
+
+def call_with_backoff(fn, api_key, model, priority=PRIORITY_BACKGROUND, max_retries=MAX_RETRIES):
+    """
+    fn()을 Rate Limiter 아래에서 실행하고, 429 발생 시 백오프 후 재시도
+
+    Returns:
+        fn()의 반환값
+    """
+    attempt = 0
+    while True:
+        try:
+            with limit(api_key, model, priority):
+                return fn()
+        except Exception as e:
+            attempt += 1
+            if not is_rate_limit_error(e) or attempt > max_retries:
+                raise
+            # 대기는 다음 acquire()에서 backoff_until 기준으로 수행됨
@@ -0,0 +1,344 @@
+"""
+RFI 로컬 대사(Reconciliation) 엔진
+- 기존 RFI 목록(표/목록 텍스트)과 파일 인덱스(경로 목록/트리)를 파싱
+- 한글 2-gram + 영문/숫자 토큰 정규화, 한/영 실사 용어 동의어 치환
+- 역색인 + IDF 가중 포함도(containment)로 파일명 유사도 계산, 폴더 경로/구분 열은 보조 점수
+- 확신도가 높은 항목(O/X)은 바로 판정, 애매한 항목만 '?'로 남겨 호출부에서 모델에 위임
+- 요청 연도와 다른 연도의 파일만 일치하면 O로 판정하지 않음 (python utils_rfi_match.py로 회귀 사례 확인)
+"""
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+STATUS_SUBMITTED = "O"
+STATUS_CHECK = "△"
+STATUS_MISSING = "X"
+STATUS_UNSURE = "?"  # 모델 판정 대상 (최종 표에는 남지 않음)
+
+HIGH_CONFIDENCE = 0.8   # 이상이면 O
+LOW_CONFIDENCE = 0.3    # 미만이면 X
+MAX_MATCHED_FILES = 3
+FOLDER_WEIGHT = 0.5     # 파일명이 아닌 폴더 경로에서만 일치한 토큰의 가중치
+CATEGORY_BONUS = 0.1    # RFI 구분 열과 폴더명이 겹치면 가산
+DIGIT_WEIGHT = 0.3      # 연도/숫자 토큰 가중치
+
+STATUS_TABLE_HEADER = (
+    "| No. | 구분 | 기존 요청 자료 | 매칭된 파일 정보(경로) | 상태(O/△/X) | 비고 |\n"
+    "| --- | --- | --- | --- | --- | --- |\n"
+)
+
+# 한/영 실사 용어 → 표준 한글 용어 (긴 표현부터 치환)
+SYNONYMS = {
+    'financial statements': '재무제표', 'financial statement': '재무제표', 'f/s': '재무제표', 'fs': '재무제표',
+    'audit report': '감사보고서', 'trial balance': '시산표', 'tb': '시산표',
+    'general ledger': '총계정원장', 'gl': '총계정원장', 'tax return': '세무조정계산서',
+    'shareholders list': '주주명부', 'shareholder list': '주주명부', 'cap table': '주주명부',
+    'articles of incorporation': '정관', 'aoi': '정관',
+    'corporate registry': '법인등기부등본', 'certificate of incorporation': '법인등기부등본',
+    'business registration': '사업자등록증', 'business plan': '사업계획서',
+    'organization chart': '조직도', 'org chart': '조직도',
+    'board minutes': '이사회의사록', 'minutes': '의사록',
+    'employee list': '임직원명부', 'payroll': '급여대장',
+    'patent': '특허', 'litigation': '소송', 'lawsuit': '소송', 'insurance': '보험',
+    'lease': '임대차계약서', 'agreement': '계약서', 'contract': '계약서',
+    'borrowings': '차입금', 'borrowing': '차입금', 'loan': '차입금', 'budget': '예산',
+}
+_SYNONYM_PATTERN = re.compile(
+    r'(?<![a-z])(' + '|'.join(re.escape(k) for k in sorted(SYNONYMS, key=len, reverse=True)) + r')(?![a-z])'
+)
+_TOKEN_PATTERN = re.compile(r'[a-z]+|\d+|[가-힣]+')
+_STOPWORDS = {
+    '자료', '관련', '일체', '사본', '등', '및', '최근', '개년', '개월', '년도', '요청', '제출', '각', '해당', '기타',
+    '파일', '전체', '일부', '첨부', '별첨', '원본', '최종', '주요', '현황', '내역', '포함', '진행', '중인',
+    'copy', 'list', 'file', 'the', 'of', 'and', 'for', 'pdf', 'xlsx', 'xls', 'docx', 'doc', 'pptx', 'zip', 'hwp',
+}
+
+_TABLE_SEPARATOR = re.compile(r'^\|?\s*:?-{2,}')
+_LIST_ITEM = re.compile(r'^\s*(?:[-*•]|\(?\d{1,3}[.)])\s+(.+)$')
+_TREE_PREFIX = re.compile(r'^[\s│├└─|`\-*•·]+')
+_FILE_EXT = re.compile(r'\.[A-Za-z0-9]{2,5}$')
+_YEAR_TOKEN = re.compile(r'^(?:19|20)\d{2}$')
+
+_NO_KEYS = ('no', '번호', '순번', '#')
+_CATEGORY_KEYS = ('구분', '분류', '카테고리', 'category', '대분류')
+_ITEM_KEYS = ('요청 자료', '요청자료', '자료명', '요청사항', '요청 사항', '항목', '내용', 'description', 'item', '자료')
+
+
+def tokens(text):
+    """정규화 토큰 집합 (한글은 2-gram, 영문 단어, 숫자)"""
+    text = unicodedata.normalize('NFC', text).lower()
+    text = _SYNONYM_PATTERN.sub(lambda m: f" {SYNONYMS[m.group(1)]} ", text)
+    grams = set()
+    for token in _TOKEN_PATTERN.findall(text):
+        if token in _STOPWORDS:
+            continue
+        if token[0] >= '가':
+            if len(token) == 1:
+                continue
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            grams.add(token)
+    return grams - _STOPWORDS
+
+
+# =========================
+# 입력 파싱
+# =========================
+
+def _cells(line):
+    parts = line.strip().strip('|').split('|')
+    return [p.strip().replace('**', '') for p in parts]
+
+
+def _find_column(header, keys):
+    lowered = [h.lower() for h in header]
+    for key in keys:
+        for idx, name in enumerate(lowered):
+            if key == name or (len(key) > 1 and key in name):
+                return idx
+    return None
+
+
+def _parse_table(rows):
+    header = _cells(rows[0])
+    body = [_cells(r) for r in rows[1:] if not _TABLE_SEPARATOR.match(r.strip())]
+    if not body:
+        return []
+    no_col = _find_column(header, _NO_KEYS)
+    cat_col = _find_column(header, _CATEGORY_KEYS)
+    item_col = _find_column(header, _ITEM_KEYS)
+    if item_col is None or item_col in (no_col, cat_col):
+        # 헤더로 못 찾으면 평균 글자 수가 가장 긴 열
+        width = len(header)
+        lengths = [sum(len(r[i]) for r in body if i < len(r)) for i in range(width)]
+        item_col = max(range(width), key=lambda i: lengths[i])
+
+    items = []
+    category = ""
+    for row in body:
+        if item_col >= len(row) or not row[item_col]:
+            continue
+        if cat_col is not None and cat_col < len(row) and row[cat_col]:
+            category = row[cat_col]  # 병합 셀(빈 값)은 위 행의 구분 상속
+        items.append({
+            'no': row[no_col] if no_col is not None and no_col < len(row) and row[no_col] else "",
+            'category': category,
+            'item': row[item_col],
+        })
+    return items
+
+
+def parse_rfi_items(text):
+    """
+    기존 RFI 텍스트(Markdown 표 또는 목록) → 항목 목록
+
+    Returns:
+        list of dict: no, category, item
+    """
+    items = []
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith('|'):
+            rows = []
+            while i < len(lines) and lines[i].strip().startswith('|'):
+                rows.append(lines[i].strip())
+                i += 1
+            if len(rows) >= 2:
+                items.extend(_parse_table(rows))
+            continue
+        m = _LIST_ITEM.match(line)
+        if m:
+            items.append({'no': "", 'category': "", 'item': m.group(1).strip()})
+        i += 1
+
+    for idx, item in enumerate(items, start=1):
+        item['no'] = item['no'] or str(idx)
+    return items
+
+
+def parse_file_index(text):
+    """
+    붙여넣은 파일 인덱스 → 파일 경로 목록
+    '폴더/파일.pdf' 형식과 들여쓰기 트리 형식(├── 등)을 모두 지원
+    """
+    paths = []
+    stack = []  # (들여쓰기, 폴더명)
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        prefix = _TREE_PREFIX.match(raw)
+        indent = len(prefix.group(0)) if prefix else 0
+        name = raw[indent:].strip()
+        if not name:
+            continue
+        if '/' in name or '\\' in name:
+            paths.append(name.replace('\\', '/'))
+            continue
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        if _FILE_EXT.search(name):
+            paths.append("/".join([folder for _, folder in stack] + [name]))
+        else:
+            stack.append((indent, name))
+    return paths
+
+
+# =========================
+# 매칭
+# =========================
+
+class FileIndex:
+    """파일명/폴더 토큰 역색인"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.name_postings = defaultdict(set)
+        self.folder_postings = defaultdict(set)
+        self.folder_tokens = []
+        self.years = []  # 파일별 연도 토큰
+        for idx, path in enumerate(self.paths):
+            folder, _, name = path.rpartition('/')
+            name_grams = tokens(_FILE_EXT.sub('', name))
+            folder_grams = tokens(folder) - name_grams
+            for g in name_grams:
+                self.name_postings[g].add(idx)
+            for g in folder_grams:
+                self.folder_postings[g].add(idx)
+            self.folder_tokens.append(tokens(folder))
+            self.years.append({g for g in name_grams | folder_grams if _YEAR_TOKEN.match(g)})
+        self._n = max(1, len(self.paths))
+
+    def weight(self, gram):
+        df = len(self.name_postings.get(gram, ())) + len(self.folder_postings.get(gram, ()))
+        w = math.log((self._n + 1) / (df + 1)) + 1.0
+        return w * DIGIT_WEIGHT if gram.isdigit() else w
+
+    def score(self, item_grams, category_grams=frozenset()):
+        """항목 토큰 → {파일 idx: 점수(0~1)}"""
+        weights = {g: self.weight(g) for g in item_grams}
+        total = sum(weights.values())
+        if not total:
+            return {}
+        scores = defaultdict(float)
+        for g, w in weights.items():
+            for idx in self.name_postings.get(g, ()):
+                scores[idx] += w
+            for idx in self.folder_postings.get(g, ()):
+                scores[idx] += w * FOLDER_WEIGHT
+        result = {}
+        for idx, value in scores.items():
+            score = value / total
+            if category_grams and category_grams & self.folder_tokens[idx]:
+                score += CATEGORY_BONUS
+            result[idx] = min(1.0, score)
+        return result
+
+
+def _year_mismatch(index, item_grams, file_indices):
+    """항목에 연도가 있는데 매칭 파일 어디에도 그 연도가 없고 다른 연도만 있으면 True"""
+    item_years = {g for g in item_grams if _YEAR_TOKEN.match(g)}
+    if not item_years or not file_indices:
+        return False
+    file_years = set().union(*(index.years[idx] for idx in file_indices))
+    return bool(file_years) and not item_years & file_years
+
+
+def _match_one(index, item):
+    item_grams = tokens(item['item'])
+    scores = index.score(item_grams, tokens(item['category']))
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    best = ranked[0][1] if ranked else 0.0
+    matched = [idx for idx, score in ranked[:MAX_MATCHED_FILES] if score >= max(LOW_CONFIDENCE, best - 0.15)]
+    files = [index.paths[idx] for idx in matched]
+    if best >= HIGH_CONFIDENCE and not _year_mismatch(index, item_grams, matched):
+        status = STATUS_SUBMITTED
+    elif best < LOW_CONFIDENCE:
+        status, files = STATUS_MISSING, []
+    else:
+        status = STATUS_UNSURE  # 연도가 다른 파일만 있으면 점수와 무관하게 모델 판정
+    candidates = [index.paths[idx] for idx, _ in ranked[:5]]
+    return dict(item, status=status, score=round(best, 2), files=files, candidates=candidates, note="")
+
+
+def match_items(items, paths):
+    """
+    RFI 항목별 매칭 결과
+
+    Returns:
+        list of dict: no, category, item, status(O/X/?), score, files, candidates, note
+    """
+    index = FileIndex(paths)
+    return [_match_one(index, item) for item in items]
+
+
+def rematch(results, previous_paths, paths):
+    """
+    이전 라운드 결과에 파일 인덱스 변경분만 반영
+
+    - 매칭 파일이 삭제된 항목: 현재 전체 인덱스로 다시 매칭
+    - 아직 O가 아닌 항목: 파일이 추가된 경우에만 현재 전체 인덱스로 다시 매칭해 O가 되거나 점수가 오르면 갱신
+    - 나머지 항목은 이전 판정(모델 판정 포함) 유지
+    (재평가 대상만 제한하고, 점수는 항상 전체 인덱스 기준이라 IDF/연도 비교가 첫 라운드와 같음)
+
+    Returns:
+        (갱신된 결과 목록, delta dict: added, removed, changed)
+    """
+    previous = set(previous_paths)
+    current = set(paths)
+    added = [p for p in paths if p not in previous]
+    removed = sorted(previous - current)
+    removed_set = set(removed)
+
+    full_index = None
+    updated, changed = [], []
+    for r in results:
+        new = r
+        if removed_set.intersection(r['files']):
+            full_index = full_index or FileIndex(paths)
+            new = _match_one(full_index, r)
+        elif added and r['status'] != STATUS_SUBMITTED:
+            full_index = full_index or FileIndex(paths)
+            candidate = _match_one(full_index, r)
+            if candidate['status'] == STATUS_SUBMITTED or candidate['score'] > r['score']:
+                new = candidate
+        if new is not r and (new['status'], new['files']) != (r['status'], r['files']):
+            changed.append(new)
+        updated.append(new)
+    return updated, {'added': added, 'removed': removed, 'changed': changed}
+
+
+def _cell(text):
+    return str(text).replace('|', '/').replace('\n', ' ').strip()
+
+
+def render_status_table(results):
+    """매칭 결과 → 인덱싱 프롬프트와 같은 형식의 Markdown 표"""
+    lines = [STATUS_TABLE_HEADER.rstrip('\n')]
+    for r in results:
+        status = STATUS_CHECK if r['status'] == STATUS_UNSURE else r['status']
+        note = r['note'] or (f"자동 매칭 (유사도 {r['score']:.2f})" if r['files'] else "")
+        lines.append(
+            f"| {_cell(r['no'])} | {_cell(r['category'])} | {_cell(r['item'])} | "
+            f"{_cell(', '.join(r['files']))} | {status} | {_cell(note)} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+# 회귀 사례: (구분, 요청 자료, 파일 경로 목록, 기대 상태)
+REGRESSION_CASES = [
+    ("재무", "2023년 감사보고서", ["재무/2022_감사보고서.pdf"], STATUS_UNSURE),
+    ("재무", "2023년 감사보고서", ["재무/2022_감사보고서.pdf", "재무/2023_감사보고서.pdf"], STATUS_SUBMITTED),
+    ("재무", "감사보고서", ["재무/2022_감사보고서.pdf"], STATUS_SUBMITTED),
+    ("법무", "정관", ["재무/2022_감사보고서.pdf"], STATUS_MISSING),
+]
+
+
+if __name__ == "__main__":
+    for category, text, case_paths, expected in REGRESSION_CASES:
+        result = match_items([{'no': "1", 'category': category, 'item': text}], case_paths)[0]
+        mark = "ok" if result['status'] == expected else "FAIL"
+        print(f"[{mark}] {text} / {case_paths} → {result['status']} ({result['score']:.2f}), 기대 {expected}")
+        assert result['status'] == expected
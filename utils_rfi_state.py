@@ -0,0 +1,68 @@
+"""
+딜별 RFI 진행 상태 저장소
+- 라운드마다 RFI 항목/매칭 파일/상태와 당시 파일 인덱스를 JSON으로 저장
+- 다음 라운드에서는 파일 인덱스 변경분(추가/삭제 파일)만 다시 대사 (utils_rfi_match.rematch)
+- 기존 RFI 목록 자체가 바뀌면(서명 불일치) 전체 대사부터 다시 시작
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+STATE_DIR = os.getenv("GEM_RFI_STATE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "gem_intern", "rfi_state"))
+
+_lock = threading.Lock()
+
+
+def _path(deal_name):
+    safe = re.sub(r'[^0-9A-Za-z가-힣._-]+', '_', deal_name.strip())[:60]
+    digest = hashlib.sha256(deal_name.strip().encode("utf-8")).hexdigest()[:8]
+    return os.path.join(STATE_DIR, f"{safe}_{digest}.json")
+
+
+def rfi_signature(existing_rfi):
+    """기존 RFI 텍스트 서명 (공백 차이는 무시)"""
+    normalized = " ".join((existing_rfi or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def load(deal_name):
+    """저장된 상태 (없거나 읽을 수 없으면 None)"""
+    if not deal_name or not deal_name.strip():
+        return None
+    try:
+        with open(_path(deal_name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(deal_name, existing_rfi, paths, results):
+    """라운드 결과 저장 (원자적 교체)"""
+    if not deal_name or not deal_name.strip():
+        return
+    previous = load(deal_name) or {}
+    state = {
+        'deal_name': deal_name.strip(),
+        'rfi_signature': rfi_signature(existing_rfi),
+        'paths': list(paths),
+        'results': list(results),
+        'rounds': previous.get('rounds', 0) + 1,
+        'updated': time.time(),
+    }
+    with _lock:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, _path(deal_name))
+
+
+def clear(deal_name):
+    try:
+        os.remove(_path(deal_name))
+    except OSError:
+        pass
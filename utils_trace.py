@@ -0,0 +1,276 @@
+"""
+단계별 지연/토큰 계측 (Tracing)
+- span(): 파싱(파서별), OCR(페이지별), LLM 호출(TTFT/토큰/재시도), docx/pptx 렌더링 구간 측정
+- run(): 보고서 1회 생성 단위로 span을 묶음 (contextvars 기반, 활성 run이 없으면 기록하지 않음)
+- JSONL 또는 OpenTelemetry 호환 레코드로 내보내기, UI용 단계별 요약 제공
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_RUNS = 50
+SUMMED_ATTRS = ("ttft", "tokens_in", "tokens_out", "retries", "resumes", "chars")  # summarize()에서 합산하는 속성
+TRACE_JSONL_PATH = os.getenv("GEM_TRACE_JSONL", "")  # 설정 시 종료된 span을 파일에 계속 추가
+
+_current_run = contextvars.ContextVar("gem_trace_run", default=None)
+_current_span = contextvars.ContextVar("gem_trace_span", default=None)
+
+_runs = OrderedDict()  # run_id -> {'name', 'started', 'spans': [...]}
+_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("run_id", "span_id", "parent_id", "name", "attrs", "start", "end", "status", "error")
+
+    def __init__(self, run_id, name, parent_id, attrs):
+        self.run_id = run_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.time()
+        self.end = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attrs):
+        """span 속성 추가/갱신 (토큰 수, 파서명 등)"""
+        self.attrs.update(attrs)
+
+    def finish(self, error=None):
+        """start_span()으로 시작한 span 종료 및 기록"""
+        if self.end is not None:
+            return
+        if error is not None:
+            self.status = "error"
+            self.error = str(error)[:500]
+        self.end = time.time()
+        _record(self)
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    """활성 run이 없을 때 사용 (오버헤드 최소화)"""
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self, error=None):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def new_run(name="run"):
+    """새 run 등록 후 run_id 반환"""
+    run_id = uuid.uuid4().hex
+    with _lock:
+        _runs[run_id] = {"name": name, "started": time.time(), "spans": []}
+        while len(_runs) > MAX_RUNS:
+            _runs.popitem(last=False)
+    return run_id
+
+
+@contextmanager
+def run(name="run", run_id=None):
+    """
+    run 활성화 (run_id를 주면 기존 run에 이어서 기록)
+
+    Usage:
+        with utils_trace.run("report") as run_id:
+            ...
+    """
+    if run_id is None or run_id not in _runs:
+        run_id = new_run(name)
+    token = _current_run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def resume(run_id):
+    """기존 run에 이어서 기록 (run_id가 없거나 만료되었으면 기록하지 않음)"""
+    if not run_id or run_id not in _runs:
+        yield None
+        return
+    token = _current_run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run.reset(token)
+
+
+def current_run_id():
+    return _current_run.get()
+
+
+def annotate(**attrs):
+    """현재 span에 속성 추가 (활성 span이 없으면 무시)"""
+    s = _current_span.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    구간 측정
+
+    Usage:
+        with utils_trace.span("parse.markitdown", file=name) as s:
+            ...
+            s.set(chars=len(text))
+    """
+    run_id = _current_run.get()
+    if run_id is None:
+        yield _NOOP
+        return
+
+    parent = _current_span.get()
+    s = Span(run_id, name, parent.span_id if parent else None, attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "error"
+        s.error = str(e)[:500]
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end = time.time()
+        _record(s)
+
+
+def start_span(name, **attrs):
+    """
+    현재 span으로 설정하지 않는 span 시작 (제너레이터/스트리밍용, finish()로 종료)
+    yield를 사이에 두고 contextvar를 바꾸면 호출부 span 계층이 꼬이므로 별도 제공
+    """
+    run_id = _current_run.get()
+    if run_id is None:
+        return _NOOP
+    parent = _current_span.get()
+    return Span(run_id, name, parent.span_id if parent else None, attrs)
+
+
+def traced(name):
+    """함수 전체를 span으로 감싸는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(s):
+    with _lock:
+        entry = _runs.get(s.run_id)
+        if entry is not None:
+            entry["spans"].append(s)
+    if TRACE_JSONL_PATH:
+        try:
+            with open(TRACE_JSONL_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass
+
+
+def get_spans(run_id):
+    with _lock:
+        entry = _runs.get(run_id)
+        return list(entry["spans"]) if entry else []
+
+
+def export_jsonl(run_id, path):
+    """run의 span을 JSONL 파일로 저장"""
+    with open(path, "w", encoding="utf-8") as f:
+        for s in get_spans(run_id):
+            f.write(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def to_jsonl(run_id):
+    return "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in get_spans(run_id))
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otel(run_id, service_name="gem-intern"):
+    """OTLP/JSON(ResourceSpans) 호환 레코드로 변환"""
+    spans = []
+    for s in get_spans(run_id):
+        spans.append({
+            "traceId": s.run_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(s.start * 1e9)),
+            "endTimeUnixNano": str(int((s.end or s.start) * 1e9)),
+            "attributes": [{"key": k, "value": _otel_value(v)} for k, v in s.attrs.items()],
+            "status": {"code": 2, "message": s.error} if s.status == "error" else {"code": 1},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "utils_trace"}, "spans": spans}],
+        }]
+    }
+
+
+def summarize(run_id):
+    """
+    UI용 단계별 요약
+
+    Returns:
+        list of dict: name, count, total_sec, max_sec, errors, attrs(SUMMED_ATTRS 합계)
+        (시작 시각 순)
+    """
+    groups = OrderedDict()
+    for s in sorted(get_spans(run_id), key=lambda x: x.start):
+        g = groups.setdefault(s.name, {"name": s.name, "count": 0, "total_sec": 0.0, "max_sec": 0.0, "errors": 0, "attrs": {}})
+        g["count"] += 1
+        g["total_sec"] += s.duration
+        g["max_sec"] = max(g["max_sec"], s.duration)
+        if s.status == "error":
+            g["errors"] += 1
+        for k in SUMMED_ATTRS:
+            v = s.attrs.get(k)
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and v >= 0:
+                g["attrs"][k] = g["attrs"].get(k, 0) + v
+    return list(groups.values())